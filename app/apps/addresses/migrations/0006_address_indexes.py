@@ -0,0 +1,48 @@
+# Generated by Django 3.2.13 on 2026-10-18 08:38
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("addresses", "0005_alter_district_options"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="address",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["street_name"],
+                name="address_street_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="address",
+            index=models.Index(fields=["number"], name="address_number_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="address",
+            index=models.Index(
+                django.db.models.functions.text.Upper("postal_code"),
+                name="address_upper_postal_code_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="address",
+            index=models.Index(
+                django.db.models.functions.text.Upper("suffix"),
+                name="address_upper_suffix_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="address",
+            index=models.Index(
+                django.db.models.functions.text.Upper("suffix_letter"),
+                name="address_upper_suffix_lttr_idx",
+            ),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.models.functions import Upper
 from utils.api_queries_bag import do_bag_search_id, get_bag_data
 
 
@@ -102,3 +104,17 @@ class Address(models.Model):
                     f"verblijfsobject_url: {verblijfsobject_url}, verblijfsobject: {verblijfsobject}"
                 )
         return super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["street_name"],
+                opclasses=["gin_trgm_ops"],
+                name="address_street_name_trgm_idx",
+            ),
+            models.Index(fields=["number"], name="address_number_idx"),
+            # iexact lookups compare upper() of both sides
+            models.Index(Upper("postal_code"), name="address_upper_postal_code_idx"),
+            models.Index(Upper("suffix"), name="address_upper_suffix_idx"),
+            models.Index(Upper("suffix_letter"), name="address_upper_suffix_lttr_idx"),
+        ]
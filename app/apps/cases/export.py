@@ -0,0 +1,133 @@
+import csv
+import json
+
+from apps.cases.models import CaseState, Subject
+from apps.workflow.models import CaseWorkflow
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import OuterRef, Subquery
+from rest_framework.utils.encoders import JSONEncoder
+
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_CONTENT_TYPES = {
+    EXPORT_FORMAT_CSV: "text/csv",
+    EXPORT_FORMAT_NDJSON: "application/x-ndjson",
+}
+# rows fetched per round trip of the server side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# exported columns and the case fields they are read from
+EXPORT_FIELDS = (
+    ("id", "id"),
+    ("identification", "identification"),
+    ("start_date", "start_date"),
+    ("end_date", "end_date"),
+    ("theme", "theme__name"),
+    ("reason", "reason__name"),
+    ("project", "project__name"),
+    ("description", "description"),
+    ("sensitive", "sensitive"),
+    ("is_enforcement_request", "is_enforcement_request"),
+    ("is_legacy_bwv", "is_legacy_bwv"),
+    ("legacy_bwv_case_id", "legacy_bwv_case_id"),
+    ("mma_number", "mma_number"),
+    ("previous_case", "previous_case_id"),
+    ("created", "created"),
+    ("last_updated", "last_updated"),
+    ("bag_id", "address__bag_id"),
+    ("street_name", "address__street_name"),
+    ("number", "address__number"),
+    ("suffix_letter", "address__suffix_letter"),
+    ("suffix", "address__suffix"),
+    ("postal_code", "address__postal_code"),
+    ("district", "address__district__name"),
+    ("housing_corporation", "address__housing_corporation__name"),
+    ("lat", "address__lat"),
+    ("lng", "address__lng"),
+    ("state", "export_state"),
+    ("subjects", "export_subjects"),
+    ("workflow_states", "export_workflow_states"),
+)
+
+
+def array_subquery(queryset, case_field, field):
+    # the values of a related field as an array, without joining them into the cases
+    return Subquery(
+        queryset.order_by()
+        .values(case_field)
+        .annotate(values=ArrayAgg(field, distinct=True, ordering=field))
+        .values("values")
+    )
+
+
+def get_export_rows(queryset):
+    """
+    Yields a flat dict per case, read with a server side cursor in chunks so the
+    memory use doesn't depend on the number of cases
+    """
+    queryset = queryset.annotate(
+        export_state=Subquery(
+            CaseState.objects.filter(case=OuterRef("pk"))
+            .order_by("-created")
+            .values("status")[:1]
+        ),
+        export_subjects=array_subquery(
+            Subject.objects.filter(cases=OuterRef("pk")), "cases", "name"
+        ),
+        export_workflow_states=array_subquery(
+            CaseWorkflow.objects.filter(
+                case=OuterRef("pk"),
+                case_state_type__isnull=False,
+                tasks__completed=False,
+            ),
+            "case",
+            "case_state_type__name",
+        ),
+    )
+    if not queryset.ordered:
+        queryset = queryset.order_by("id")
+
+    for values in queryset.values(*[field for column, field in EXPORT_FIELDS]).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    ):
+        row = {column: values[field] for column, field in EXPORT_FIELDS}
+        # like Case.get_state for cases without a state
+        if row["state"] is None:
+            row["state"] = (
+                CaseState.CaseStateChoice.AFGESLOTEN
+                if row["end_date"]
+                else CaseState.CaseStateChoice.HANDHAVING
+            )
+        row["subjects"] = row["subjects"] or []
+        row["workflow_states"] = row["workflow_states"] or []
+        yield row
+
+
+class Echo:
+    # csv.writer writes each row to this and returns it, so it can be streamed
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([column for column, field in EXPORT_FIELDS])
+    for row in rows:
+        yield writer.writerow(
+            [
+                ", ".join(value) if isinstance(value, list) else value
+                for value in row.values()
+            ]
+        )
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder) + "\n"
+
+
+def stream_export(queryset, export_format):
+    rows = get_export_rows(queryset)
+    if export_format == EXPORT_FORMAT_NDJSON:
+        return stream_ndjson(rows)
+    return stream_csv(rows)
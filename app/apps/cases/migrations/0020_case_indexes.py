@@ -0,0 +1,30 @@
+# Generated by Django 3.2.13 on 2026-10-18 08:38
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0019_alter_case_ton_ids"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="case",
+            index=models.Index(fields=["start_date"], name="case_start_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="case",
+            index=models.Index(
+                fields=["end_date", "start_date"], name="case_end_date_start_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="case",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["ton_ids"], name="case_ton_ids_gin_idx"
+            ),
+        ),
+    ]
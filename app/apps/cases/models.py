@@ -1,7 +1,6 @@
 import uuid
 from itertools import chain
 from re import sub
-from time import sleep
 
 from apps.addresses.models import Address
 from apps.events.models import CaseEvent, ModelEventEmitter, TaskModelEventEmitter
@@ -9,6 +8,7 @@ from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models, transaction
 from django.utils import timezone
 
@@ -88,6 +88,13 @@ class Subject(models.Model):
 
 class Case(ModelEventEmitter):
     EVENT_TYPE = CaseEvent.TYPE_CASE
+    EVENT_PREFETCH_RELATED = (
+        "author",
+        "reason",
+        "project",
+        "subjects",
+        "case_created_advertisements",
+    )
 
     identification = models.CharField(
         max_length=255, null=True, blank=True, unique=True
@@ -201,6 +208,9 @@ class Case(ModelEventEmitter):
         return f"Case: {self.id}"
 
     def get_workflows(self):
+        # open_workflows is prefetched by the case endpoints
+        if hasattr(self, "open_workflows"):
+            return self.open_workflows
         return (
             self.workflows.all()
             .filter(tasks__isnull=False, tasks__completed=False)
@@ -208,7 +218,11 @@ class Case(ModelEventEmitter):
         )
 
     def get_state(self):
-        casestates = self.case_states.all().last()
+        if "case_states" in getattr(self, "_prefetched_objects_cache", {}):
+            casestates = list(self.case_states.all())
+            casestates = casestates[-1] if casestates else None
+        else:
+            casestates = self.case_states.all().last()
         if casestates:
             return casestates.status
         # TODO below should not be happening in the future
@@ -217,6 +231,9 @@ class Case(ModelEventEmitter):
         return CaseState.CaseStateChoice.HANDHAVING
 
     def force_citizen_report_feedback(self, instance=None) -> bool:
+        """
+        instance is a Debriefing, a CaseUserTask or a list of CaseUserTasks of this case
+        """
         from apps.cases.tasks import task_update_citizen_report_feedback_workflows
         from apps.debriefings.models import Debriefing
         from apps.workflow.models import CaseUserTask
@@ -226,8 +243,12 @@ class Case(ModelEventEmitter):
             instance = self.debriefings.order_by("date_modified").last()
 
         if isinstance(instance, CaseUserTask):
-            if instance.task_name == "task_set_next_step":
-                force = True
+            instance = [instance]
+        if isinstance(instance, list):
+            force = any(
+                case_user_task.task_name == "task_set_next_step"
+                for case_user_task in instance
+            )
         elif isinstance(instance, Debriefing):
             force = bool(
                 instance.violation
@@ -238,11 +259,20 @@ class Case(ModelEventEmitter):
                 ]
             )
         if force:
-            task_update_citizen_report_feedback_workflows.delay(self.id, force)
-            sleep(1)
+            # the workflows are updated once the changes that forced feedback are committed
+            transaction.on_commit(
+                lambda: task_update_citizen_report_feedback_workflows.delay(
+                    self.id, force
+                )
+            )
         return force
 
     def get_schedules(self):
+        if "schedules" in getattr(self, "_prefetched_objects_cache", {}):
+            schedules = list(self.schedules.all())
+            if schedules:
+                return [max(schedules, key=lambda s: s.date_added)]
+            return []
         qs = self.schedules.all().order_by("-date_added")
         if qs:
             qs = [qs.first()]
@@ -268,6 +298,14 @@ class Case(ModelEventEmitter):
 
     class Meta:
         ordering = ["-start_date"]
+        indexes = [
+            models.Index(fields=["start_date"], name="case_start_date_idx"),
+            # open cases filter combined with the default ordering
+            models.Index(
+                fields=["end_date", "start_date"], name="case_end_date_start_date_idx"
+            ),
+            GinIndex(fields=["ton_ids"], name="case_ton_ids_gin_idx"),
+        ]
 
 
 class CaseDocument(models.Model):
@@ -345,6 +383,7 @@ class CaseCloseReason(models.Model):
 
 class CaseClose(TaskModelEventEmitter):
     EVENT_TYPE = CaseEvent.TYPE_CASE_CLOSE
+    EVENT_PREFETCH_RELATED = ("author", "reason", "result")
 
     case = models.ForeignKey(Case, on_delete=models.CASCADE)
     reason = models.ForeignKey(CaseCloseReason, on_delete=models.PROTECT)
@@ -377,6 +416,7 @@ class CaseClose(TaskModelEventEmitter):
 
 class CitizenReport(TaskModelEventEmitter):
     EVENT_TYPE = CaseEvent.TYPE_CITIZEN_REPORT
+    EVENT_PREFETCH_RELATED = ("author", "case__theme", "related_advertisements")
 
     case = models.ForeignKey(
         Case, related_name="case_citizen_reports", on_delete=models.CASCADE
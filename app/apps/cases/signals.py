@@ -1,9 +1,11 @@
 import logging
 
 from apps.cases.models import Case, CaseClose, CaseState, CitizenReport
+from apps.main.counts import invalidate_counts
 from apps.workflow.models import CaseWorkflow
 from apps.workflow.tasks import task_create_citizen_report_worflow_for_case
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 logger = logging.getLogger(__name__)
@@ -32,6 +34,12 @@ def start_workflow_for_case(sender, instance, created, **kwargs):
         task_create_main_worflow_for_case.delay(case_id=instance.id, data=data)
 
 
+@receiver(post_save, sender=Case, dispatch_uid="case_invalidate_counts")
+@receiver(post_delete, sender=Case, dispatch_uid="case_delete_invalidate_counts")
+def case_invalidate_counts(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_counts(Case))
+
+
 @receiver(post_save, sender=CitizenReport, dispatch_uid="complete_citizen_report_task")
 def complete_citizen_report_task(sender, instance, created, **kwargs):
     if kwargs.get("raw"):
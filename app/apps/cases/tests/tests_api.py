@@ -1,6 +1,9 @@
+import csv
 import datetime
 import io
+import json
 import os
+import uuid
 
 import requests_mock
 from apps.cases.models import (
@@ -11,10 +14,14 @@ from apps.cases.models import (
     CaseTheme,
     CitizenReport,
 )
+from apps.main.counts import invalidate_counts
 from apps.openzaak.tests.utils import OpenZaakBaseMixin, ZakenBackendTestMixin
+from apps.schedules.models import Schedule
 from apps.summons.models import SummonType
-from apps.workflow.models import CaseWorkflow, WorkflowOption
+from apps.workflow.models import CaseUserTask, CaseWorkflow, WorkflowOption
 from django.core import management
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from model_bakery import baker
@@ -173,6 +180,77 @@ class CaseListApiTest(ZakenBackendTestMixin, APITestCase):
             len(get_paginated_results(PAGE_SIZE)), len(get_paginated_results(PAGE_SIZE))
         )
 
+    def test_cursor_pagination(self):
+        """Walking all pages in cursor mode returns every case once, newest first"""
+
+        cases = baker.make(Case, _quantity=5)
+        client = get_authenticated_client()
+
+        response = client.get(
+            reverse("cases-list"), {"pagination": "cursor", "page_size": 2}
+        )
+        self.assertNotIn("count", response.data)
+        ids = [c["id"] for c in response.data["results"]]
+        while response.data["next"]:
+            response = client.get(response.data["next"])
+            ids.extend(c["id"] for c in response.data["results"])
+
+        self.assertEqual(ids, sorted([c.id for c in cases], reverse=True))
+
+    def test_cursor_pagination_ordering_and_count(self):
+        """Cursor mode orders on an allowed field and only counts if requested"""
+
+        DATE = datetime.date(2022, 1, 1)
+        cases = [
+            baker.make(Case, start_date=DATE + datetime.timedelta(days=i % 2))
+            for i in range(4)
+        ]
+        client = get_authenticated_client()
+
+        response = client.get(
+            reverse("cases-list"),
+            {"pagination": "cursor", "ordering": "start_date", "include_count": "true"},
+        )
+
+        self.assertEqual(response.data["count"], 4)
+        self.assertEqual(
+            [c["id"] for c in response.data["results"]],
+            [cases[0].id, cases[2].id, cases[1].id, cases[3].id],
+        )
+
+    def test_cursor_pagination_same_start_date(self):
+        """Cursor mode walks more than a page of cases on one start date, and without one, forward and back"""
+
+        DATE = datetime.date(2022, 1, 1)
+        cases = baker.make(Case, start_date=DATE, _quantity=7)
+        baker.make(Case, start_date=DATE + datetime.timedelta(days=1))
+        Case.objects.filter(id__in=[cases[1].id, cases[4].id]).update(start_date=None)
+        client = get_authenticated_client()
+
+        for ordering in ("start_date", "-start_date"):
+            expected = list(
+                Case.objects.order_by(ordering, f"{ordering[:-10]}id").values_list(
+                    "id", flat=True
+                )
+            )
+            response = client.get(
+                reverse("cases-list"),
+                {"pagination": "cursor", "ordering": ordering, "page_size": 3},
+            )
+            pages = [[c["id"] for c in response.data["results"]]]
+            while response.data["next"]:
+                response = client.get(response.data["next"])
+                pages.append([c["id"] for c in response.data["results"]])
+
+            self.assertEqual(sum(pages, []), expected)
+
+            previous_pages = [pages[-1]]
+            while response.data["previous"]:
+                response = client.get(response.data["previous"])
+                previous_pages.insert(0, [c["id"] for c in response.data["results"]])
+
+            self.assertEqual(sum(previous_pages, []), expected)
+
     def test_filter_start_date(self):
         # Should only returb dates on the given date and newer
         DATE_A = datetime.datetime.now()
@@ -326,6 +404,92 @@ class CaseListApiTest(ZakenBackendTestMixin, APITestCase):
         self.assertEqual(len(results), 1)
 
 
+class CaseQueryCountApiTest(ZakenBackendTestMixin, APITestCase):
+    def setUp(self):
+        management.call_command("flush", verbosity=0, interactive=False)
+        super().setUp()
+        self.client = get_authenticated_client()
+
+    def make_case(self, workflow_quantity=2):
+        case = baker.make(Case, address__district=baker.make("addresses.District"))
+        baker.make(Advertisement, case=case)
+        baker.make(Schedule, case=case)
+        case.subjects.add(baker.make("cases.Subject", theme=case.theme))
+        workflows = CaseWorkflow.objects.bulk_create(
+            [
+                CaseWorkflow(
+                    case=case,
+                    case_state_type=baker.make(CaseStateType),
+                    data={},
+                    last_task_data={},
+                )
+                for i in range(workflow_quantity)
+            ]
+        )
+        # bypasses the CaseUserTask signals, these restore the spiff workflow
+        CaseUserTask._base_manager.bulk_create(
+            [
+                CaseUserTask(
+                    case=case,
+                    workflow=workflow,
+                    task_id=uuid.uuid4(),
+                    task_name="task_name",
+                    name="task",
+                    due_date=timezone.now(),
+                )
+                for workflow in workflows
+                for i in range(2)
+            ]
+        )
+        return case
+
+    def get_query_count(self, url):
+        invalidate_counts(Case)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_query_count(self):
+        """The number of queries for the case list does not depend on the number of cases"""
+
+        url = reverse("cases-list")
+        self.make_case()
+        query_count = self.get_query_count(url)
+
+        self.make_case()
+        self.make_case()
+
+        self.assertEqual(self.get_query_count(url), query_count)
+
+    def test_data_query_count(self):
+        """The number of queries for the case data does not depend on the number of cases"""
+
+        url = reverse("cases-get-cases-data")
+        self.make_case()
+        query_count = self.get_query_count(url)
+
+        self.make_case()
+        self.make_case()
+
+        data = self.client.get(url).data["results"]
+        self.assertEqual(len(data[0]["workflows"][0]["tasks"]), 2)
+        self.assertEqual(self.get_query_count(url), query_count)
+
+    def test_retrieve_query_count(self):
+        """The number of queries for a case does not depend on the number of workflows"""
+
+        case = self.make_case(workflow_quantity=1)
+        case_with_more_workflows = self.make_case(workflow_quantity=4)
+
+        self.assertEqual(
+            self.get_query_count(
+                reverse("cases-detail", kwargs={"pk": case_with_more_workflows.id})
+            ),
+            self.get_query_count(reverse("cases-detail", kwargs={"pk": case.id})),
+        )
+
+
 class CaseDocumentApiTest(OpenZaakBaseMixin, APITestCase):
     def setUp(self):
         management.call_command("flush", verbosity=0, interactive=False)
@@ -672,3 +836,63 @@ class CaseWorkflowOptionsApiTest(ZakenBackendTestMixin, APITestCase):
         client = get_authenticated_client()
         response = client.get(url)
         self.assertEqual(len(response.data), 1)
+
+
+class CaseExportApiTest(ZakenBackendTestMixin, APITestCase):
+    def setUp(self):
+        management.call_command("flush", verbosity=0, interactive=False)
+        super().setUp()
+        self.client = get_authenticated_client()
+
+    def get_export(self, params=None):
+        response = self.client.get(reverse("cases-export"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        """The CSV export has a header and a row per case, with its subjects"""
+
+        case = baker.make(Case, address__street_name="Amstel")
+        case.subjects.add(baker.make("cases.Subject", name="Leegstand"))
+        baker.make(Case)
+
+        rows = {r["id"]: r for r in csv.DictReader(io.StringIO(self.get_export()))}
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[str(case.id)]["street_name"], "Amstel")
+        self.assertEqual(rows[str(case.id)]["subjects"], "Leegstand")
+        self.assertEqual(rows[str(case.id)]["state"], "HANDHAVING")
+
+    def test_ndjson_export_is_filtered(self):
+        """The NDJSON export has a line per case that matches the case filters"""
+
+        case = baker.make(Case)
+        baker.make(Case, _quantity=2)
+
+        lines = self.get_export(
+            {"file_format": "ndjson", "theme": case.theme.id}
+        ).splitlines()
+
+        self.assertEqual([json.loads(line)["id"] for line in lines], [case.id])
+
+    def test_export_query_count(self):
+        """The export reads all cases with a fixed number of queries"""
+
+        baker.make(Case, _quantity=2)
+        with CaptureQueriesContext(connection) as context:
+            self.get_export()
+        query_count = len(context.captured_queries)
+
+        baker.make(Case, _quantity=3)
+        with CaptureQueriesContext(connection) as context:
+            self.get_export()
+
+        self.assertEqual(len(context.captured_queries), query_count)
+
+    def test_unknown_format(self):
+        """An unknown export format is a bad request"""
+
+        response = self.client.get(reverse("cases-export"), {"file_format": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
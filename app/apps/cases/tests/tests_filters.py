@@ -0,0 +1,60 @@
+from apps.cases.models import Case
+from apps.cases.views.case import CaseFilter
+from apps.openzaak.tests.utils import ZakenBackendTestMixin
+from django.test import TestCase
+from utils.unittest_helpers import get_query_plan
+
+
+class CaseFilterIndexTest(ZakenBackendTestMixin, TestCase):
+    def get_plan(self, data):
+        return get_query_plan(CaseFilter(data, queryset=Case.objects.all()).qs)
+
+    def test_from_start_date_uses_index(self):
+        """Tests the from_start_date filter uses the start_date index"""
+
+        plan = self.get_plan({"from_start_date": "2022-01-01"})
+
+        self.assertIn("case_start_date_idx", plan)
+
+    def test_open_cases_uses_index(self):
+        """Tests the open_cases filter uses the end_date index"""
+
+        plan = self.get_plan({"open_cases": "true"})
+
+        self.assertIn("case_end_date_start_date_idx", plan)
+
+    def test_ton_ids_uses_index(self):
+        """Tests the ton_ids filter uses the GIN index"""
+
+        plan = self.get_plan({"ton_ids": "123,456"})
+
+        self.assertIn("case_ton_ids_gin_idx", plan)
+
+    def test_street_name_uses_index(self):
+        """Tests the fuzzy street_name filter uses the trigram index"""
+
+        plan = self.get_plan({"street_name": "Weesperstraat"})
+
+        self.assertIn("address_street_name_trgm_idx", plan)
+
+    def test_number_uses_index(self):
+        """Tests the number filter uses the address number index"""
+
+        plan = self.get_plan({"number": "12"})
+
+        self.assertIn("address_number_idx", plan)
+
+    def test_suffix_uses_index(self):
+        """Tests the case insensitive suffix filter uses the upper() indexes"""
+
+        plan = self.get_plan({"suffix": "a"})
+
+        self.assertIn("address_upper_suffix_idx", plan)
+        self.assertIn("address_upper_suffix_lttr_idx", plan)
+
+    def test_postal_code_uses_index(self):
+        """Tests the case insensitive postal_code filter uses the upper() index"""
+
+        plan = self.get_plan({"postal_code": "1234 ab"})
+
+        self.assertIn("address_upper_postal_code_idx", plan)
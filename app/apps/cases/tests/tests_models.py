@@ -1,8 +1,11 @@
 from datetime import date
+from unittest.mock import patch
 from uuid import UUID
 
 from apps.cases.models import Case, CaseReason, CaseState, CaseStateType, CaseTheme
 from apps.openzaak.tests.utils import ZakenBackendTestMixin
+from apps.workflow.models import CaseUserTask
+from apps.workflow.user_tasks import user_tasks_created
 from django.core import management
 from django.test import TestCase
 from django.utils import timezone
@@ -111,3 +114,39 @@ class CaseModelTest(ZakenBackendTestMixin, TestCase):
         case = baker.make(Case, start_date=start_date)
 
         self.assertEquals(case.start_date, start_date)
+
+    @patch(
+        "apps.cases.tasks.task_update_citizen_report_feedback_workflows.delay",
+    )
+    def test_force_citizen_report_feedback_after_commit(self, delay):
+        """Forced citizen report feedback is sent to the workflows once the transaction is committed"""
+        case = baker.make(Case)
+        task = CaseUserTask(case=case, task_name="task_set_next_step")
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertTrue(case.force_citizen_report_feedback(task))
+            delay.assert_not_called()
+
+        self.assertEquals(len(callbacks), 1)
+        delay.assert_called_once_with(case.id, True)
+
+    @patch(
+        "apps.cases.tasks.task_update_citizen_report_feedback_workflows.delay",
+    )
+    def test_force_citizen_report_feedback_once_per_case(self, delay):
+        """Citizen report feedback is forced once per case for a batch of new tasks"""
+        case_a, case_b = baker.make(Case, _quantity=2)
+        tasks = [
+            CaseUserTask(case=case_a, task_name="task_set_next_step"),
+            CaseUserTask(case=case_a, task_name="task_set_next_step"),
+            CaseUserTask(case=case_b, task_name="task_set_next_step"),
+            CaseUserTask(case=case_b, task_name="task_create_visit"),
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user_tasks_created(tasks)
+
+        self.assertEquals(
+            sorted(call.args for call in delay.call_args_list),
+            sorted([(case_a.id, True), (case_b.id, True)]),
+        )
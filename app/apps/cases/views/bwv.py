@@ -13,6 +13,7 @@ from apps.cases.serializers import (
     BWVStatusSerializer,
     LegacyCaseCreateSerializer,
 )
+from apps.events.models import emit_events
 from apps.users.models import User
 from apps.visits.models import Visit
 from apps.visits.serializers import VisitSerializer
@@ -355,7 +356,10 @@ class ImportBWVCaseDataView(UserPassesTestMixin, FormView):
                         e.date_added = date_added
                     except Exception:
                         pass
-                    e.save()
+                GenericCompletedTask.objects.bulk_update(
+                    events_instances, ["author", "date_added"]
+                )
+                emit_events(events_instances)
             else:
                 logger.info(
                     f"GenericCompletedTaskCreateSerializer errors: case '{case}'"
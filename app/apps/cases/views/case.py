@@ -3,6 +3,7 @@ import operator
 from functools import reduce
 
 from apps.addresses.models import District, HousingCorporation
+from apps.cases.export import EXPORT_CONTENT_TYPES, EXPORT_FORMAT_CSV, stream_export
 from apps.cases.models import (
     Case,
     CaseDocument,
@@ -24,8 +25,9 @@ from apps.cases.serializers import (
     SubjectSerializer,
 )
 from apps.events.mixins import CaseEventsMixin
+from apps.main.counts import get_count
 from apps.main.filters import RelatedOrderingFilter
-from apps.main.pagination import EmptyPagination
+from apps.main.pagination import EmptyPagination, KeysetPaginationMixin
 from apps.openzaak.helpers import (
     create_document,
     delete_document,
@@ -48,9 +50,9 @@ from apps.workflow.serializers import (
     StartWorkflowSerializer,
     WorkflowOptionSerializer,
 )
-from django.db.models import OuterRef, Q, Subquery
+from django.db.models import OuterRef, Prefetch, Q, Subquery
 from django.forms.fields import CharField, MultipleChoiceField
-from django.http import FileResponse
+from django.http import FileResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters import rest_framework as filters
 from drf_spectacular.types import OpenApiTypes
@@ -380,9 +382,15 @@ class StandardResultsSetPagination(EmptyPagination):
         OpenApiParameter("task", OpenApiTypes.STR, OpenApiParameter.QUERY),
         OpenApiParameter("ton_ids", OpenApiTypes.NUMBER, OpenApiParameter.QUERY),
         OpenApiParameter("priority", OpenApiTypes.NUMBER, OpenApiParameter.QUERY),
+        OpenApiParameter(
+            "pagination", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["cursor"]
+        ),
+        OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+        OpenApiParameter("include_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
     ]
 )
 class CaseViewSet(
+    KeysetPaginationMixin,
     CaseEventsMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
@@ -400,6 +408,7 @@ class CaseViewSet(
     ordering_fields = "__all_related__"
     filterset_class = CaseFilter
     pagination_class = StandardResultsSetPagination
+    keyset_ordering_fields = ("id", "start_date")
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -411,20 +420,62 @@ class CaseViewSet(
     def get_queryset(self):
         queryset = super().get_queryset()
         if (
-            self.action in ("list",)
+            self.action in ("list", "export")
             and hasattr(self.request, "user")
             and not self.request.user.has_perm("users.access_sensitive_dossiers")
         ):
             queryset = queryset.exclude(sensitive=True)
+        if self.action in ("list", "get_cases_data", "retrieve"):
+            queryset = self.get_prefetched_queryset(
+                queryset, with_tasks=self.action != "list"
+            )
         return queryset
 
+    def get_prefetched_queryset(self, queryset, with_tasks=True):
+        # everything the case serializers render, fetched in a fixed number of queries
+        workflows = CaseWorkflow.objects.filter(
+            tasks__isnull=False, tasks__completed=False
+        ).distinct()
+        workflows = workflows.select_related("case_state_type")
+        if with_tasks:
+            workflows = workflows.prefetch_related(
+                Prefetch(
+                    "tasks",
+                    queryset=CaseUserTask.objects.filter(completed=False).order_by(
+                        "id"
+                    ),
+                    to_attr="open_tasks",
+                )
+            )
+        return queryset.select_related(
+            "address",
+            "address__district",
+            "theme",
+            "reason",
+            "project",
+        ).prefetch_related(
+            "subjects",
+            "advertisements",
+            "case_states",
+            Prefetch(
+                "schedules",
+                queryset=Schedule.objects.select_related(
+                    "action",
+                    "week_segment",
+                    "day_segment",
+                    "priority",
+                ),
+            ),
+            Prefetch("workflows", queryset=workflows, to_attr="open_workflows"),
+        )
+
     @action(
         detail=False,
         methods=["get"],
     )
     def count(self, request):
         queryset = self.filter_queryset(self.get_queryset())
-        count = queryset.count()
+        count = get_count(queryset, approximate=True)
         content = {"count": count}
         return Response(content)
 
@@ -439,13 +490,47 @@ class CaseViewSet(
     )
     def get_cases_data(self, request):
         queryset = self.filter_queryset(self.get_queryset())
-        paginator = StandardResultsSetPagination()
-        context = paginator.paginate_queryset(queryset, request)
+        paginator = self.paginator
+        context = paginator.paginate_queryset(queryset, request, view=self)
         serializer = CaseDataSerializer(
             context, many=True, context={"request": request}
         )
         return paginator.get_paginated_response(serializer.data)
 
+    @extend_schema(
+        description="Streams all filtered cases as CSV or as NDJSON, one case per line",
+        parameters=[
+            OpenApiParameter(
+                "file_format",
+                OpenApiTypes.STR,
+                OpenApiParameter.QUERY,
+                enum=list(EXPORT_CONTENT_TYPES.keys()),
+            ),
+        ],
+        responses={status.HTTP_200_OK: OpenApiTypes.STR},
+    )
+    @action(
+        detail=False,
+        url_path="export",
+        methods=["get"],
+    )
+    def export(self, request):
+        export_format = request.GET.get("file_format", EXPORT_FORMAT_CSV)
+        if export_format not in EXPORT_CONTENT_TYPES:
+            return Response(
+                {"file_format": f"Unknown format '{export_format}'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            stream_export(queryset, export_format),
+            content_type=EXPORT_CONTENT_TYPES[export_format],
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="cases.{export_format}"'
+        return response
+
     @extend_schema(
         description="Get workflows for this Case",
         responses={status.HTTP_200_OK: CaseWorkflowSerializer(many=True)},
@@ -6,6 +6,7 @@ from django.db import models
 
 class Debriefing(TaskModelEventEmitter):
     EVENT_TYPE = CaseEvent.TYPE_DEBRIEFING
+    EVENT_PREFETCH_RELATED = ("author",)
 
     VIOLATION_NO = "NO"
     VIOLATION_YES = "YES"
@@ -26,6 +26,7 @@ class Decision(TaskModelEventEmitter):
     """
 
     EVENT_TYPE = CaseEvent.TYPE_DECISION
+    EVENT_PREFETCH_RELATED = ("author", "decision_type", "summon__persons")
 
     case = models.ForeignKey(
         to=Case, on_delete=models.CASCADE, related_name="decisions"
@@ -0,0 +1,75 @@
+import json
+
+from django.apps import apps as global_apps
+from django.db import migrations, models
+from rest_framework.utils.encoders import JSONEncoder
+
+BATCH_SIZE = 500
+
+
+def render_payload(emitter):
+    event_values = dict(emitter.__get_event_values__())
+    variables = event_values.pop("variables", None) or {}
+    payload = {"values": list(event_values.items()), "variables": variables}
+    return json.loads(json.dumps(payload, cls=JSONEncoder))
+
+
+def render_batch(CaseEvent, model, events):
+    emitters = model.objects.in_bulk([event.emitter_id for event in events])
+    for event in events:
+        try:
+            event.event_payload = render_payload(emitters[event.emitter_id])
+        except Exception:
+            # left empty, the event is rendered from its emitter when it's read
+            event.event_payload = None
+    CaseEvent.objects.bulk_update(events, ["event_payload"])
+
+
+def render_event_payloads(apps, schema_editor):
+    # the event values come from the methods of the emitter models, which historical
+    # models don't have
+    CaseEvent = apps.get_model("events", "CaseEvent")
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    content_types = ContentType.objects.filter(
+        id__in=CaseEvent.objects.values("emitter_type")
+    )
+    for content_type in content_types:
+        try:
+            model = global_apps.get_model(content_type.app_label, content_type.model)
+        except LookupError:
+            continue
+        events = CaseEvent.objects.filter(emitter_type=content_type).only(
+            "id", "emitter_id"
+        )
+        batch = []
+        for event in events.iterator(chunk_size=BATCH_SIZE):
+            batch.append(event)
+            if len(batch) == BATCH_SIZE:
+                render_batch(CaseEvent, model, batch)
+                batch = []
+        if batch:
+            render_batch(CaseEvent, model, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0001_initial"),
+        # the emitter models are read with their current fields
+        ("cases", "0020_case_indexes"),
+        ("debriefings", "0003_debriefing_nuisance_detected"),
+        ("decisions", "0004_decision_active"),
+        ("schedules", "0004_schedule_housing_corporation_combiteam"),
+        ("summons", "0004_auto_20220217_1131"),
+        ("visits", "0002_auto_20220502_1713"),
+        ("workflow", "0012_caseworkflow_workflow_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="caseevent",
+            name="event_payload",
+            field=models.JSONField(editable=False, null=True),
+        ),
+        migrations.RunPython(render_event_payloads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+# keeps the first event of every emitter and type
+DELETE_DUPLICATE_EVENTS_SQL = """
+DELETE FROM events_caseevent duplicate
+USING events_caseevent event
+WHERE duplicate.emitter_type_id = event.emitter_type_id
+AND duplicate.emitter_id = event.emitter_id
+AND duplicate.type = event.type
+AND duplicate.id > event.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0002_caseevent_event_payload"),
+    ]
+
+    operations = [
+        migrations.RunSQL(DELETE_DUPLICATE_EVENTS_SQL, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name="caseevent",
+            constraint=models.UniqueConstraint(
+                fields=("emitter_type", "emitter_id", "type"),
+                name="caseevent_unique_emitter_type",
+            ),
+        ),
+    ]
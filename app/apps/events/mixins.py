@@ -1,6 +1,7 @@
 import logging
 
 from apps.cases.models import Case
+from apps.events.models import prefetch_event_emitters
 from apps.events.serializers import CaseEventSerializer
 from rest_framework import status
 from rest_framework.decorators import action
@@ -18,7 +19,8 @@ class CaseEventsMixin:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         try:
-            events = case.events.all()
+            events = list(case.events.all())
+            prefetch_event_emitters([e for e in events if e.event_payload is None])
             serialized_events = CaseEventSerializer(data=events, many=True)
             serialized_events.is_valid()
 
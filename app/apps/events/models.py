@@ -1,6 +1,38 @@
+import json
+import logging
+from collections import OrderedDict, defaultdict
+
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import connection, models
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+EMIT_EVENTS_BATCH_SIZE = 500
+
+# an existing event of the emitter only gets its payload rendered again
+EMIT_EVENTS_SQL = """
+INSERT INTO {table}
+    (date_created, case_id, type, emitter_type_id, emitter_id, event_payload)
+VALUES {values}
+ON CONFLICT (emitter_type_id, emitter_id, type) DO UPDATE
+SET event_payload = EXCLUDED.event_payload
+WHERE {table}.event_payload IS DISTINCT FROM EXCLUDED.event_payload
+"""
+
+
+def render_event_payload(emitter):
+    """
+    Renders the event values of an emitter as the API returns them. The values are
+    kept as [key, value] pairs, because jsonb doesn't keep the order of object keys.
+    """
+    event_values = dict(emitter.__get_event_values__())
+    variables = event_values.pop("variables", None) or {}
+    payload = {"values": list(event_values.items()), "variables": variables}
+    return json.loads(json.dumps(payload, cls=JSONEncoder))
 
 
 class CaseEvent(models.Model):
@@ -35,25 +67,28 @@ class CaseEvent(models.Model):
     emitter_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     emitter_id = models.PositiveIntegerField()
     emitter = GenericForeignKey("emitter_type", "emitter_id")
+    # event values rendered when the emitter is saved, see render_event_payload
+    event_payload = models.JSONField(null=True, editable=False)
+
+    def get_event_payload(self):
+        # events without a stored payload are rendered from their emitter
+        if self.event_payload is None:
+            return render_event_payload(self.emitter)
+        return self.event_payload
 
     @property
     def event_values(self):
         """
         Returns a dictionary with event values retrieved from Emitter object
         """
-        event_values = self.emitter.__get_event_values__()
-        event_values.pop("variables", None)
-        return event_values
+        return OrderedDict(self.get_event_payload()["values"])
 
     @property
     def event_variables(self):
-        from collections import OrderedDict
-
         """
         Returns a dictionary with event values retrieved from Emitter object
         """
-        event_values = self.emitter.__get_event_values__()
-        variables = event_values.get("variables", {}) or {}
+        variables = self.get_event_payload()["variables"]
         variables_list = OrderedDict(
             sorted(
                 [(k, v) for k, v in variables.items()], key=lambda d: d[0], reverse=True
@@ -66,10 +101,71 @@ class CaseEvent(models.Model):
 
     class Meta:
         ordering = ["date_created"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["emitter_type", "emitter_id", "type"],
+                name="caseevent_unique_emitter_type",
+            ),
+        ]
+
+
+def prefetch_event_emitters(events):
+    """
+    Loads the emitters of the events with one query per emitter type, and the
+    EVENT_PREFETCH_RELATED relations their event values are rendered from
+    """
+    events = list(events)
+    prefetch_related_objects(events, "emitter")
+    emitters = defaultdict(list)
+    for event in events:
+        if event.emitter is not None:
+            emitters[type(event.emitter)].append(event.emitter)
+    for model, instances in emitters.items():
+        if model.EVENT_PREFETCH_RELATED:
+            prefetch_related_objects(instances, *model.EVENT_PREFETCH_RELATED)
+    return events
+
+
+def emit_events(emitters):
+    """
+    Creates the events of saved emitters in one insert per batch, for imports and
+    bulk updates that don't save the emitters one by one. The unique constraint on
+    the emitter and type keeps concurrent saves from creating duplicate events.
+    """
+    now = timezone.now()
+    # a statement can't update the same event twice
+    rows = {}
+    for emitter in emitters:
+        assert (
+            emitter.id
+        ), "Emitter instance should exist and have an pk assigned before emitting an Event"
+        emitter_type = ContentType.objects.get_for_model(emitter).id
+        event_type = emitter.__get_event_type__()
+        event_payload = emitter.__render_event_payload__()
+        rows[(emitter_type, emitter.id, event_type)] = (
+            now,
+            emitter.__get_case__().id,
+            event_type,
+            emitter_type,
+            emitter.id,
+            json.dumps(event_payload) if event_payload is not None else None,
+        )
+    rows = list(rows.values())
+
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), EMIT_EVENTS_BATCH_SIZE):
+            batch = rows[i : i + EMIT_EVENTS_BATCH_SIZE]
+            values = ", ".join(["(%s, %s, %s, %s, %s, %s::jsonb)"] * len(batch))
+            cursor.execute(
+                EMIT_EVENTS_SQL.format(table=CaseEvent._meta.db_table, values=values),
+                [value for row in batch for value in row],
+            )
 
 
 class ModelEventEmitter(models.Model):
     EVENT_TYPE = None
+    # relations used by __get_event_values__, see prefetch_event_emitters
+    EVENT_PREFETCH_RELATED = ()
 
     class Meta:
         abstract = True
@@ -94,18 +190,25 @@ class ModelEventEmitter(models.Model):
     def __get_event_values__(self):
         raise NotImplementedError("Class get_values function not implemented")
 
-    def __emit_event__(self):
-        assert (
-            self.id
-        ), "Emitter instance should exist and have an pk assigned before emitting an Event"
+    def __render_event_payload__(self):
+        try:
+            return render_event_payload(self)
+        except Exception as e:
+            # the event is rendered from the emitter when it's read instead
+            logger.error(
+                f"Could not render event payload for {self.__class__.__name__} {self.id}: {e}"
+            )
+            return None
 
-        case = self.__get_case__()
-        event_type = self.__get_event_type__()
+    def __emit_event__(self):
+        emit_events([self])
 
-        try:
-            CaseEvent.objects.get(emitter_id=self.id, type=event_type)
-        except CaseEvent.DoesNotExist:
-            CaseEvent.objects.create(emitter=self, type=event_type, case=case)
+    def update_event_payload(self):
+        """
+        Renders the event payload again, for changes to the related objects of the
+        emitter that don't save the emitter itself
+        """
+        self.event.update(event_payload=self.__render_event_payload__())
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
@@ -0,0 +1,55 @@
+from apps.cases.models import Advertisement, Case, CitizenReport
+from apps.events.models import ModelEventEmitter
+from apps.summons.models import SummonedPerson
+from apps.visits.models import Visit
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+# The event payloads are rendered when an emitter is saved, these receivers render them
+# again when objects the event values are read from change without saving the emitter.
+
+
+def update_event_payloads(emitters):
+    for emitter in emitters:
+        if isinstance(emitter, ModelEventEmitter) and emitter.id:
+            emitter.update_event_payload()
+
+
+@receiver(m2m_changed, sender=Visit.authors.through, dispatch_uid="visit_authors")
+@receiver(m2m_changed, sender=Case.subjects.through, dispatch_uid="case_subjects")
+def emitter_m2m_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        update_event_payloads([instance])
+    elif pk_set:
+        emitter_model = Visit if sender is Visit.authors.through else Case
+        update_event_payloads(emitter_model.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=SummonedPerson, dispatch_uid="summoned_person_saved")
+@receiver(post_delete, sender=SummonedPerson, dispatch_uid="summoned_person_deleted")
+def summoned_person_changed(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    summon = instance.summon
+    # decisions list the persons of their summon
+    decision = getattr(summon, "decision", None)
+    update_event_payloads([summon, decision])
+
+
+@receiver(post_save, sender=Advertisement, dispatch_uid="advertisement_saved")
+@receiver(post_delete, sender=Advertisement, dispatch_uid="advertisement_deleted")
+def advertisement_changed(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    update_event_payloads([instance.related_object])
+
+
+@receiver(post_save, sender=CitizenReport, dispatch_uid="citizen_report_case_event")
+def citizen_report_saved(sender, instance, created, **kwargs):
+    if kwargs.get("raw"):
+        return
+    # the case event shows the advertisements of the first citizen report
+    if created:
+        update_event_payloads([instance.case])
@@ -1,6 +1,11 @@
+from apps.events.models import CaseEvent
 from apps.events.tests.tests_helpers import CaseEventEmitterTestCase
 from apps.openzaak.tests.utils import ZakenBackendTestMixin
+from apps.visits.models import Visit
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from model_bakery import baker
 from rest_framework import status
 
 from app.utils.unittest_helpers import (
@@ -40,3 +45,37 @@ class CaseEventGetDetailAPITest(ZakenBackendTestMixin, CaseEventEmitterTestCase)
 
         # Adding 1 to account for the case event
         self.assertEqual(len(response.data), EMIT_COUNT + 1)
+
+    def test_events_query_count(self):
+        """Events are read with the same number of queries, however many there are"""
+        case = self.create_case()
+        url = reverse("cases-detail", kwargs={"pk": case.id}) + "events/"
+        client = get_authenticated_client()
+
+        query_counts = []
+        for i in range(2):
+            baker.make(Visit, case=case, _quantity=3, make_m2m=True)
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            query_counts.append(len(queries))
+
+        self.assertEqual(len(response.data), 7)
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_events_without_payload_query_count(self):
+        """Emitters of events without a payload are loaded in a batch per type"""
+        case = self.create_case()
+        url = reverse("cases-detail", kwargs={"pk": case.id}) + "events/"
+        client = get_authenticated_client()
+
+        query_counts = []
+        for i in range(2):
+            baker.make(Visit, case=case, _quantity=3, make_m2m=True)
+            CaseEvent.objects.update(event_payload=None)
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            query_counts.append(len(queries))
+
+        self.assertEqual(len(response.data), 7)
+        self.assertTrue(all(e["event_values"]["authors"] for e in response.data[1:]))
+        self.assertEqual(query_counts[0], query_counts[1])
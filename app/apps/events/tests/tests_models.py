@@ -1,9 +1,17 @@
 """
 Tests for CaseEvent & EventsEmitter models
 """
-from apps.events.models import CaseEvent
+import threading
+import time
+
+from apps.cases.models import Case, Subject
+from apps.events.models import CaseEvent, emit_events
 from apps.events.tests.tests_helpers import CaseEventEmitterTestCase
 from apps.openzaak.tests.utils import ZakenBackendTestMixin
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
 
 
 class CaseEventTest(ZakenBackendTestMixin, CaseEventEmitterTestCase):
@@ -33,3 +41,112 @@ class CaseEventTest(ZakenBackendTestMixin, CaseEventEmitterTestCase):
             CaseEventTest.SubclassEmptyEventEmitter.objects.create()
 
         self.assertEqual(0, CaseEvent.objects.count())
+
+    def test_event_payload_is_stored(self):
+        """Emitting an event stores its rendered values, which are read without the emitter"""
+        case = self.create_case()
+        CaseEventTest.SubclassEventEmitter.objects.create(case=case)
+
+        event = CaseEvent.objects.get(type=CaseEvent.TYPE_DEBRIEFING)
+        with self.assertNumQueries(0):
+            event_values = event.event_values
+            event_variables = event.event_variables
+
+        self.assertEqual(event_values, {"foo_text": "hello", "foo_number": 1})
+        self.assertEqual(list(event_values.keys()), ["foo_text", "foo_number"])
+        self.assertEqual(event_variables, {})
+
+    def test_event_payload_is_updated(self):
+        """Saving an emitter again renders its event payload again"""
+        case = self.create_case()
+        emitter = CaseEventTest.SubclassEventEmitter.objects.create(case=case)
+        CaseEvent.objects.filter(type=CaseEvent.TYPE_DEBRIEFING).update(
+            event_payload={"values": [], "variables": {}}
+        )
+
+        emitter.save()
+
+        event = CaseEvent.objects.get(type=CaseEvent.TYPE_DEBRIEFING)
+        self.assertEqual(event.event_values["foo_text"], "hello")
+        self.assertEqual(CaseEvent.objects.count(), 2)
+
+    def test_event_without_payload(self):
+        """Events without a stored payload are rendered from their emitter"""
+        case = self.create_case()
+        CaseEventTest.SubclassEventEmitter.objects.create(case=case)
+        CaseEvent.objects.update(event_payload=None)
+
+        event = CaseEvent.objects.get(type=CaseEvent.TYPE_DEBRIEFING)
+
+        self.assertEqual(event.event_values["foo_number"], 1)
+
+    def test_case_subjects_update_event_payload(self):
+        """Changing the subjects of a case renders the case event again"""
+        case = self.create_case()
+        subject = baker.make(Subject, name="Leegstand")
+
+        case.subjects.add(subject)
+
+        event = CaseEvent.objects.get(type=CaseEvent.TYPE_CASE)
+        self.assertEqual(event.event_values["subjects"], ["Leegstand"])
+
+    def test_emitting_twice_keeps_one_event(self):
+        """Saving an emitter again, or emitting it twice in a batch, doesn't duplicate its event"""
+        case = self.create_case()
+        emitter = CaseEventTest.SubclassEventEmitter.objects.create(case=case)
+
+        emitter.save()
+        emit_events([emitter, emitter, case])
+
+        self.assertEqual(2, CaseEvent.objects.count())
+
+    def test_emit_events_in_bulk(self):
+        """Emitting a batch of emitters creates their events in one insert"""
+        case = self.create_case()
+        emitters = CaseEventTest.SubclassEventEmitter.objects.bulk_create(
+            [CaseEventTest.SubclassEventEmitter(case=case) for i in range(3)]
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            emit_events(emitters)
+
+        self.assertEqual(len([q for q in queries if "INSERT" in q["sql"]]), 1)
+        self.assertEqual(
+            3, CaseEvent.objects.filter(type=CaseEvent.TYPE_DEBRIEFING).count()
+        )
+
+
+class CaseEventConcurrencyTest(ZakenBackendTestMixin, TransactionTestCase):
+    def test_concurrent_emits_keep_one_event(self):
+        """An event emitted by two transactions at the same time is created once"""
+        case = baker.make(Case)
+        CaseEvent.objects.all().delete()
+        inserted = threading.Event()
+        errors = []
+
+        def emit(wait_for=None, set_after=None):
+            try:
+                if wait_for:
+                    wait_for.wait(5)
+                with transaction.atomic():
+                    emit_events([Case.objects.get(id=case.id)])
+                    if set_after:
+                        set_after.set()
+                        # the other transaction waits on the unique index meanwhile
+                        time.sleep(0.2)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=emit, kwargs={"set_after": inserted}),
+            threading.Thread(target=emit, kwargs={"wait_for": inserted}),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(1, CaseEvent.objects.filter(emitter_id=case.id).count())
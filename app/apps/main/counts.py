@@ -0,0 +1,90 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+COUNT_VERSION_KEY = "count-version"
+
+
+def get_count_version_key(model):
+    return f"{COUNT_VERSION_KEY}-{model._meta.label_lower}"
+
+
+def get_count_version(model):
+    version_key = get_count_version_key(model)
+    version = cache.get(version_key)
+    if version is None:
+        version = 1
+        cache.add(version_key, version, None)
+    return version
+
+
+def invalidate_counts(model):
+    """
+    Invalidates the cached counts of querysets of this model. Counts of querysets
+    that only filter on this model through a relation expire with the timeout.
+    """
+    version_key = get_count_version_key(model)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, 1, None)
+
+
+def get_count_cache_key(queryset, approximate=False):
+    # the sql of the filtered queryset is the normalized form of the filter set
+    sql, params = queryset.query.sql_with_params()
+    key = hashlib.md5(
+        f"{queryset.model._meta.label}{sql}{params}{approximate}".encode("utf-8")
+    ).hexdigest()
+    return f"count-{get_count_version(queryset.model)}-{key}"
+
+
+def get_table_estimate(queryset):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE relname = %s",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return int(row[0]) if row else -1
+
+
+def get_estimated_count(queryset):
+    """
+    Postgres estimate of the number of rows of an unfiltered queryset, only used if it
+    is above the COUNT_ESTIMATE_THRESHOLD, smaller tables are counted exactly.
+    """
+    if connection.vendor != "postgresql":
+        return
+    if queryset.query.where or queryset.query.distinct:
+        return
+    try:
+        estimate = get_table_estimate(queryset)
+    except Exception as e:
+        logger.error(f"get_estimated_count failed: {e}")
+        return
+    if estimate >= settings.COUNT_ESTIMATE_THRESHOLD:
+        return estimate
+
+
+def get_count(queryset, approximate=False):
+    """
+    Cached count of the queryset. With approximate, the count of a large unfiltered
+    queryset is estimated by postgres, so it must not be used to validate pages.
+    """
+    if not settings.COUNT_CACHE_TIMEOUT:
+        return queryset.count()
+
+    cache_key = get_count_cache_key(queryset, approximate)
+    count = cache.get(cache_key)
+    if count is None:
+        count = get_estimated_count(queryset) if approximate else None
+        if count is None:
+            count = queryset.count()
+        cache.set(cache_key, count, settings.COUNT_CACHE_TIMEOUT)
+    return count
@@ -1,16 +1,29 @@
+import json
 from collections import OrderedDict
 
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
 from rest_framework.exceptions import NotFound
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
+from .counts import get_count
+
+
+class CountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return get_count(self.object_list)
+
 
 class EmptyPagination(PageNumberPagination):
+    django_paginator_class = CountPaginator
     count = None
 
     def paginate_queryset(self, queryset, request, view=None):
         """Checking NotFound exception"""
-        self.count = queryset.count()
+        self.count = get_count(queryset)
         try:
             return super().paginate_queryset(queryset, request, view=view)
         except NotFound:  # intercept NotFound exception
@@ -31,3 +44,169 @@ class EmptyPagination(PageNumberPagination):
                     ]
                 )
             )
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset pagination, the cost of a page does not depend on how deep it is in the result set.
+    Orders on one of the ordering_fields, with id as tie breaker. The total count is only
+    calculated if requested.
+
+    DRF's CursorPagination positions on the first ordering field only, and falls back to
+    offsets within equal values. The position here holds the values of all ordering
+    fields, so a page always starts right after the last row of the previous one.
+    """
+
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = "-id"
+    ordering_fields = ("id",)
+    ordering_query_param = "ordering"
+    include_count_query_param = "include_count"
+    count = None
+
+    def get_ordering(self, request, queryset, view):
+        ordering_fields = getattr(view, "keyset_ordering_fields", self.ordering_fields)
+        ordering = request.query_params.get(self.ordering_query_param, self.ordering)
+        field = ordering.lstrip("-")
+        if field not in ordering_fields:
+            ordering = self.ordering
+            field = ordering.lstrip("-")
+        if field == "id":
+            return (ordering,)
+        return (ordering, f"{ordering[:-len(field)]}id")
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for order in ordering:
+            field_name = order.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance[field_name]
+            else:
+                value = getattr(instance, field_name)
+            position.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return json.dumps(position)
+
+    def get_position_filter(self, ordering, position, ascending):
+        """
+        Filters the rows after the position, in the direction the ordering is walked.
+        Null values are last in ascending and first in descending order, like postgres
+        orders them.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        position_filter = None
+        for order, value in reversed(list(zip(ordering, values))):
+            field = order.lstrip("-")
+            if value is None:
+                after = None if ascending else Q(**{f"{field}__isnull": False})
+                equal = Q(**{f"{field}__isnull": True})
+            else:
+                after = Q(**{f"{field}__{'gt' if ascending else 'lt'}": value})
+                if ascending:
+                    after |= Q(**{f"{field}__isnull": True})
+                equal = Q(**{field: value})
+            if position_filter is not None:
+                equal &= position_filter
+                after = equal if after is None else after | equal
+            position_filter = after
+        return position_filter if position_filter is not None else Q(pk__in=[])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.include_count_query_param) == "true":
+            self.count = queryset.count()
+
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(
+                *[o[1:] if o.startswith("-") else f"-{o}" for o in self.ordering]
+            )
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            is_reversed = self.ordering[0].startswith("-")
+            queryset = queryset.filter(
+                self.get_position_filter(
+                    self.ordering, current_position, reverse == is_reversed
+                )
+            )
+
+        # one extra row tells if there is a following page
+        results = list(queryset[offset : offset + self.page_size + 1])
+        self.page = list(results[: self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data["count"] = self.count
+        return response
+
+
+class KeysetPaginationMixin:
+    """
+    Uses KeysetPagination instead of the default pagination_class with ?pagination=cursor
+    """
+
+    keyset_pagination_class = KeysetPagination
+    pagination_mode_query_param = "pagination"
+
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, "_paginator")
+            and getattr(self, "request", None) is not None
+            and self.request.query_params.get(self.pagination_mode_query_param)
+            == "cursor"
+        ):
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
@@ -1 +1,79 @@
-# Create your tests here.
+from unittest.mock import patch
+
+from apps.cases.models import Case
+from apps.main.counts import get_count, invalidate_counts
+from apps.openzaak.tests.utils import ZakenBackendTestMixin
+from apps.workflow.models import CaseUserTask
+from django.test import TestCase, override_settings
+from model_bakery import baker
+
+
+class CountTest(ZakenBackendTestMixin, TestCase):
+    def test_count_is_cached_until_invalidated(self):
+        """Tests a count is reused until counts are invalidated"""
+
+        baker.make(Case, _quantity=2)
+        self.assertEqual(get_count(Case.objects.all()), 2)
+
+        baker.make(Case)
+        self.assertEqual(get_count(Case.objects.all()), 2)
+
+        invalidate_counts(Case)
+        self.assertEqual(get_count(Case.objects.all()), 3)
+
+    def test_count_is_invalidated_per_model(self):
+        """Tests invalidating the counts of another model keeps the cached count"""
+
+        baker.make(Case, _quantity=2)
+        self.assertEqual(get_count(Case.objects.all()), 2)
+
+        baker.make(Case)
+        invalidate_counts(CaseUserTask)
+        self.assertEqual(get_count(Case.objects.all()), 2)
+
+    def test_count_is_cached_per_filter(self):
+        """Tests differently filtered querysets have their own count"""
+
+        baker.make(Case, theme__sensitive=True)
+        baker.make(Case, theme__sensitive=False, _quantity=2)
+
+        self.assertEqual(get_count(Case.objects.filter(sensitive=True)), 1)
+        self.assertEqual(get_count(Case.objects.filter(sensitive=False)), 2)
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=1000)
+    @patch("apps.main.counts.get_table_estimate", return_value=5000)
+    def test_large_count_is_estimated(self, get_table_estimate):
+        """Tests the table estimate is used for large unfiltered sets if an approximation is allowed"""
+
+        self.assertEqual(get_count(Case.objects.all(), approximate=True), 5000)
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=1000)
+    @patch("apps.main.counts.get_table_estimate", return_value=5000)
+    def test_count_is_exact_by_default(self, get_table_estimate):
+        """Tests counts used for pagination are never estimated"""
+
+        baker.make(Case, _quantity=2)
+
+        self.assertEqual(get_count(Case.objects.all()), 2)
+        get_table_estimate.assert_not_called()
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=1000)
+    @patch("apps.main.counts.get_table_estimate", return_value=5000)
+    def test_filtered_count_is_exact(self, get_table_estimate):
+        """Tests filtered sets are counted exactly, even if an approximation is allowed"""
+
+        baker.make(Case, theme__sensitive=False, _quantity=2)
+
+        self.assertEqual(
+            get_count(Case.objects.filter(sensitive=False), approximate=True), 2
+        )
+        get_table_estimate.assert_not_called()
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=1000)
+    @patch("apps.main.counts.get_table_estimate", return_value=50)
+    def test_small_count_is_exact(self, get_table_estimate):
+        """Tests small sets are counted exactly"""
+
+        baker.make(Case, _quantity=2)
+
+        self.assertEqual(get_count(Case.objects.all(), approximate=True), 2)
@@ -1,8 +1,30 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from zgw_consumers.admin import ServiceAdmin
+from zgw_consumers.models import Service
 
+from .catalogi_cache import invalidate_catalogi_cache
 from .models import Notification
 
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ("pk", "processed", "created_at")
+
+
+admin.site.unregister(Service)
+
+
+@admin.register(Service)
+class CatalogiCacheServiceAdmin(ServiceAdmin):
+    actions = ["clear_catalogi_cache"]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_catalogi_cache()
+
+    @admin.action(description="Clear the cached catalogi resources of OpenZaak")
+    def clear_catalogi_cache(self, request, queryset):
+        invalidate_catalogi_cache()
+        self.message_user(
+            request, "The cached catalogi resources are cleared", messages.SUCCESS
+        )
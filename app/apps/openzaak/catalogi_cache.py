@@ -0,0 +1,85 @@
+"""
+Cache of the rarely changing catalogi resources of OpenZaak, such as zaaktypen and
+informatieobjecttypen. Entries are fresh for OPENZAAK_CATALOGI_CACHE_TIMEOUT seconds,
+after that they are still served for OPENZAAK_CATALOGI_CACHE_STALE_TIMEOUT seconds
+while a celery task fetches them again.
+"""
+import hashlib
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CATALOGI_CACHE_VERSION_KEY = "openzaak-catalogi-version"
+# one background refresh per entry at a time
+CATALOGI_REFRESH_LOCK_TIMEOUT = 60
+
+
+def get_catalogi_cache_version():
+    version = cache.get(CATALOGI_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOGI_CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CATALOGI_CACHE_VERSION_KEY)
+    return version
+
+
+def invalidate_catalogi_cache():
+    # the entries of the previous version are left to expire
+    cache.set(CATALOGI_CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+    logger.info("Catalogi cache invalidated")
+
+
+def get_catalogi_cache_key(name, args):
+    args_hash = hashlib.md5(repr(args).encode()).hexdigest()
+    return f"openzaak-catalogi-{get_catalogi_cache_version()}-{name}-{args_hash}"
+
+
+def set_catalogi_cache(cache_key, value):
+    cache.set(
+        cache_key,
+        {
+            "value": value,
+            "fresh_until": time.time() + settings.OPENZAAK_CATALOGI_CACHE_TIMEOUT,
+        },
+        settings.OPENZAAK_CATALOGI_CACHE_TIMEOUT
+        + settings.OPENZAAK_CATALOGI_CACHE_STALE_TIMEOUT,
+    )
+
+
+def refresh_catalogi_resource(name, fetch, *args):
+    cache_key = get_catalogi_cache_key(name, args)
+    value = fetch(*args)
+    set_catalogi_cache(cache_key, value)
+    cache.delete(f"{cache_key}-refresh")
+    return value
+
+
+def get_catalogi_resource(name, fetch, *args):
+    """
+    Returns the cached result of fetch(*args), or fetches it if it isn't cached. A
+    stale result is returned as is and refreshed in the background.
+    """
+    if not settings.OPENZAAK_CATALOGI_CACHE_TIMEOUT:
+        return fetch(*args)
+
+    cache_key = get_catalogi_cache_key(name, args)
+    entry = cache.get(cache_key)
+    if entry is None:
+        value = fetch(*args)
+        set_catalogi_cache(cache_key, value)
+        return value
+
+    if entry["fresh_until"] < time.time() and cache.add(
+        f"{cache_key}-refresh", True, CATALOGI_REFRESH_LOCK_TIMEOUT
+    ):
+        from apps.openzaak.tasks import task_refresh_catalogi_resource
+
+        try:
+            task_refresh_catalogi_resource.delay(name, *args)
+        except Exception as e:
+            logger.error(f"Could not refresh catalogi resource '{name}': {e}")
+    return entry["value"]
@@ -13,6 +13,7 @@ from typing import List
 
 import requests
 from apps.cases.models import CaseDocument
+from apps.openzaak.catalogi_cache import get_catalogi_resource
 from django.conf import settings
 from django.utils import timezone
 from django.utils.translation import ugettext as _
@@ -92,7 +93,7 @@ def _build_document_body(
     return document_body
 
 
-def get_case_types(identificatie=None):
+def fetch_case_types(identificatie=None):
     ztc_client = Service.objects.filter(api_type=APITypes.ztc).get().build_client()
 
     params = {
@@ -106,7 +107,7 @@ def get_case_types(identificatie=None):
     return get_paginated_results(ztc_client, "zaaktype", query_params=params)
 
 
-def get_case_type(zaaktype_url):
+def fetch_case_type(zaaktype_url):
     ztc_client = Service.objects.filter(api_type=APITypes.ztc).get().build_client()
 
     response = ztc_client.retrieve(
@@ -116,7 +117,7 @@ def get_case_type(zaaktype_url):
     return factory(ZaakType, response)
 
 
-def get_document_types(identificatie=None):
+def fetch_document_types(identificatie=None):
     ztc_client = Service.objects.filter(api_type=APITypes.ztc).get().build_client()
     params = {
         "catalogus": settings.OPENZAAK_CATALOGI_URL,
@@ -131,6 +132,25 @@ def get_document_types(identificatie=None):
     )
 
 
+CATALOGI_RESOURCES = {
+    "case_types": fetch_case_types,
+    "case_type": fetch_case_type,
+    "document_types": fetch_document_types,
+}
+
+
+def get_case_types(identificatie=None):
+    return get_catalogi_resource("case_types", fetch_case_types, identificatie)
+
+
+def get_case_type(zaaktype_url):
+    return get_catalogi_resource("case_type", fetch_case_type, zaaktype_url)
+
+
+def get_document_types(identificatie=None):
+    return get_catalogi_resource("document_types", fetch_document_types, identificatie)
+
+
 def create_open_zaak_case(instance):
     zaak_body = _build_zaak_body(instance)
     zrc_client = Service.objects.filter(api_type=APITypes.zrc).get().build_client()
@@ -0,0 +1,17 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def task_refresh_catalogi_resource(self, name, *args):
+    from apps.openzaak.catalogi_cache import refresh_catalogi_resource
+    from apps.openzaak.helpers import CATALOGI_RESOURCES
+
+    try:
+        refresh_catalogi_resource(name, CATALOGI_RESOURCES[name], *args)
+    except Exception as e:
+        # the stale entry is served until it expires or the next refresh succeeds
+        logger.error(f"Could not refresh catalogi resource '{name}': {e}")
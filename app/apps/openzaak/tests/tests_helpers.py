@@ -1,8 +1,14 @@
+from unittest.mock import patch
+
 import requests_mock
 from apps.cases.models import Case, CaseDocument, CaseState, CaseTheme
+from apps.users.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
 from model_bakery import baker
+from zgw_consumers.models import Service
 from zgw_consumers.test import mock_service_oas_get
 
 from ..helpers import (
@@ -196,3 +202,63 @@ class OpenZaakConnectionTests(OpenZaakBaseMixin, TestCase):
             self.ZAAKINFORMATIEOBJECT_URL
         )
         self.assertEqual(case_document.get("informatieobject"), self.DOCUMENT_URL)
+
+
+class CatalogiCacheTests(OpenZaakBaseMixin, TestCase):
+    def get_request_count(self, m, path):
+        return len([r for r in m.request_history if r.path.endswith(path)])
+
+    @requests_mock.Mocker()
+    def test_case_types_are_cached(self, m):
+        """Tests the case types are fetched once while they're fresh"""
+        mock_service_oas_get(m, self.CATALOGI_ROOT, "ztc")
+        m.get(f"{self.CATALOGI_ROOT}zaaktypen", json=self.zaaktypen, status_code=200)
+
+        get_case_types()
+        cases_response = get_case_types()
+
+        self.assertEqual(len(cases_response), 2)
+        self.assertEqual(self.get_request_count(m, "/zaaktypen"), 1)
+
+    @requests_mock.Mocker()
+    def test_stale_case_type_is_refreshed(self, m):
+        """Tests a stale case type is returned and fetched again in the background"""
+        mock_service_oas_get(m, self.CATALOGI_ROOT, "ztc")
+        m.get(f"{self.ZAAK_TYPE_URL}", json=self.zaak_type, status_code=200)
+        get_case_type(self.ZAAK_TYPE_URL)
+        m.get(
+            f"{self.ZAAK_TYPE_URL}",
+            json=dict(self.zaak_type, identificatie="changed"),
+            status_code=200,
+        )
+
+        with patch("apps.openzaak.catalogi_cache.time.time") as time:
+            time.return_value = timezone.now().timestamp() + 7200
+            response = get_case_type(self.ZAAK_TYPE_URL)
+
+        self.assertEqual(response.identificatie, "861ec2b4-daf9-4709-9cc0-06476e647269")
+        self.assertEqual(get_case_type(self.ZAAK_TYPE_URL).identificatie, "changed")
+
+    @requests_mock.Mocker()
+    def test_admin_clears_cache(self, m):
+        """Tests the service admin action fetches the document types again"""
+        mock_service_oas_get(m, self.CATALOGI_ROOT, "ztc")
+        m.get(
+            f"{self.CATALOGI_ROOT}informatieobjecttypen",
+            json=self.informatieobjecttypen,
+            status_code=200,
+        )
+        get_document_types()
+        self.client.force_login(baker.make(User, is_staff=True, is_superuser=True))
+
+        response = self.client.post(
+            reverse("admin:zgw_consumers_service_changelist"),
+            {
+                "action": "clear_catalogi_cache",
+                "_selected_action": [Service.objects.first().id],
+            },
+        )
+        get_document_types()
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.get_request_count(m, "/informatieobjecttypen"), 2)
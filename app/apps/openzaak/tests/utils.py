@@ -1,5 +1,9 @@
 from typing import Any, Dict, List
 
+from apps.cases.models import Case
+from apps.main.counts import invalidate_counts
+from apps.openzaak.catalogi_cache import invalidate_catalogi_cache
+from apps.workflow.models import CaseUserTask
 from django.conf import settings
 from django.db.models import signals
 from model_bakery import baker
@@ -14,6 +18,11 @@ class ZakenBackendTestMixin:
 
         self.signals = signals.post_save.receivers
         signals.post_save.receivers = []
+        # without post_save receivers, cached counts are not invalidated
+        invalidate_counts(Case)
+        invalidate_counts(CaseUserTask)
+        # every test mocks its own catalogi responses
+        invalidate_catalogi_cache()
 
         baker.make(
             Service,
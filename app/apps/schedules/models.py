@@ -63,6 +63,13 @@ class Priority(models.Model):
 
 class Schedule(TaskModelEventEmitter):
     EVENT_TYPE = CaseEvent.TYPE_SCHEDULE
+    EVENT_PREFETCH_RELATED = (
+        "author",
+        "action",
+        "week_segment",
+        "day_segment",
+        "priority",
+    )
 
     action = models.ForeignKey(to=Action, on_delete=models.CASCADE)
     week_segment = models.ForeignKey(to=WeekSegment, on_delete=models.CASCADE)
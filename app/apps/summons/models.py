@@ -21,6 +21,7 @@ class SummonType(models.Model):
 
 class Summon(TaskModelEventEmitter):
     EVENT_TYPE = CaseEvent.TYPE_SUMMON
+    EVENT_PREFETCH_RELATED = ("author", "type", "persons")
 
     case = models.ForeignKey(
         to=Case, null=False, on_delete=models.CASCADE, related_name="summons"
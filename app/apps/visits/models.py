@@ -17,6 +17,7 @@ class Visit(TaskModelEventEmitter):
     )
 
     EVENT_TYPE = CaseEvent.TYPE_VISIT
+    EVENT_PREFETCH_RELATED = ("authors",)
 
     case = models.ForeignKey(Case, on_delete=models.CASCADE)
     start_time = models.DateTimeField()
@@ -112,7 +112,7 @@ class CaseWorkflowAdmin(admin.ModelAdmin):
                 {
                     "migrate_to_latest_success": migrate_to_latest_success,
                     "migrate_to_latest_result": migrate_to_latest_result,
-                    "workflow": obj.get_or_restore_workflow_state(),
+                    "workflow": obj.get_or_restore_workflow_state(read_only=True),
                     "task_states": ["COMPLETED", "READY", "WAITING", "CANCELLED"],
                 }
             )
@@ -193,7 +193,7 @@ class CaseWorkflowAdmin(admin.ModelAdmin):
                 "form": form,
                 "caseworkflow": caseworkflow,
                 "result": result,
-                "workflow": caseworkflow.get_or_restore_workflow_state(),
+                "workflow": caseworkflow.get_or_restore_workflow_state(read_only=True),
                 "task_states": ["COMPLETED", "READY", "WAITING", "CANCELLED"],
                 "title": "Reset subworkflows for director",
             }
@@ -236,7 +236,7 @@ class CaseWorkflowAdmin(admin.ModelAdmin):
                 "caseworkflow": caseworkflow,
                 "success": success,
                 "result": result,
-                "workflow": caseworkflow.get_or_restore_workflow_state(),
+                "workflow": caseworkflow.get_or_restore_workflow_state(read_only=True),
                 "task_states": ["COMPLETED", "READY", "WAITING", "CANCELLED"],
                 "title": "Update data for workflow",
             }
@@ -48,7 +48,7 @@ class UpdateDataForWorkflowsForm(forms.Form):
             result.update({"message": "Not a dict or empty"})
             return result, False
 
-        wf = caseworkflow.get_or_restore_workflow_state()
+        wf = caseworkflow.get_or_restore_workflow_state(read_only=True)
         current_data = {}
         if wf.last_task:
             current_data = copy.deepcopy(wf.last_task.data)
@@ -78,6 +78,7 @@ class UpdateDataForWorkflowsForm(forms.Form):
                 wf, include_spec=False
             )
             caseworkflow.serialized_workflow_state = serialize_wf
+            caseworkflow.last_task_data = caseworkflow.get_last_task_data(wf)
             caseworkflow.save()
             task_update_workflow.delay(caseworkflow.id)
 
@@ -0,0 +1,191 @@
+import logging
+import random
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+LOCK_BACKEND_CACHE = "cache"
+LOCK_BACKEND_POSTGRES = "postgres"
+
+LOCK_RETRY_BASE_DELAY = 0.05
+LOCK_RETRY_MAX_DELAY = 0.5
+
+# deletes or extends the lock only if it still holds our token
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def log_lock_wait(lock_id, waited, acquired):
+    # the wait itself is measured as the lock_wait step of the workflow metrics
+    if waited:
+        logger.info(
+            f"LOCK WAIT: lock id '{lock_id}', waited: {waited:.3f}s, acquired: {acquired}"
+        )
+
+
+def get_fencing_token(lock_id, min_token=0):
+    """
+    Every acquisition gets a higher token than the previous one for the same lock, so
+    a holder whose lease expired can never release or renew the lock of its successor.
+    min_token is the last token known to be used, in case the counter was lost.
+    """
+    fence_key = f"{lock_id}-fence"
+    cache.add(fence_key, min_token or 0, None)
+    return cache.incr(fence_key)
+
+
+def get_redis_client():
+    client = getattr(cache, "client", None)
+    if client and hasattr(client, "get_client"):
+        return client.get_client(write=True)
+
+
+class CacheLockBackend:
+    def try_acquire(self, lock_id, token, timeout):
+        return cache.add(lock_id, token, timeout=timeout)
+
+    def release(self, lock_id, token):
+        redis_client = get_redis_client()
+        if redis_client:
+            return bool(
+                redis_client.eval(RELEASE_SCRIPT, 1, cache.make_key(lock_id), token)
+            )
+        if cache.get(lock_id) == token:
+            return cache.delete(lock_id) is not False
+        return False
+
+    def renew(self, lock_id, token, timeout):
+        redis_client = get_redis_client()
+        if redis_client:
+            return bool(
+                redis_client.eval(
+                    RENEW_SCRIPT, 1, cache.make_key(lock_id), token, timeout
+                )
+            )
+        if cache.get(lock_id) == token:
+            return cache.touch(lock_id, timeout)
+        return False
+
+
+def get_advisory_lock_key(lock_id):
+    """
+    The (namespace, id) int4 pair of the two key form of the advisory lock functions,
+    the namespace is a checksum of the lock id without its trailing object id
+    """
+    namespace, _, object_id = lock_id.rpartition("-")
+    if not namespace or not object_id.isdigit() or int(object_id) >= 2**31:
+        namespace, object_id = lock_id, 0
+    checksum = zlib.crc32(namespace.encode())
+    return checksum - 2**32 if checksum >= 2**31 else checksum, int(object_id)
+
+
+# pg_locks shows the two int4 keys as unsigned oids, with objsubid 2
+HELD_ADVISORY_LOCK_SQL = (
+    "SELECT 1 FROM pg_locks WHERE locktype = 'advisory' "
+    "AND database = (SELECT oid FROM pg_database WHERE datname = current_database()) "
+    "AND pid = pg_backend_pid() AND granted AND objsubid = 2 "
+    "AND classid = (%s::bigint & 4294967295)::oid "
+    "AND objid = (%s::bigint & 4294967295)::oid"
+)
+
+
+class PostgresLockBackend:
+    """
+    Session level advisory locks, held by the database connection until released, so
+    they can't expire halfway through an update. Tokens are only used for fencing.
+    """
+
+    def try_acquire(self, lock_id, token, timeout):
+        # advisory locks are reentrant within a session, a lock held by this
+        # connection is as busy as a lock held by another one
+        key = get_advisory_lock_key(lock_id)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT CASE WHEN EXISTS({HELD_ADVISORY_LOCK_SQL}) THEN false "
+                "ELSE pg_try_advisory_lock(%s, %s) END",
+                [*key, *key],
+            )
+            return cursor.fetchone()[0]
+
+    def release(self, lock_id, token):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_unlock(%s, %s)", get_advisory_lock_key(lock_id)
+            )
+            return cursor.fetchone()[0]
+
+    def renew(self, lock_id, token, timeout):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT EXISTS({HELD_ADVISORY_LOCK_SQL})",
+                get_advisory_lock_key(lock_id),
+            )
+            return cursor.fetchone()[0]
+
+
+LOCK_BACKENDS = {
+    LOCK_BACKEND_CACHE: CacheLockBackend,
+    LOCK_BACKEND_POSTGRES: PostgresLockBackend,
+}
+
+
+def get_lock_backend():
+    return LOCK_BACKENDS[settings.WORKFLOW_LOCK_BACKEND]()
+
+
+def acquire_lock(lock_id, wait=None, timeout=None, min_token=0):
+    """
+    Waits up to WORKFLOW_LOCK_WAIT seconds for the lock, with jittered exponential
+    backoff. Returns the fencing token, or None if the lock is still taken.
+    """
+    wait = settings.WORKFLOW_LOCK_WAIT if wait is None else wait
+    timeout = settings.WORKFLOW_LOCK_TIMEOUT if timeout is None else timeout
+    backend = get_lock_backend()
+    token = get_fencing_token(lock_id, min_token)
+
+    start = time.monotonic()
+    deadline = start + wait
+    attempt = 0
+    while True:
+        if backend.try_acquire(lock_id, token, timeout):
+            waited = time.monotonic() - start if attempt else 0
+            log_lock_wait(lock_id, waited, True)
+            logger.info(f"LOCK START: lock id '{lock_id}', token: {token}")
+            return token
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            log_lock_wait(lock_id, time.monotonic() - start, False)
+            logger.info(f"LOCK BUSY: lock id '{lock_id}'")
+            return None
+        delay = min(LOCK_RETRY_MAX_DELAY, LOCK_RETRY_BASE_DELAY * 2**attempt)
+        time.sleep(min(remaining, random.uniform(0, delay)))
+        attempt += 1
+
+
+def release_lock(lock_id, token):
+    released = get_lock_backend().release(lock_id, token)
+    logger.info(f"LOCK END: lock id '{lock_id}', token: {token}, released: {released}")
+    return released
+
+
+def renew_lock(lock_id, token, timeout=None):
+    """
+    Extends the lease of a held lock, returns False if the lock was lost in the meantime
+    """
+    timeout = settings.WORKFLOW_LOCK_TIMEOUT if timeout is None else timeout
+    return get_lock_backend().renew(lock_id, token, timeout)
@@ -0,0 +1,97 @@
+import logging
+import timeit
+
+from apps.workflow.models import CaseWorkflow
+from apps.workflow.state_serializer import WorkflowSerializer
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from SpiffWorkflow.bpmn.serializer.BpmnSerializer import BpmnSerializer
+from SpiffWorkflow.bpmn.workflow import BpmnWorkflow
+from SpiffWorkflow.serializer.json import loads
+
+logger = logging.getLogger(__name__)
+
+SERIALIZERS = (BpmnSerializer, WorkflowSerializer)
+
+
+def get_stored_states(count):
+    workflows = CaseWorkflow.objects.filter(workflow_state__isnull=False).order_by(
+        "-date_modified"
+    )[:count]
+    for workflow in workflows:
+        spec = workflow.get_workflow_spec()
+        if spec:
+            yield workflow.workflow_type, spec, workflow.serialized_workflow_state
+
+
+def get_started_states():
+    # the state of every configured workflow spec after its first engine steps
+    for theme_name, workflow_types in settings.WORKFLOW_SPEC_CONFIG.items():
+        for workflow_type, config in workflow_types.items():
+            for workflow_version in config.get("versions", {}).keys():
+                workflow = CaseWorkflow(
+                    workflow_type=workflow_type,
+                    workflow_theme_name=theme_name,
+                    workflow_version=workflow_version,
+                )
+                spec = workflow.get_workflow_spec()
+                if not spec:
+                    continue
+                wf = workflow.get_script_engine(BpmnWorkflow(spec))
+                try:
+                    wf.do_engine_steps()
+                except Exception as e:
+                    logger.info(f"benchmark: {workflow_type} stopped early: {e}")
+                state = BpmnSerializer().serialize_workflow(wf, include_spec=False)
+                yield workflow_type, spec, state
+
+
+class Command(BaseCommand):
+    help = "Compares the speed of the workflow serializers on stored or started workflow states"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stored",
+            type=int,
+            default=0,
+            help="Number of the latest stored workflow states to use, instead of starting every configured workflow spec",
+        )
+        parser.add_argument("--number", type=int, default=20)
+
+    def handle(self, *args, **options):
+        states = list(
+            get_stored_states(options["stored"])
+            if options["stored"]
+            else get_started_states()
+        )
+        number = options["number"]
+        totals = {serializer: [0.0, 0.0] for serializer in SERIALIZERS}
+
+        for workflow_type, spec, state in states:
+            wf = BpmnSerializer().deserialize_workflow(state, workflow_spec=spec)
+            for serializer_class in SERIALIZERS:
+                serializer = serializer_class()
+                restored = serializer.deserialize_workflow(state, workflow_spec=spec)
+                serialized = serializer.serialize_workflow(wf, include_spec=False)
+                if loads(serialized) != loads(state) or loads(
+                    BpmnSerializer().serialize_workflow(restored, include_spec=False)
+                ) != loads(state):
+                    raise Exception(
+                        f"{serializer_class.__name__} changes the state of a '{workflow_type}' workflow"
+                    )
+                totals[serializer_class][0] += timeit.timeit(
+                    lambda: serializer.serialize_workflow(wf, include_spec=False),
+                    number=number,
+                )
+                totals[serializer_class][1] += timeit.timeit(
+                    lambda: serializer.deserialize_workflow(state, workflow_spec=spec),
+                    number=number,
+                )
+
+        self.stdout.write(f"{len(states)} workflow states, {number} runs each")
+        for serializer_class, (serialize, deserialize) in totals.items():
+            runs = max(len(states) * number, 1)
+            self.stdout.write(
+                f"{serializer_class.__name__}: serialize {serialize / runs * 1000:.3f} ms, "
+                f"deserialize {deserialize / runs * 1000:.3f} ms"
+            )
@@ -0,0 +1,22 @@
+import logging
+
+from apps.workflow.utils import compile_workflow_spec, get_workflow_spec_paths
+from django.core.management.base import BaseCommand
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Compiles the bpmn files of all workflow specs in WORKFLOW_SPEC_CONFIG into spec bundles"
+
+    def handle(self, *args, **options):
+        for path, workflow_type in get_workflow_spec_paths():
+            try:
+                bundle_path = compile_workflow_spec(path, workflow_type)
+            except Exception as e:
+                # without a bundle the bpmn files are parsed at runtime
+                logger.warning(
+                    f"compile_workflow_specs: '{path}' not compiled, it will be parsed at runtime: {e}"
+                )
+                continue
+            logger.info(f"compile_workflow_specs: '{bundle_path}' compiled")
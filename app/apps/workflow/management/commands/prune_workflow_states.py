@@ -0,0 +1,51 @@
+import logging
+
+from apps.workflow.models import CaseWorkflow
+from apps.workflow.utils import prune_workflow
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Removes the finished branches from the task trees of the stored workflow states"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        workflows = CaseWorkflow.objects.filter(workflow_state__isnull=False).order_by(
+            "id"
+        )
+        pruned_workflows = 0
+        removed_tasks = 0
+        for workflow in workflows.iterator(chunk_size=options["chunk_size"]):
+            if not workflow.get_lock():
+                logger.info(f"prune_workflow_states: workflow {workflow.id} is busy")
+                continue
+            try:
+                wf = workflow.get_or_restore_workflow_state()
+                if not wf:
+                    continue
+                removed = prune_workflow(wf)
+                if not removed:
+                    continue
+                with transaction.atomic():
+                    workflow.check_lock()
+                    workflow.serialized_workflow_state = (
+                        workflow.get_serializer().serialize_workflow(
+                            wf, include_spec=False
+                        )
+                    )
+                    workflow.save()
+                pruned_workflows += 1
+                removed_tasks += removed
+            except Exception as e:
+                logger.error(f"prune_workflow_states: workflow {workflow.id}: {e}")
+            finally:
+                workflow.release_lock()
+
+        logger.info(
+            f"prune_workflow_states: {removed_tasks} tasks removed from {pruned_workflows} workflows"
+        )
@@ -0,0 +1,207 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import sentry_sdk
+from django.conf import settings
+from django.core.cache import cache
+
+from .locks import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+METRIC_NAME = "zaken_workflow_step_duration_seconds"
+METRIC_HELP = "Duration of the steps of the workflow engine"
+METRICS_KEY = "workflow-step-metrics"
+LABEL_SEPARATOR = "|"
+
+# upper bounds in seconds, the last bucket counts everything
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+STEP_SPEC_LOAD = "spec_load"
+STEP_DESERIALIZE = "deserialize"
+STEP_REFRESH_WAITING_TASKS = "refresh_waiting_tasks"
+STEP_DO_ENGINE_STEPS = "do_engine_steps"
+STEP_PRUNE = "prune"
+STEP_SERIALIZE = "serialize"
+STEP_DB_WRITE = "db_write"
+STEP_UPDATE_TASKS = "update_tasks"
+STEP_LOCK_WAIT = "lock_wait"
+
+# the measurements of this process, and the changes not yet flushed to redis
+local_metrics = {}
+pending_metrics = {}
+pending_state = {"count": 0, "flushed": time.monotonic()}
+metrics_lock = threading.Lock()
+
+
+def get_workflow_labels(workflow):
+    if workflow is None:
+        return "", ""
+    return workflow.workflow_type or "", workflow.workflow_version or ""
+
+
+def get_bucket_index(duration):
+    return next(i for i, bound in enumerate(BUCKETS) if duration <= bound)
+
+
+def add_to_histogram(metrics, labels, bucket, duration):
+    histogram = metrics.setdefault(labels, {"buckets": [0] * len(BUCKETS), "sum": 0.0})
+    histogram["buckets"][bucket] += 1
+    histogram["sum"] += duration
+
+
+def observe(step, duration, workflow_type="", workflow_version=""):
+    """
+    Adds a duration to the histogram of a step. The histograms are kept per process,
+    and with redis the changes are flushed in batches so they are shared by the web
+    and celery worker processes.
+    """
+    if not settings.WORKFLOW_METRICS_ENABLED:
+        return
+    labels = (step, workflow_type, workflow_version)
+    bucket = get_bucket_index(duration)
+    with metrics_lock:
+        add_to_histogram(local_metrics, labels, bucket, duration)
+        add_to_histogram(pending_metrics, labels, bucket, duration)
+        pending_state["count"] += 1
+        flush = (
+            pending_state["count"] >= settings.WORKFLOW_METRICS_FLUSH_SIZE
+            or time.monotonic() - pending_state["flushed"]
+            >= settings.WORKFLOW_METRICS_FLUSH_INTERVAL
+        )
+    if flush:
+        flush_metrics()
+
+
+def flush_metrics():
+    """
+    Adds the pending changes of this process to the histograms in redis, with one round trip
+    """
+    with metrics_lock:
+        pending = dict(pending_metrics)
+        pending_metrics.clear()
+        pending_state["count"] = 0
+        pending_state["flushed"] = time.monotonic()
+    if not pending:
+        return
+    try:
+        redis_client = get_redis_client()
+        if not redis_client:
+            return
+        key = cache.make_key(METRICS_KEY)
+        pipeline = redis_client.pipeline(transaction=False)
+        for labels, histogram in pending.items():
+            field = LABEL_SEPARATOR.join(labels)
+            for bucket, count in enumerate(histogram["buckets"]):
+                if count:
+                    pipeline.hincrby(key, f"{field}{LABEL_SEPARATOR}{bucket}", count)
+            pipeline.hincrbyfloat(key, f"{field}{LABEL_SEPARATOR}sum", histogram["sum"])
+        pipeline.execute()
+    except Exception as e:
+        logger.error(f"flush_metrics: {len(pending)} histograms not recorded: {e}")
+
+
+def start_span(step, workflow):
+    workflow_type, workflow_version = get_workflow_labels(workflow)
+    span = sentry_sdk.start_span(
+        op=f"workflow.{step}",
+        description=f"{workflow_type} {workflow_version}".strip(),
+    )
+    if workflow is not None:
+        span.set_tag("workflow.id", workflow.id)
+        span.set_tag("workflow.type", workflow_type)
+        span.set_tag("workflow.version", workflow_version)
+    return span
+
+
+@contextmanager
+def measure(step, workflow=None):
+    """
+    Records how long the wrapped block takes for the type and version of the workflow,
+    and traces it as a span of the current sentry transaction if WORKFLOW_TRACE_SPANS is on.
+    """
+    workflow_type, workflow_version = get_workflow_labels(workflow)
+    span = (
+        start_span(step, workflow) if settings.WORKFLOW_TRACE_SPANS else nullcontext()
+    )
+    start = time.perf_counter()
+    try:
+        with span:
+            yield
+    finally:
+        observe(step, time.perf_counter() - start, workflow_type, workflow_version)
+
+
+def get_metrics():
+    redis_client = get_redis_client()
+    if not redis_client:
+        with metrics_lock:
+            return {
+                labels: {"buckets": list(h["buckets"]), "sum": h["sum"]}
+                for labels, h in local_metrics.items()
+            }
+
+    flush_metrics()
+
+    metrics = {}
+    for field, value in redis_client.hgetall(cache.make_key(METRICS_KEY)).items():
+        *labels, name = field.decode().split(LABEL_SEPARATOR)
+        histogram = metrics.setdefault(
+            tuple(labels), {"buckets": [0] * len(BUCKETS), "sum": 0.0}
+        )
+        if name == "sum":
+            histogram["sum"] = float(value)
+        else:
+            histogram["buckets"][int(name)] = int(value)
+    return metrics
+
+
+def reset_metrics():
+    with metrics_lock:
+        local_metrics.clear()
+        pending_metrics.clear()
+        pending_state["count"] = 0
+        pending_state["flushed"] = time.monotonic()
+    redis_client = get_redis_client()
+    if redis_client:
+        redis_client.delete(cache.make_key(METRICS_KEY))
+
+
+def format_label_value(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def render_metrics():
+    """
+    Renders the histograms in the Prometheus text exposition format
+    """
+    lines = [
+        f"# HELP {METRIC_NAME} {METRIC_HELP}",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for (step, workflow_type, workflow_version), histogram in sorted(
+        get_metrics().items()
+    ):
+        labels = ",".join(
+            f'{name}="{format_label_value(value)}"'
+            for name, value in (
+                ("step", step),
+                ("workflow_type", workflow_type),
+                ("workflow_version", workflow_version),
+            )
+        )
+        count = 0
+        for bound, bucket_count in zip(BUCKETS, histogram["buckets"]):
+            count += bucket_count
+            lines.append(
+                f'{METRIC_NAME}_bucket{{{labels},le="{format_bound(bound)}"}} {count}'
+            )
+        lines.append(f"{METRIC_NAME}_sum{{{labels}}} {histogram['sum']}")
+        lines.append(f"{METRIC_NAME}_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
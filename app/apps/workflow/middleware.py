@@ -0,0 +1,14 @@
+from .utils import workflow_state_cache
+
+
+class WorkflowStateCacheMiddleware:
+    """
+    Workflows restored for reading are shared between CaseWorkflow instances during a request
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with workflow_state_cache():
+            return self.get_response(request)
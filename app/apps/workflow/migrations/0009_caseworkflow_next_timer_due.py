@@ -0,0 +1,26 @@
+# Generated by Django 3.2.13 on 2026-10-18 07:47
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def set_open_workflows_due(apps, schema_editor):
+    # the first timer sweep checks every open workflow once and stores its next timer
+    CaseWorkflow = apps.get_model("workflow", "CaseWorkflow")
+    CaseWorkflow.objects.filter(completed=False).update(next_timer_due=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workflow", "0008_workflowoption_enabled_on_case_closed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="caseworkflow",
+            name="next_timer_due",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(set_open_workflows_due, migrations.RunPython.noop),
+    ]
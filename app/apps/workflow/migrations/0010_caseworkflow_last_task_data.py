@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-18 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workflow", "0009_caseworkflow_next_timer_due"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="caseworkflow",
+            name="last_task_data",
+            field=models.JSONField(null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.13 on 2026-10-18 08:38
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workflow", "0010_caseworkflow_last_task_data"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="caseusertask",
+            index=models.Index(
+                condition=models.Q(("completed", False)),
+                fields=["due_date"],
+                name="caseusertask_open_due_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="caseusertask",
+            index=models.Index(
+                fields=["task_name", "completed"], name="caseusertask_task_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="caseusertask",
+            index=models.Index(
+                fields=["name", "completed"], name="caseusertask_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="caseusertask",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["roles"], name="caseusertask_roles_gin_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="genericcompletedtask",
+            index=models.Index(
+                fields=["task_name", "date_added"], name="generictask_task_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="genericcompletedtask",
+            index=models.Index(
+                fields=["date_added"], name="generictask_date_added_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,104 @@
+import json
+import zlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+COMPRESSION_LEVEL = 6
+
+
+# frozen copies of apps.workflow.state, so later changes there don't change this migration
+def compress_state(state):
+    return zlib.compress(state.encode(), COMPRESSION_LEVEL)
+
+
+def decompress_state(value):
+    return zlib.decompress(bytes(value)).decode()
+
+
+def apply_delta(value, delta):
+    if "v" in delta:
+        return delta["v"]
+
+    if "d" in delta:
+        for key in delta.get("r", []):
+            del value[key]
+        for key, change in delta["d"].items():
+            value[key] = apply_delta(value.get(key), change)
+        return value
+
+    length = delta["n"]
+    value = value[:length] + [None] * (length - len(value))
+    for i, change in delta["l"].items():
+        value[int(i)] = apply_delta(value[int(i)], change)
+    return value
+
+
+def decode_workflow_state(compressed, compressed_delta=None):
+    if compressed is None:
+        return None
+    state = decompress_state(compressed)
+    if compressed_delta is None:
+        return state
+    delta = json.loads(decompress_state(compressed_delta))
+    return json.dumps(apply_delta(json.loads(state), delta))
+
+
+def compress_workflow_states(apps, schema_editor):
+    CaseWorkflow = apps.get_model("workflow", "CaseWorkflow")
+    workflows = (
+        CaseWorkflow.objects.filter(serialized_workflow_state__isnull=False)
+        .only("id", "serialized_workflow_state")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for workflow in workflows:
+        state = workflow.serialized_workflow_state
+        if not isinstance(state, str):
+            state = json.dumps(state)
+        workflow.workflow_state = compress_state(state)
+        batch.append(workflow)
+        if len(batch) == BATCH_SIZE:
+            CaseWorkflow.objects.bulk_update(batch, ["workflow_state"])
+            batch = []
+    CaseWorkflow.objects.bulk_update(batch, ["workflow_state"])
+
+
+def decompress_workflow_states(apps, schema_editor):
+    CaseWorkflow = apps.get_model("workflow", "CaseWorkflow")
+    workflows = (
+        CaseWorkflow.objects.filter(workflow_state__isnull=False)
+        .only("id", "workflow_state", "workflow_state_delta")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for workflow in workflows:
+        workflow.serialized_workflow_state = decode_workflow_state(
+            workflow.workflow_state, workflow.workflow_state_delta
+        )
+        batch.append(workflow)
+        if len(batch) == BATCH_SIZE:
+            CaseWorkflow.objects.bulk_update(batch, ["serialized_workflow_state"])
+            batch = []
+    CaseWorkflow.objects.bulk_update(batch, ["serialized_workflow_state"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workflow", "0011_task_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="caseworkflow",
+            name="workflow_state",
+            field=models.BinaryField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="caseworkflow",
+            name="workflow_state_delta",
+            field=models.BinaryField(editable=False, null=True),
+        ),
+        migrations.RunPython(compress_workflow_states, decompress_workflow_states),
+    ]
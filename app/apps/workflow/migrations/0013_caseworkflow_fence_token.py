@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workflow", "0012_caseworkflow_workflow_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="caseworkflow",
+            name="fence_token",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workflow", "0013_caseworkflow_fence_token"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="caseworkflow",
+            name="serialized_workflow_state",
+        ),
+    ]
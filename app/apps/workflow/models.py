@@ -1,19 +1,22 @@
 import copy
 import datetime
+import json
 import logging
 from string import Template
 
 from apps.cases.models import Case, CaseStateType, CaseTheme
 from apps.events.models import CaseEvent, TaskModelEventEmitter
+from apps.main.counts import invalidate_counts
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.cache import cache
 from django.db import models, transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.dateparse import parse_duration
+from django.utils.module_loading import import_string
 from SpiffWorkflow.bpmn.PythonScriptEngine import PythonScriptEngine
-from SpiffWorkflow.bpmn.serializer.BpmnSerializer import BpmnSerializer
 from SpiffWorkflow.bpmn.specs.BoundaryEvent import _BoundaryEventParent
 from SpiffWorkflow.bpmn.specs.event_definitions import (
     MessageEventDefinition,
@@ -24,9 +27,21 @@ from SpiffWorkflow.camunda.specs.UserTask import UserTask
 from SpiffWorkflow.task import Task
 from utils.managers import BulkCreateSignalsManager
 
+from .locks import acquire_lock, release_lock, renew_lock
+from .metrics import (
+    STEP_DB_WRITE,
+    STEP_DESERIALIZE,
+    STEP_DO_ENGINE_STEPS,
+    STEP_LOCK_WAIT,
+    STEP_PRUNE,
+    STEP_REFRESH_WAITING_TASKS,
+    STEP_SERIALIZE,
+    STEP_SPEC_LOAD,
+    STEP_UPDATE_TASKS,
+    measure,
+)
+from .state import decode_workflow_state, encode_workflow_state
 from .tasks import (
-    redis_lock,
-    release_lock,
     task_complete_user_task_and_create_new_user_tasks,
     task_complete_worflow,
     task_script_wait,
@@ -34,6 +49,7 @@ from .tasks import (
     task_update_workflow,
     task_wait_for_workflows_and_send_message,
 )
+from .user_tasks import get_task_by_name, user_tasks_created
 from .utils import (
     ff_to_subworkflow,
     ff_workflow,
@@ -41,7 +57,9 @@ from .utils import (
     get_latest_version_from_config,
     get_workflow_path,
     get_workflow_spec,
+    get_workflow_state_cache,
     parse_task_spec_form,
+    prune_workflow,
 )
 
 logger = logging.getLogger(__name__)
@@ -130,8 +148,13 @@ class CaseWorkflow(models.Model):
     )
     created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
-    serialized_workflow_state = models.JSONField(null=True)
+    # compressed serialized workflow state, the base of workflow_state_delta if that is set
+    workflow_state = models.BinaryField(null=True, editable=False)
+    # compressed changes to the serialized workflow state since workflow_state
+    workflow_state_delta = models.BinaryField(null=True, editable=False)
     data = models.JSONField(null=True)
+    # snapshot of the data of the last task in serialized_workflow_state
+    last_task_data = models.JSONField(null=True)
 
     case_state_type = models.ForeignKey(
         to="cases.CaseStateType",
@@ -146,20 +169,135 @@ class CaseWorkflow(models.Model):
     completed = models.BooleanField(
         default=False,
     )
-
-    serializer = BpmnSerializer
+    next_timer_due = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    # lock token of the last write, only written by check_lock
+    fence_token = models.BigIntegerField(
+        default=0,
+        editable=False,
+    )
 
     def get_lock_id(self):
         return f"caseworkflow-lock-{self.id}"
 
     def get_lock(self):
-        return redis_lock(self.get_lock_id())
+        with measure(STEP_LOCK_WAIT, self):
+            # the stored fence token seeds the tokens if the cache lost them
+            self._lock_token = acquire_lock(
+                self.get_lock_id(), min_token=self.fence_token
+            )
+        return self._lock_token
 
     def release_lock(self):
-        release_lock(self.get_lock_id())
+        # only the instance that acquired the lock can release it
+        token = getattr(self, "_lock_token", None)
+        if token:
+            self._lock_token = None
+            release_lock(self.get_lock_id(), token)
+
+    def check_lock(self):
+        """
+        Renews the lease of a lock held by this instance before writing, and refuses
+        the write if the lease expired and the lock may have been taken over.
+        The fence token is raised on the row itself, so a holder whose lease expired
+        can't write after a later holder did. Call this in the transaction of the write,
+        the row stays locked until it commits.
+        """
+        token = getattr(self, "_lock_token", None)
+        if not token:
+            return
+        if not renew_lock(self.get_lock_id(), token):
+            self._lock_token = None
+            raise Exception(
+                f"CaseWorkflow: lock for workflow with id '{self.id}' was lost, token: {token}"
+            )
+        if not CaseWorkflow.objects.filter(id=self.id, fence_token__lte=token).update(
+            fence_token=token
+        ):
+            self._lock_token = None
+            raise Exception(
+                f"CaseWorkflow: workflow with id '{self.id}' was written with a newer lock, token: {token}"
+            )
+        self.fence_token = token
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_workflow_state = instance.get_stored_workflow_state()
+        return instance
+
+    def get_stored_workflow_state(self):
+        return (
+            self.__dict__.get("workflow_state"),
+            self.__dict__.get("workflow_state_delta"),
+        )
+
+    @property
+    def serialized_workflow_state(self):
+        # decoded once for the stored values, so the same string is returned until they change
+        stored = (self.workflow_state, self.workflow_state_delta)
+        cached_stored, state = getattr(self, "_serialized_workflow_state", (None, None))
+        if cached_stored is None or any(
+            a is not b for a, b in zip(cached_stored, stored)
+        ):
+            state = decode_workflow_state(*stored)
+            self._serialized_workflow_state = (stored, state)
+        return state
+
+    @serialized_workflow_state.setter
+    def serialized_workflow_state(self, state):
+        base = None
+        if settings.WORKFLOW_STATE_DELTA and self.workflow_state is not None:
+            base = self.get_workflow_state_base()
+        self.workflow_state, self.workflow_state_delta = encode_workflow_state(
+            state, base
+        )
+        self._serialized_workflow_state = (
+            (self.workflow_state, self.workflow_state_delta),
+            state,
+        )
+
+    def get_workflow_state_base(self):
+        cached_base = getattr(self, "_workflow_state_base", None)
+        if cached_base is None or cached_base[0] is not self.workflow_state:
+            state = decode_workflow_state(self.workflow_state)
+            cached_base = (self.workflow_state, json.loads(state))
+            self._workflow_state_base = cached_base
+        return cached_base
+
+    def save(self, *args, **kwargs):
+        # leaves the stored workflow state out of the update if it didn't change, so
+        # postgres keeps the existing toasted value instead of writing it again
+        # the fence token is only written by check_lock, so a stale instance can't lower it
+        saved = getattr(self, "_saved_workflow_state", None)
+        if saved and not args and not self._state.adding:
+            if not kwargs.get("update_fields") and not kwargs.get("force_insert"):
+                unchanged = [
+                    name
+                    for name, value, saved_value in zip(
+                        ("workflow_state", "workflow_state_delta"),
+                        self.get_stored_workflow_state(),
+                        saved,
+                    )
+                    if value is saved_value
+                ]
+                deferred = self.get_deferred_fields()
+                kwargs["update_fields"] = [
+                    f.name
+                    for f in self._meta.concrete_fields
+                    if not f.primary_key
+                    and f.name not in unchanged
+                    and f.name != "fence_token"
+                    and f.attname not in deferred
+                ]
+        super().save(*args, **kwargs)
+        self._saved_workflow_state = self.get_stored_workflow_state()
 
     def get_serializer(self):
-        return self.serializer()
+        return import_string(settings.WORKFLOW_SERIALIZER)()
 
     def get_workflow_spec(self):
         try:
@@ -168,7 +306,8 @@ class CaseWorkflow(models.Model):
                 self.workflow_theme_name,
                 self.workflow_version,
             )
-            spec = get_workflow_spec(path, self.workflow_type)
+            with measure(STEP_SPEC_LOAD, self):
+                spec = get_workflow_spec(path, self.workflow_type)
         except Exception as e:
             logger.error(
                 f"get_workflow_spec: {self.id}, case id: {self.case.id}, error: {str(e)}"
@@ -213,6 +352,7 @@ class CaseWorkflow(models.Model):
                 "parse_duration": parse_duration_string,
             }
         )
+        wf.case_workflow = workflow_instance
         return wf
 
     # legacy method, should be removed if all directors use version >=1.0.0
@@ -413,6 +553,7 @@ class CaseWorkflow(models.Model):
         self._execute_scripts_if_needed(wf)
         serialize_wf = self.get_serializer().serialize_workflow(wf, include_spec=False)
         self.serialized_workflow_state = serialize_wf
+        self.last_task_data = self.get_last_task_data(wf)
 
         self.save()
         task_update_workflow.delay(self.id)
@@ -422,10 +563,15 @@ class CaseWorkflow(models.Model):
         TODO: data is also saved on this instance after a UserTask completed, but in between UserTasks data could diver.
         Find one solution to get current data from workflow and from the saved 'data' from this instance
         """
-        wf = self.get_or_restore_workflow_state()
+        if self.last_task_data is not None:
+            return self.last_task_data
+
+        wf = self.get_or_restore_workflow_state(read_only=True)
         if not wf:
             return {}
+        return self.get_last_task_data(wf)
 
+    def get_last_task_data(self, wf):
         if wf.last_task:
             return wf.last_task.data
         return {}
@@ -444,6 +590,12 @@ class CaseWorkflow(models.Model):
 
     def create_user_tasks(self, wf):
         ready_tasks = wf.get_ready_user_tasks()
+        existing_tasks = set(
+            CaseUserTask.objects.filter(
+                workflow=self,
+                task_id__in=[task.id for task in ready_tasks],
+            ).values_list("task_id", "task_name")
+        )
         task_data = [
             CaseUserTask(
                 task_id=task.id,
@@ -455,16 +607,60 @@ class CaseWorkflow(models.Model):
                 workflow=self,
             )
             for task in ready_tasks
-            if not CaseUserTask.objects.filter(
-                task_id=task.id,
-                task_name=task.task_spec.name,
-                workflow=self,
-            )
+            if (task.id, task.task_spec.name) not in existing_tasks
         ]
-        task_instances = CaseUserTask.objects.bulk_create(task_data)
+        if not task_data:
+            return []
+
+        # the per instance pre_save and post_save work is done once for all tasks
+        self.set_user_task_due_dates(task_data, wf)
+        task_instances = CaseUserTask.objects.bulk_create(task_data, send_signals=False)
+        user_tasks_created(task_instances)
+        transaction.on_commit(lambda: invalidate_counts(CaseUserTask))
 
         return task_instances
 
+    def set_user_task_due_dates(self, case_user_tasks, wf=None):
+        """
+        Sets the due_date of new CaseUserTasks. A due date and owner cached by a
+        previous run of this subworkflow takes precedence over a timer on the task,
+        which takes precedence over the default due date of the user task type.
+        """
+        if wf is None:
+            wf = self.get_or_restore_workflow_state()
+        now = timezone.now()
+        today = datetime.datetime(
+            year=now.year, month=now.month, day=now.day, tzinfo=datetime.timezone.utc
+        )
+        cached_task_keys = [
+            f"parent_workflow_{self.parent_workflow_id}_{case_user_task.task_name}_due_date"
+            if self.parent_workflow_id
+            else None
+            for case_user_task in case_user_tasks
+        ]
+        cached_tasks = cache.get_many([k for k in cached_task_keys if k])
+        used_cached_task_keys = list(cached_tasks.keys())
+
+        for case_user_task, cached_task_key in zip(case_user_tasks, cached_task_keys):
+            cached_task = cached_tasks.pop(cached_task_key, None)
+            if cached_task:
+                case_user_task.due_date = cached_task.get("due_date")
+                case_user_task.owner = cached_task.get("owner")
+                continue
+            task_elapse_datetime = (
+                self.get_task_elapse_datetime(case_user_task.task_id, workflow=wf)
+                if wf
+                else None
+            )
+            if isinstance(task_elapse_datetime, datetime.datetime):
+                case_user_task.due_date = task_elapse_datetime
+            else:
+                task = get_task_by_name(case_user_task.task_name)
+                case_user_task.due_date = today + task.get_due_date(case_user_task)
+        if used_cached_task_keys:
+            cache.delete_many(used_cached_task_keys)
+        return case_user_tasks
+
     def complete_workflow(self):
         wf = self.get_or_restore_workflow_state()
         if not wf:
@@ -477,8 +673,9 @@ class CaseWorkflow(models.Model):
         self._update_db(wf)
 
     def update_tasks(self, wf):
-        self.set_absolete_tasks_to_completed(wf)
-        self.create_user_tasks(wf)
+        with measure(STEP_UPDATE_TASKS, self):
+            self.set_absolete_tasks_to_completed(wf)
+            self.create_user_tasks(wf)
 
     @staticmethod
     def get_task_by_task_id(id):
@@ -490,6 +687,7 @@ class CaseWorkflow(models.Model):
         task = task_complete_user_task_and_create_new_user_tasks.delay(id, data)
         if wait:
             task.wait(timeout=None, interval=0.5)
+        return task
 
     def check_for_issues(self):
         wf = self.get_or_restore_workflow_state()
@@ -533,39 +731,94 @@ class CaseWorkflow(models.Model):
             completed = True
             self.completed = True
 
-        state = self.get_serializer().serialize_workflow(wf, include_spec=False)
-        self.serialized_workflow_state = state
+        if settings.WORKFLOW_PRUNE_TASK_TREE:
+            with measure(STEP_PRUNE, self):
+                prune_workflow(wf)
+
+        with measure(STEP_SERIALIZE, self):
+            state = self.get_serializer().serialize_workflow(wf, include_spec=False)
+            self.serialized_workflow_state = state
+        self.last_task_data = self.get_last_task_data(wf)
+        self.next_timer_due = self.get_next_timer_due(wf)
         self.started = True
-        self.save()
+        with measure(STEP_DB_WRITE, self):
+            self.save()
+        # shared with readers only once the saved state is committed
+        transaction.on_commit(lambda: self._set_cached_workflow_state(wf, state))
 
         if completed:
             data = copy.deepcopy(wf.last_task.data) if wf.last_task else {}
             task_complete_worflow.delay(self.id, data)
 
-    def get_or_restore_workflow_state(self):
-        # gets the unserialized workflow from this workflow instance, it has to use an workflow_spec, witch in this case will be load from filesystem.
-        workflow_spec = self.get_workflow_spec()
+    def get_or_restore_workflow_state(self, workflow_spec=None, read_only=False):
+        """
+        Gets the unserialized workflow from this workflow instance, it has to use an workflow_spec, witch in this case will be load from filesystem.
+        A restored workflow is shared with other read_only callers, so they must not change it.
+        Callers that change the workflow get their own copy.
+        """
+        if read_only:
+            wf = self._get_cached_workflow_state()
+            if wf:
+                if getattr(wf, "case_workflow", None) is not self:
+                    # shared within this request, scripts should act on this instance
+                    wf = self.get_script_engine(wf)
+                return wf
+
+        if workflow_spec is None:
+            workflow_spec = self.get_workflow_spec()
         if not workflow_spec:
             return
 
         if self.serialized_workflow_state:
             try:
-                wf = self.get_serializer().deserialize_workflow(
-                    self.serialized_workflow_state, workflow_spec=workflow_spec
-                )
+                with measure(STEP_DESERIALIZE, self):
+                    wf = self.get_serializer().deserialize_workflow(
+                        self.serialized_workflow_state, workflow_spec=workflow_spec
+                    )
                 wf = self.get_script_engine(wf)
             except Exception as e:
                 logger.error(f"deserialize workflow failed: {e}")
                 return False
+            if read_only:
+                self._set_cached_workflow_state(wf)
             return wf
         else:
             wf = BpmnWorkflow(workflow_spec)
             wf = self.get_script_engine(wf)
             return wf
 
+    def _get_cached_workflow_state(self):
+        # a restored workflow is reused as long as the serialized state it was restored from is unchanged
+        state = self.serialized_workflow_state
+        if not state:
+            return
+        cached_state, wf = getattr(self, "_workflow_state_cache", (None, None))
+        if cached_state is state:
+            return wf
+        workflow_state_cache = get_workflow_state_cache()
+        if workflow_state_cache is not None and self.id:
+            cached_state, wf = workflow_state_cache.get(self.id, (None, None))
+            if cached_state == state:
+                self._workflow_state_cache = (state, wf)
+                return wf
+
+    def _set_cached_workflow_state(self, wf, state=None):
+        if state is None:
+            state = self.serialized_workflow_state
+        self._workflow_state_cache = (state, wf)
+        workflow_state_cache = get_workflow_state_cache()
+        if workflow_state_cache is not None and self.id:
+            workflow_state_cache[self.id] = self._workflow_state_cache
+
+    def _evict_cached_workflow_state(self):
+        self._workflow_state_cache = (None, None)
+        workflow_state_cache = get_workflow_state_cache()
+        if workflow_state_cache is not None and self.id:
+            workflow_state_cache.pop(self.id, None)
+
     def get_task_elapse_datetime(self, task_id, workflow=None):
         if workflow is None:
-            workflow = self.get_or_restore_workflow_state()
+            workflow = self.get_or_restore_workflow_state(read_only=True)
         if not workflow:
             return
 
@@ -643,8 +896,10 @@ class CaseWorkflow(models.Model):
         # no changes to the workflow after this point
         self._update_db(wf)
 
-    def has_a_timer_event_fired(self):
-        wf = self.get_or_restore_workflow_state()
+    def has_a_timer_event_fired(self, workflow_spec=None):
+        wf = self.get_or_restore_workflow_state(
+            workflow_spec=workflow_spec, read_only=True
+        )
         if not wf:
             return False
         waiting_tasks = wf._get_waiting_tasks()
@@ -662,8 +917,62 @@ class CaseWorkflow(models.Model):
                         f"TimerEventDefinition for task '{task.task_spec.name}' has expired. Workflow with id '{self.id}', needs an update"
                     )
                     return True
+
+        # nothing fired, so postpone the next check until the next timer is due
+        # only if this workflow was not saved in the meantime
+        CaseWorkflow.objects.filter(
+            id=self.id,
+            date_modified=self.date_modified,
+        ).update(next_timer_due=self.get_next_timer_due(wf))
         return False
 
+    def get_next_timer_due(self, wf):
+        # returns the earliest moment one of the waiting timer events will fire
+        now = timezone.now()
+        next_timer_due = None
+        for task in wf._get_waiting_tasks():
+            if not hasattr(task.task_spec, "event_definition"):
+                continue
+            event_definition = task.task_spec.event_definition
+            if isinstance(
+                event_definition, MessageEventDefinition
+            ) and wf.get_tasks_from_spec_name(f"script_{event_definition.message}"):
+                # scripts for waiting messages are executed on every check
+                return now
+            if not isinstance(event_definition, TimerEventDefinition):
+                continue
+            try:
+                due = self._get_timer_due(task)
+            except Exception as e:
+                logger.error(
+                    f"get_next_timer_due: workflow id '{self.id}', task '{task.task_spec.name}', error: {str(e)}"
+                )
+                due = now
+            if due is None:
+                continue
+            if next_timer_due is None or due < next_timer_due:
+                next_timer_due = due
+        return next_timer_due
+
+    def _get_timer_due(self, task):
+        # mirrors TimerEventDefinition.has_fired, naive datetimes are in server local time
+        task_datetime = task.workflow.script_engine.evaluate(
+            task, task.task_spec.event_definition.dateTime
+        )
+        if isinstance(task_datetime, datetime.timedelta):
+            start_time = task._get_internal_data("start_time", None)
+            if start_time is None:
+                return timezone.now()
+            start_time = datetime.datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S.%f")
+            return (start_time + task_datetime).astimezone()
+        if isinstance(task_datetime, datetime.datetime):
+            return task_datetime.astimezone()
+        if isinstance(task_datetime, datetime.date):
+            return datetime.datetime.combine(
+                task_datetime + datetime.timedelta(days=1), datetime.time.min
+            ).astimezone()
+        return None
+
     def _execute_scripts_if_needed(self, wf):
         waiting_tasks = wf._get_waiting_tasks()
         for task in waiting_tasks:
@@ -683,15 +992,23 @@ class CaseWorkflow(models.Model):
         return wf
 
     def _update_workflow(self, wf):
-        wf.refresh_waiting_tasks()
-        wf.do_engine_steps()
+        with measure(STEP_REFRESH_WAITING_TASKS, self):
+            wf.refresh_waiting_tasks()
+        with measure(STEP_DO_ENGINE_STEPS, self):
+            wf.do_engine_steps()
         return wf
 
     def _update_db(self, wf):
-        with transaction.atomic():
-            self.save_workflow_state(wf)
-            self.update_tasks(wf)
-            transaction.on_commit(lambda: self.release_lock())
+        try:
+            with transaction.atomic():
+                self.check_lock()
+                self.save_workflow_state(wf)
+                self.update_tasks(wf)
+                transaction.on_commit(lambda: self.release_lock())
+        except Exception:
+            # the state restored by readers may be older than this instance now
+            self._evict_cached_workflow_state()
+            raise
 
     def reset_subworkflow(self, subworkflow, test=True):
         wf = self.get_or_restore_workflow_state()
@@ -771,6 +1088,12 @@ class CaseWorkflow(models.Model):
             self.workflow_theme_name = latest_theme_name
             self.workflow_version = latest_version
             self.serialized_workflow_state = state
+            self.last_task_data = self.get_last_task_data(
+                workflow_result.get("workflow")
+            )
+            self.next_timer_due = self.get_next_timer_due(
+                workflow_result.get("workflow")
+            )
             with transaction.atomic():
                 self.save()
                 subworkflows_to_be_deleted.delete()
@@ -982,6 +1305,12 @@ class CaseWorkflow(models.Model):
             self.workflow_theme_name = latest_theme_name
             self.workflow_version = latest_version
             self.serialized_workflow_state = state
+            self.last_task_data = self.get_last_task_data(
+                workflow_result.get("workflow")
+            )
+            self.next_timer_due = self.get_next_timer_due(
+                workflow_result.get("workflow")
+            )
 
             subworkflow_state = self.get_serializer().serialize_workflow(
                 subworkflow_result.get("workflow"), include_spec=False
@@ -991,6 +1320,9 @@ class CaseWorkflow(models.Model):
             )
             subworkflow.workflow_version = subworkflow_result.get("latest_version")
             subworkflow.serialized_workflow_state = subworkflow_state
+            subworkflow.last_task_data = subworkflow.get_last_task_data(
+                subworkflow_result.get("workflow")
+            )
 
             with transaction.atomic():
                 self.save()
@@ -1068,6 +1400,21 @@ class CaseUserTask(models.Model):
         self.completed = True
         self.save()
 
+    class Meta:
+        indexes = [
+            # the task list only shows open tasks, ordered by due date
+            models.Index(
+                fields=["due_date"],
+                condition=models.Q(completed=False),
+                name="caseusertask_open_due_date_idx",
+            ),
+            models.Index(
+                fields=["task_name", "completed"], name="caseusertask_task_name_idx"
+            ),
+            models.Index(fields=["name", "completed"], name="caseusertask_name_idx"),
+            GinIndex(fields=["roles"], name="caseusertask_roles_gin_idx"),
+        ]
+
 
 class WorkflowOption(models.Model):
     name = models.CharField(max_length=255)
@@ -1089,6 +1436,7 @@ class WorkflowOption(models.Model):
 
 class GenericCompletedTask(TaskModelEventEmitter):
     EVENT_TYPE = CaseEvent.TYPE_GENERIC_TASK
+    EVENT_PREFETCH_RELATED = ("author",)
 
     case = models.ForeignKey(
         to=Case,
@@ -1115,3 +1463,12 @@ class GenericCompletedTask(TaskModelEventEmitter):
             "description": self.description,
             "variables": variables,
         }
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["task_name", "date_added"],
+                name="generictask_task_name_idx",
+            ),
+            models.Index(fields=["date_added"], name="generictask_date_added_idx"),
+        ]
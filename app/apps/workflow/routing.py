@@ -0,0 +1,74 @@
+import logging
+from functools import partial
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW_QUEUE_PREFIX = "workflow"
+
+
+def get_first_argument(args, kwargs, name):
+    return kwargs.get(name, args[0] if args else None)
+
+
+def get_parent_workflow_id(args, kwargs):
+    from apps.workflow.models import CaseWorkflow
+
+    # a completed subworkflow only resumes its parent
+    workflow_id = get_first_argument(args, kwargs, "worklow_id")
+    return (
+        CaseWorkflow.objects.filter(id=workflow_id)
+        .values_list("parent_workflow_id", flat=True)
+        .first()
+        or workflow_id
+    )
+
+
+def get_user_task_workflow_id(args, kwargs):
+    from apps.workflow.models import CaseUserTask
+
+    task_id = get_first_argument(args, kwargs, "task_id")
+    return (
+        CaseUserTask.objects.filter(id=task_id)
+        .values_list("workflow_id", flat=True)
+        .first()
+    )
+
+
+# tasks that change the state of a workflow, with a way to find that workflow's id
+get_workflow_id = partial(get_first_argument, name="workflow_id")
+get_worklow_id = partial(get_first_argument, name="worklow_id")
+
+WORKFLOW_TASKS = {
+    "apps.workflow.tasks.task_update_workflow": get_workflow_id,
+    "apps.workflow.tasks.task_accept_message_for_workflow": get_workflow_id,
+    "apps.workflow.tasks.task_wait_for_workflows_and_send_message": get_workflow_id,
+    "apps.workflow.tasks.task_script_wait": get_workflow_id,
+    "apps.workflow.tasks.task_start_worflow": get_worklow_id,
+    "apps.workflow.tasks.task_reset_subworkflow": get_worklow_id,
+    "apps.workflow.tasks.task_complete_worflow": get_parent_workflow_id,
+    "apps.workflow.tasks.task_complete_user_task_and_create_new_user_tasks": get_user_task_workflow_id,
+}
+
+
+def get_workflow_queue(workflow_id):
+    return f"{WORKFLOW_QUEUE_PREFIX}-{int(workflow_id) % settings.WORKFLOW_QUEUE_PARTITIONS}"
+
+
+def route_workflow_task(name, args, kwargs, options, task=None, **kw):
+    """
+    Celery router that sends all tasks for one workflow to the same partition queue.
+    Each partition queue is consumed by a single worker process, so the changes to a
+    workflow are handled one after the other, in the order they were sent.
+    """
+    if not settings.WORKFLOW_QUEUE_PARTITIONS or name not in WORKFLOW_TASKS:
+        return None
+    try:
+        workflow_id = WORKFLOW_TASKS[name](args or (), kwargs or {})
+    except Exception as e:
+        logger.error(f"route_workflow_task: no workflow id for task '{name}': {e}")
+        return None
+    if workflow_id is None:
+        return None
+    return {"queue": get_workflow_queue(workflow_id)}
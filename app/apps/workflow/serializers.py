@@ -139,11 +139,15 @@ class CaseWorkflowCaseDetailSerializer(serializers.ModelSerializer):
             "created",
             "date_modified",
             "started",
-            "serialized_workflow_state",
+            "workflow_state",
+            "workflow_state_delta",
             "data",
             "completed",
             "workflow_version",
             "case_state_type",
+            "next_timer_due",
+            "last_task_data",
+            "fence_token",
         )
 
 
@@ -161,7 +165,8 @@ class CaseWorkflowBaseSerializer(serializers.ModelSerializer):
             "case",
             "created",
             "started",
-            "serialized_workflow_state",
+            "workflow_state",
+            "workflow_state_delta",
             "main_workflow",
             "workflow_type",
             "workflow_version",
@@ -172,6 +177,9 @@ class CaseWorkflowBaseSerializer(serializers.ModelSerializer):
             "workflow_message_name",
             "case_state_type",
             "date_modified",
+            "next_timer_due",
+            "last_task_data",
+            "fence_token",
         ]
 
 
@@ -184,11 +192,15 @@ class CaseWorkflowSerializer(CaseWorkflowBaseSerializer):
 
     @extend_schema_field(CaseUserTaskWorkdflowSerializer(many=True))
     def get_tasks(self, obj):
-        return CaseUserTaskWorkdflowSerializer(
-            CaseUserTask.objects.filter(
+        # open_tasks is prefetched by the case endpoints
+        tasks = getattr(obj, "open_tasks", None)
+        if tasks is None:
+            tasks = CaseUserTask.objects.filter(
                 workflow=obj,
                 completed=False,
-            ).order_by("id"),
+            ).order_by("id")
+        return CaseUserTaskWorkdflowSerializer(
+            tasks,
             many=True,
             context=self.context,
         ).data
@@ -200,7 +212,8 @@ class CaseWorkflowSerializer(CaseWorkflowBaseSerializer):
             "case",
             "created",
             "started",
-            "serialized_workflow_state",
+            "workflow_state",
+            "workflow_state_delta",
             "main_workflow",
             "workflow_type",
             "workflow_version",
@@ -211,6 +224,9 @@ class CaseWorkflowSerializer(CaseWorkflowBaseSerializer):
             "workflow_message_name",
             "case_state_type",
             "date_modified",
+            "next_timer_due",
+            "last_task_data",
+            "fence_token",
         ]
 
 
@@ -234,6 +250,13 @@ class GenericCompletedTaskCreateSerializer(serializers.ModelSerializer):
         ]
 
 
+class GenericCompletedTaskOperationSerializer(serializers.Serializer):
+    operation_id = serializers.CharField()
+    status = serializers.CharField()
+    completed = serializers.BooleanField()
+    failed = serializers.BooleanField()
+
+
 class WorkflowOptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = WorkflowOption
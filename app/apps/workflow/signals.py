@@ -3,17 +3,19 @@ import datetime
 
 import pytz
 from apps.events.models import TaskModelEventEmitter
+from apps.main.counts import invalidate_counts
 from apps.visits.models import Visit
 from apps.workflow.models import CaseUserTask, CaseWorkflow, GenericCompletedTask
 from apps.workflow.tasks import task_start_worflow
 from django.core.cache import cache
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from SpiffWorkflow.bpmn.workflow import BpmnWorkflow
 from utils.exceptions import EventEmitterExistsError
 
-from .user_tasks import DEFAULT_USER_TASK_DUE_DATE, get_task_by_name
+from .user_tasks import get_task_by_name, user_tasks_created
 from .utils import get_latest_version_from_config
 
 
@@ -46,30 +48,7 @@ def case_user_task_pre_save(sender, instance, **kwargs):
     if kwargs.get("raw"):
         return
     if not instance.id:
-        now = timezone.now()
-        d = datetime.datetime(
-            year=now.year, month=now.month, day=now.day, tzinfo=pytz.UTC
-        )
-        task = get_task_by_name(instance.task_name)
-        task_elapse_datetime = instance.workflow.get_task_elapse_datetime(
-            instance.task_id
-        )
-        cached_task_key = (
-            f"parent_workflow_{instance.workflow.parent_workflow.id}_{instance.task_name}_due_date"
-            if instance.workflow.parent_workflow
-            else None
-        )
-        cached_task = cache.get(cached_task_key) if cached_task_key else None
-        if cached_task:
-            instance.due_date = cached_task.get("due_date")
-            instance.owner = cached_task.get("owner")
-            cache.delete(cached_task_key)
-        elif isinstance(task_elapse_datetime, datetime.datetime):
-            instance.due_date = task_elapse_datetime
-        else:
-            instance.due_date = d + (
-                task.get_due_date(instance) if task else DEFAULT_USER_TASK_DUE_DATE
-            )
+        instance.workflow.set_user_task_due_dates([instance])
     else:
         previous = CaseUserTask.objects.get(id=instance.id)
         if instance.due_date != previous.due_date:
@@ -81,10 +60,19 @@ def case_user_task_pre_save(sender, instance, **kwargs):
 @receiver(post_save, sender=CaseUserTask, dispatch_uid="case_user_task_post_save")
 def case_user_task_post_save(sender, instance, created, **kwargs):
     if created:
-        user_task_type = get_task_by_name(instance.task_name)
-        user_task_instance = user_task_type(instance)
-        user_task_instance.instance_created()
-        instance.case.force_citizen_report_feedback(instance)
+        user_tasks_created([instance])
+
+
+@receiver(
+    post_save, sender=CaseUserTask, dispatch_uid="case_user_task_invalidate_counts"
+)
+@receiver(
+    post_delete,
+    sender=CaseUserTask,
+    dispatch_uid="case_user_task_delete_invalidate_counts",
+)
+def case_user_task_invalidate_counts(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_counts(CaseUserTask))
 
 
 @receiver(pre_save, sender=CaseWorkflow, dispatch_uid="case_workflow_pre_save")
@@ -150,6 +138,7 @@ def case_workflow_pre_save(sender, instance, **kwargs):
         )
         workflow_spec = instance.get_workflow_spec()
         wf = BpmnWorkflow(workflow_spec)
+        instance.last_task_data = instance.get_last_task_data(wf)
         wf = instance.get_serializer().serialize_workflow(wf, include_spec=False)
         instance.serialized_workflow_state = wf
 
@@ -179,4 +168,6 @@ def complete_generic_user_task_and_create_new_user_tasks(
         user_task_type = get_task_by_name(task.task_name)
         user_task_instance = user_task_type(task)
         data.update(user_task_instance.get_data())
-        CaseWorkflow.complete_user_task(task.id, data, wait=True)
+        # the caller can follow the completion by its operation id, instead of waiting
+        result = CaseWorkflow.complete_user_task(task.id, data)
+        instance.operation_id = result.id
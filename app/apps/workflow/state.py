@@ -0,0 +1,110 @@
+import json
+import zlib
+
+from django.conf import settings
+
+COMPRESSION_LEVEL = 6
+
+# markers of the nodes of a delta: a replaced value, a changed dict or a changed list
+DELTA_VALUE = "v"
+DELTA_DICT = "d"
+DELTA_DICT_REMOVED = "r"
+DELTA_LIST = "l"
+DELTA_LIST_LENGTH = "n"
+
+
+def compress_state(state):
+    return zlib.compress(state.encode(), COMPRESSION_LEVEL)
+
+
+def decompress_state(value):
+    return zlib.decompress(bytes(value)).decode()
+
+
+def get_delta(old, new):
+    """
+    Returns the changes between two decoded json values, or None if they are equal.
+    Unchanged parts of nested dicts and lists are left out.
+    """
+    if type(old) is not type(new) or not isinstance(new, (dict, list)):
+        return None if old == new else {DELTA_VALUE: new}
+
+    if isinstance(new, dict):
+        changes = {}
+        for key, value in new.items():
+            change = get_delta(old[key], value) if key in old else {DELTA_VALUE: value}
+            if change is not None:
+                changes[key] = change
+        removed = [key for key in old if key not in new]
+        if not changes and not removed:
+            return None
+        delta = {DELTA_DICT: changes}
+        if removed:
+            delta[DELTA_DICT_REMOVED] = removed
+        return delta
+
+    changes = {}
+    for i, value in enumerate(new):
+        change = get_delta(old[i], value) if i < len(old) else {DELTA_VALUE: value}
+        if change is not None:
+            changes[str(i)] = change
+    if not changes and len(old) == len(new):
+        return None
+    return {DELTA_LIST: changes, DELTA_LIST_LENGTH: len(new)}
+
+
+def apply_delta(value, delta):
+    """
+    Applies the changes from get_delta, the value is changed in place where possible
+    """
+    if DELTA_VALUE in delta:
+        return delta[DELTA_VALUE]
+
+    if DELTA_DICT in delta:
+        for key in delta.get(DELTA_DICT_REMOVED, []):
+            del value[key]
+        for key, change in delta[DELTA_DICT].items():
+            value[key] = apply_delta(value.get(key), change)
+        return value
+
+    length = delta[DELTA_LIST_LENGTH]
+    value = value[:length] + [None] * (length - len(value))
+    for i, change in delta[DELTA_LIST].items():
+        value[int(i)] = apply_delta(value[int(i)], change)
+    return value
+
+
+def encode_workflow_state(state, base=None):
+    """
+    Returns the compressed serialized workflow state and delta to store. Given the
+    stored base state as a (compressed, decoded) tuple, only the changes against that
+    base are stored, until they grow over WORKFLOW_STATE_DELTA_MAX_RATIO of the
+    compressed state and the state becomes the new base.
+    """
+    if state is None:
+        return None, None
+    compressed = compress_state(state)
+    if base is None:
+        return compressed, None
+
+    compressed_base, decoded_base = base
+    delta = get_delta(decoded_base, json.loads(state))
+    if delta is None:
+        return compressed_base, None
+    compressed_delta = compress_state(json.dumps(delta, separators=(",", ":")))
+    if (
+        len(compressed_delta)
+        > len(compressed) * settings.WORKFLOW_STATE_DELTA_MAX_RATIO
+    ):
+        return compressed, None
+    return compressed_base, compressed_delta
+
+
+def decode_workflow_state(compressed, compressed_delta=None):
+    if compressed is None:
+        return None
+    state = decompress_state(compressed)
+    if compressed_delta is None:
+        return state
+    delta = json.loads(decompress_state(compressed_delta))
+    return json.dumps(apply_delta(json.loads(state), delta))
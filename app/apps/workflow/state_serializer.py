@@ -0,0 +1,241 @@
+import pickle
+from base64 import b64decode, b64encode
+from uuid import UUID
+
+import orjson
+from SpiffWorkflow.bpmn.PythonScriptEngine import PythonScriptEngine
+from SpiffWorkflow.bpmn.serializer.BpmnSerializer import BpmnSerializer
+from SpiffWorkflow.bpmn.specs.CallActivity import CallActivity
+from SpiffWorkflow.bpmn.workflow import BpmnWorkflow
+from SpiffWorkflow.serializer.exceptions import MissingSpecError
+from SpiffWorkflow.serializer.json import default, object_hook
+from SpiffWorkflow.task import Task
+from SpiffWorkflow.util.event import Event
+
+DUMPS_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+# unpickled values of these types can be shared between tasks
+IMMUTABLE_TYPES = (str, int, float, bool, type(None))
+
+
+def to_json(value):
+    """
+    Converts the values the json module of Spiff handles with its default hook
+    """
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if isinstance(value, UUID):
+        return {"__uuid__": value.hex}
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    return default(value)
+
+
+def uuid_from_json(value):
+    if isinstance(value, dict) and "__uuid__" in value:
+        return UUID(value["__uuid__"])
+    return from_json(value)
+
+
+def from_json(value):
+    if isinstance(value, dict):
+        return object_hook({k: from_json(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [from_json(v) for v in value]
+    return value
+
+
+def has_call_activities(workflow_spec):
+    has_call_activities = getattr(workflow_spec, "_has_call_activities", None)
+    if has_call_activities is None:
+        has_call_activities = any(
+            isinstance(task_spec, CallActivity)
+            for task_spec in workflow_spec.task_specs.values()
+        )
+        workflow_spec._has_call_activities = has_call_activities
+    return has_call_activities
+
+
+def create_workflow(workflow_spec, read_only=False):
+    """
+    BpmnWorkflow.__init__ builds and predicts a task tree that a restore replaces right
+    away, so the attributes it sets for SpiffWorkflow 1.1.0 are set here instead.
+    """
+    workflow = BpmnWorkflow.__new__(BpmnWorkflow)
+    workflow.spec = workflow_spec
+    workflow.data = {}
+    workflow.outer_workflow = workflow
+    workflow.locks = {}
+    workflow.last_task = None
+    workflow.task_tree = None
+    workflow.success = True
+    workflow.debug = False
+    workflow.completed_event = Event()
+    workflow.task_mapping = {}
+    workflow.name = workflow_spec.name
+    workflow._BpmnWorkflow__script_engine = PythonScriptEngine()
+    workflow._busy_with_restore = False
+    workflow.read_only = read_only
+    return workflow
+
+
+def create_task(workflow, task_spec):
+    # like Task.__init__, without generating an id that is replaced by the stored one
+    task = Task.__new__(Task)
+    task.workflow = workflow
+    task.parent = None
+    task.children = []
+    task._state = Task.MAYBE
+    task.triggered = False
+    task.state_history = [Task.MAYBE]
+    task.log = []
+    task.task_spec = task_spec
+    task.id = None
+    task.thread_id = Task.thread_id_pool
+    task.last_state_change = None
+    task.data = {}
+    task.terminate_current_loop = False
+    task.internal_data = {}
+    task.mi_collect_data = {}
+    return task
+
+
+class WorkflowSerializer(BpmnSerializer):
+    """
+    Reads and writes the same json as BpmnSerializer, for the task types of our
+    workflows. It uses orjson, pickles the data values tasks share with their parent
+    only once, and reconnects the restored tasks to their parents by id in one pass.
+    Workflows with call activities, or with their spec included, are left to
+    BpmnSerializer.
+    """
+
+    def serialize_workflow(self, workflow, include_spec=True, **kwargs):
+        if include_spec:
+            return super().serialize_workflow(workflow, include_spec=True, **kwargs)
+        self._encoded_values = {}
+        try:
+            state = {
+                "data": self.serialize_dict(workflow.data),
+                "last_task": to_json(workflow.last_task.id)
+                if workflow.last_task is not None
+                else None,
+                "success": workflow.success,
+                "task_tree": self.serialize_task(workflow.task_tree),
+            }
+        finally:
+            self._encoded_values = None
+        return orjson.dumps(state, option=DUMPS_OPTIONS).decode()
+
+    def serialize_dict(self, thedict):
+        encoded_values = getattr(self, "_encoded_values", None)
+        if encoded_values is None:
+            return super().serialize_dict(thedict)
+        serialized = {}
+        for key, value in thedict.items():
+            # children copy the data of their parent, so most values are the same objects
+            encoded = encoded_values.get(id(value))
+            if encoded is None or encoded[0] is not value:
+                pickled = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                encoded = (value, {"__bytes__": b64encode(pickled).decode("ascii")})
+                encoded_values[id(value)] = encoded
+            serialized[str(key)] = encoded[1]
+        return serialized
+
+    def serialize_task(self, task, skip_children=False, **kwargs):
+        if getattr(self, "_encoded_values", None) is None:
+            return super().serialize_task(task, skip_children=skip_children, **kwargs)
+        s_state = {
+            "id": to_json(task.id),
+            "parent": to_json(task.parent.id) if task.parent is not None else None,
+            "state": task.state,
+            "triggered": task.triggered,
+            "task_spec": task.task_spec.name,
+            "last_state_change": task.last_state_change,
+            "data": self.serialize_dict(task.data),
+            "internal_data": to_json(task.internal_data),
+        }
+        if not skip_children:
+            s_state["children"] = [self.serialize_task(c) for c in task.children]
+        return s_state
+
+    def deserialize_workflow(
+        self, s_state, workflow_spec=None, read_only=False, **kwargs
+    ):
+        if workflow_spec is None or has_call_activities(workflow_spec):
+            return super().deserialize_workflow(
+                s_state, workflow_spec=workflow_spec, read_only=read_only, **kwargs
+            )
+        s_state = orjson.loads(s_state)
+
+        workflow = create_workflow(workflow_spec, read_only)
+        self._decoded_values = {}
+        self._tasks = {}
+        try:
+            workflow.data = self.deserialize_dict(s_state["data"])
+            workflow.success = s_state["success"]
+            workflow.task_tree = self.deserialize_task(workflow, s_state["task_tree"])
+            tasks = self._tasks
+        finally:
+            self._decoded_values = None
+            self._tasks = None
+
+        for task in tasks.values():
+            task.parent = tasks.get(task.parent)
+        workflow.last_task = tasks.get(uuid_from_json(s_state["last_task"]))
+        workflow.update_task_mapping()
+        return workflow
+
+    def deserialize_dict(self, s_state):
+        decoded_values = getattr(self, "_decoded_values", None)
+        if decoded_values is None:
+            return super().deserialize_dict(s_state)
+        data = {}
+        for key, value in s_state.items():
+            encoded = value["__bytes__"] if isinstance(value, dict) else value
+            if encoded in decoded_values:
+                # every task gets its own copy of mutable values
+                pickled, value = decoded_values[encoded]
+                if value is None:
+                    value = pickle.loads(pickled)
+            else:
+                pickled = b64decode(encoded)
+                value = pickle.loads(pickled)
+                decoded_values[encoded] = (
+                    pickled,
+                    value if isinstance(value, IMMUTABLE_TYPES) else None,
+                )
+            data[key] = value
+        return data
+
+    def deserialize_task(self, workflow, s_state):
+        tasks = getattr(self, "_tasks", None)
+        if tasks is None:
+            return super().deserialize_task(workflow, from_json(s_state))
+        task_spec = workflow.spec.task_specs.get(s_state["task_spec"])
+        if task_spec is None:
+            raise MissingSpecError("Unknown task spec: " + s_state["task_spec"])
+        task = create_task(workflow, task_spec)
+
+        internal_data = s_state["internal_data"]
+        internal_data = from_json(internal_data) if internal_data else {}
+        if (
+            getattr(task_spec, "isSequential", False)
+            and internal_data.get("splits") is not None
+        ):
+            task.task_spec.expanded = internal_data["splits"]
+
+        task.id = uuid_from_json(s_state["id"])
+        # parents are connected once all tasks are restored
+        task.parent = uuid_from_json(s_state["parent"])
+        task.children = [
+            self.deserialize_task(workflow, c) for c in s_state["children"]
+        ]
+        task._state = s_state["state"]
+        task.triggered = s_state["triggered"]
+        task.last_state_change = s_state["last_state_change"]
+        task.data = self.deserialize_dict(s_state["data"])
+        task.internal_data = internal_data
+        tasks[task.id] = task
+        return task
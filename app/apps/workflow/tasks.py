@@ -1,12 +1,11 @@
 import copy
-from time import sleep
 
 import celery
 from apps.cases.models import Case, CitizenReport
-from celery import shared_task
+from celery import chord, group, shared_task
+from celery.signals import task_postrun, task_prerun, worker_process_init
 from celery.utils.log import get_task_logger
 from django.conf import settings
-from django.core.cache import cache
 from django.db import transaction
 
 logger = get_task_logger(__name__)
@@ -14,35 +13,98 @@ logger = get_task_logger(__name__)
 DEFAULT_RETRY_DELAY = 2
 MAX_RETRIES = 6
 
-LOCK_EXPIRE = 5
 
+class BaseTaskWithRetry(celery.Task):
+    autoretry_for = (Exception,)
+    max_retries = MAX_RETRIES
+    default_retry_delay = DEFAULT_RETRY_DELAY
 
-def redis_lock(lock_id):
-    status = cache.add(lock_id, "lock", timeout=LOCK_EXPIRE)
-    logger.info(f"REDIS_LOCK START: lock id '{lock_id}', status: {status}")
-    return status
 
+@worker_process_init.connect
+def warm_workflow_spec_cache_for_worker_process(**kwargs):
+    from apps.workflow.utils import warm_workflow_spec_cache
 
-def release_lock(lock_id):
-    logger.info(f"REDIS_LOCK END: lock id '{lock_id}'")
-    cache.delete(lock_id)
+    if settings.WORKFLOW_SPEC_CACHE_WARMUP:
+        warm_workflow_spec_cache()
 
 
-class BaseTaskWithRetry(celery.Task):
-    autoretry_for = (Exception,)
-    max_retries = MAX_RETRIES
-    default_retry_delay = DEFAULT_RETRY_DELAY
+@task_prerun.connect
+def start_workflow_state_cache_for_task(task=None, **kwargs):
+    from apps.workflow.utils import start_workflow_state_cache
+
+    task.request.workflow_state_cache_token = start_workflow_state_cache()
+
+
+@task_postrun.connect
+def end_workflow_state_cache_for_task(task=None, **kwargs):
+    from apps.workflow.utils import end_workflow_state_cache
+
+    end_workflow_state_cache(getattr(task.request, "workflow_state_cache_token", None))
 
 
 @shared_task(bind=True, base=BaseTaskWithRetry)
 def task_update_workflows(self):
     from apps.workflow.models import CaseWorkflow
+    from django.utils import timezone
 
-    workflow_instances = CaseWorkflow.objects.filter(completed=False)
-    for workflow in workflow_instances:
-        if workflow.has_a_timer_event_fired():
-            task_update_workflow.delay(workflow.id)
-    return f"task_update_workflows complete: count '{workflow_instances.count()}'"
+    workflow_ids = list(
+        CaseWorkflow.objects.filter(
+            completed=False,
+            next_timer_due__lte=timezone.now(),
+        )
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    if not workflow_ids:
+        return task_update_workflows_summary([])
+
+    chunk_size = settings.WORKFLOW_UPDATE_CHUNK_SIZE
+    chunks = [
+        workflow_ids[i : i + chunk_size]
+        for i in range(0, len(workflow_ids), chunk_size)
+    ]
+    chord(
+        group(task_update_workflows_chunk.s(chunk) for chunk in chunks),
+        task_update_workflows_summary.s(),
+    ).apply_async()
+    return f"task_update_workflows: checking '{len(workflow_ids)}' workflows in '{len(chunks)}' chunks"
+
+
+@shared_task(bind=True, base=BaseTaskWithRetry)
+def task_update_workflows_chunk(self, workflow_ids):
+    from apps.workflow.models import CaseWorkflow
+
+    result = {"checked": 0, "fired": 0, "failed": 0}
+    workflow_specs = {}
+    for workflow in CaseWorkflow.objects.filter(id__in=workflow_ids, completed=False):
+        # workflows in a chunk mostly share a spec, so look it up once per version
+        spec_key = (
+            workflow.workflow_type,
+            workflow.workflow_theme_name,
+            workflow.workflow_version,
+        )
+        if spec_key not in workflow_specs:
+            workflow_specs[spec_key] = workflow.get_workflow_spec()
+        result["checked"] += 1
+        try:
+            if workflow.has_a_timer_event_fired(workflow_spec=workflow_specs[spec_key]):
+                task_update_workflow.delay(workflow.id)
+                result["fired"] += 1
+        except Exception as e:
+            result["failed"] += 1
+            logger.error(
+                f"task_update_workflows_chunk: check for workflow with id '{workflow.id}' failed: {e}"
+            )
+    return result
+
+
+@shared_task(bind=True)
+def task_update_workflows_summary(self, results):
+    summary = {"checked": 0, "fired": 0, "failed": 0}
+    for result in results:
+        for key in summary:
+            summary[key] += result.get(key, 0)
+    return f"task_update_workflows complete: checked '{summary['checked']}', fired '{summary['fired']}', failed '{summary['failed']}'"
 
 
 @shared_task(bind=True, base=BaseTaskWithRetry)
@@ -51,8 +113,11 @@ def task_update_workflow(self, workflow_id):
 
     workflow_instance = CaseWorkflow.objects.get(id=workflow_id)
     if workflow_instance.get_lock():
-        with transaction.atomic():
-            workflow_instance.update_workflow()
+        try:
+            with transaction.atomic():
+                workflow_instance.update_workflow()
+        finally:
+            workflow_instance.release_lock()
         return f"task_update_workflow: update for workflow with id '{workflow_id}', complete"
     raise Exception(
         f"task_update_workflow: update for workflow with id '{workflow_id}', is busy"
@@ -65,9 +130,12 @@ def task_accept_message_for_workflow(self, workflow_id, message, extra_data):
 
     workflow_instance = CaseWorkflow.objects.get(id=workflow_id)
     if workflow_instance.get_lock():
-        with transaction.atomic():
-            workflow_instance.accept_message(message, extra_data)
-            return f"task_accept_message_for_workflow: message '{message}' for workflow with id {workflow_id}, accepted"
+        try:
+            with transaction.atomic():
+                workflow_instance.accept_message(message, extra_data)
+        finally:
+            workflow_instance.release_lock()
+        return f"task_accept_message_for_workflow: message '{message}' for workflow with id {workflow_id}, accepted"
 
     raise Exception(
         f"task_accept_message_for_workflow: message '{message}' for workflow with id '{workflow_id}'', is busy"
@@ -157,9 +225,12 @@ def task_start_worflow(self, worklow_id):
 
     workflow_instance = CaseWorkflow.objects.get(id=worklow_id)
     if workflow_instance.get_lock():
-        with transaction.atomic():
-            workflow_instance.start()
-            return f"task_start_worflow: workflow id '{worklow_id}', started"
+        try:
+            with transaction.atomic():
+                workflow_instance.start()
+        finally:
+            workflow_instance.release_lock()
+        return f"task_start_worflow: workflow id '{worklow_id}', started"
 
     raise Exception(f"task_start_worflow: workflow id '{worklow_id}', is busy")
 
@@ -170,10 +241,12 @@ def task_reset_subworkflow(self, worklow_id, subworkflow):
 
     workflow_instance = CaseWorkflow.objects.get(id=worklow_id)
     if workflow_instance.get_lock():
-        with transaction.atomic():
-            sleep(2)
-            workflow_instance.reset_subworkflow(subworkflow, test=False)
-            return f"task_reset_subworkflow: workflow id '{worklow_id}', started"
+        try:
+            with transaction.atomic():
+                workflow_instance.reset_subworkflow(subworkflow, test=False)
+        finally:
+            workflow_instance.release_lock()
+        return f"task_reset_subworkflow: workflow id '{worklow_id}', started"
 
     raise Exception(f"task_reset_subworkflow: workflow id '{worklow_id}', is busy")
 
@@ -185,17 +258,21 @@ def task_wait_for_workflows_and_send_message(self, workflow_id, message, extra_d
     workflow_instance = CaseWorkflow.objects.get(id=workflow_id)
 
     if workflow_instance.get_lock():
-        main_workflow = CaseWorkflow.objects.filter(
-            case=workflow_instance.case, main_workflow=True
-        ).first()
-
-        if hasattr(main_workflow.__class__, f"handle_{message}") and callable(
-            getattr(main_workflow.__class__, f"handle_{message}")
-        ):
-            data = getattr(main_workflow, f"handle_{message}")(workflow_instance)
+        data = None
+        try:
+            main_workflow = CaseWorkflow.objects.filter(
+                case=workflow_instance.case, main_workflow=True
+            ).first()
+
+            if hasattr(main_workflow.__class__, f"handle_{message}") and callable(
+                getattr(main_workflow.__class__, f"handle_{message}")
+            ):
+                data = getattr(main_workflow, f"handle_{message}")(workflow_instance)
+        finally:
+            workflow_instance.release_lock()
 
-            if data:
-                task_accept_message_for_workflow.delay(main_workflow.id, message, data)
+        if data:
+            task_accept_message_for_workflow.delay(main_workflow.id, message, data)
 
         return f"task_wait_for_workflows_and_send_message: message '{message}' for workflow with id '{workflow_id}', completed"
     raise Exception(
@@ -226,16 +303,19 @@ def task_complete_worflow(self, worklow_id, data):
 
     workflow_instance = CaseWorkflow.objects.get(id=worklow_id)
     if workflow_instance.get_lock():
-        with transaction.atomic():
-            if (
-                workflow_instance.parent_workflow
-                and workflow_instance.parent_workflow.workflow_type
-                == CaseWorkflow.WORKFLOW_TYPE_DIRECTOR
-            ):
-                workflow_instance.parent_workflow.accept_message(
-                    f"resume_after_{workflow_instance.workflow_type}",
-                    data,
-                )
+        try:
+            with transaction.atomic():
+                if (
+                    workflow_instance.parent_workflow
+                    and workflow_instance.parent_workflow.workflow_type
+                    == CaseWorkflow.WORKFLOW_TYPE_DIRECTOR
+                ):
+                    workflow_instance.parent_workflow.accept_message(
+                        f"resume_after_{workflow_instance.workflow_type}",
+                        data,
+                    )
+        finally:
+            workflow_instance.release_lock()
 
         return f"task_complete_worflow: workflow id '{worklow_id}', completed"
     raise Exception(f"task_complete_worflow: workflow id '{worklow_id}', is busy")
@@ -248,7 +328,12 @@ def task_complete_user_task_and_create_new_user_tasks(self, task_id, data={}):
     task = CaseUserTask.objects.get(id=task_id, completed=False)
 
     if task.workflow.get_lock():
-        task.workflow.complete_user_task_and_create_new_user_tasks(task.task_id, data)
+        try:
+            task.workflow.complete_user_task_and_create_new_user_tasks(
+                task.task_id, data
+            )
+        finally:
+            task.workflow.release_lock()
         return f"task_complete_user_task_and_create_new_user_tasks: complete task with name '{task.task_name}' for workflow with id '{task.workflow.id}', is completed"
 
     raise Exception(
@@ -0,0 +1,74 @@
+from unittest.mock import Mock, patch
+
+from apps.cases.models import Case
+from apps.openzaak.tests.utils import ZakenBackendTestMixin
+from apps.workflow.models import CaseUserTask, CaseWorkflow, GenericCompletedTask
+from apps.workflow.signals import complete_generic_user_task_and_create_new_user_tasks
+from celery import states
+from django.test import TestCase
+from django.urls import reverse
+from django_celery_results.models import TaskResult
+from model_bakery import baker
+from rest_framework import status
+from utils.unittest_helpers import get_authenticated_client, get_unauthenticated_client
+
+
+class GenericCompletedTaskOperationApiTest(ZakenBackendTestMixin, TestCase):
+    def get_url(self, operation_id):
+        return reverse("generic-tasks-operation", kwargs={"operation_id": operation_id})
+
+    def test_unauthenticated_get(self):
+        """Tests the operation status is not available without authentication"""
+
+        client = get_unauthenticated_client()
+        response = client.get(self.get_url("operation"))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_pending_operation(self):
+        """Tests an operation without a result is pending"""
+
+        client = get_authenticated_client()
+        response = client.get(self.get_url("operation"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], states.PENDING)
+        self.assertFalse(response.data["completed"])
+
+    def test_completed_operation(self):
+        """Tests an operation is completed once its celery task succeeded"""
+
+        TaskResult.objects.create(task_id="operation", status=states.SUCCESS)
+
+        client = get_authenticated_client()
+        response = client.get(self.get_url("operation"))
+
+        self.assertEqual(response.data["status"], states.SUCCESS)
+        self.assertTrue(response.data["completed"])
+        self.assertFalse(response.data["failed"])
+
+
+class GenericCompletedTaskCompleteTest(ZakenBackendTestMixin, TestCase):
+    @patch("apps.workflow.signals.get_task_by_name")
+    @patch("apps.workflow.models.CaseWorkflow.complete_user_task")
+    def test_completion_does_not_wait(self, complete_user_task, get_task_by_name):
+        """Tests the user task is completed in the background, with an operation id"""
+
+        complete_user_task.return_value = Mock(id="operation")
+        get_task_by_name.return_value.return_value.get_data.return_value = {}
+        workflow = CaseWorkflow.objects.bulk_create([CaseWorkflow()])[0]
+        task = CaseUserTask._base_manager.bulk_create(
+            [baker.prepare(CaseUserTask, workflow=workflow, case=baker.make(Case))]
+        )[0]
+        instance = baker.prepare(
+            GenericCompletedTask,
+            case_user_task_id=task.id,
+            variables={"mapped_form_data": {}},
+        )
+
+        complete_generic_user_task_and_create_new_user_tasks(
+            GenericCompletedTask, instance, True
+        )
+
+        complete_user_task.assert_called_once_with(task.id, {})
+        self.assertEqual(instance.operation_id, "operation")
@@ -0,0 +1,85 @@
+from apps.openzaak.tests.utils import ZakenBackendTestMixin
+from apps.workflow.models import CaseUserTask, GenericCompletedTask
+from apps.workflow.views import CaseUserTaskFilter, GenericCompletedTaskFilter
+from django.test import TestCase
+from utils.unittest_helpers import get_query_plan
+
+
+class CaseUserTaskFilterIndexTest(ZakenBackendTestMixin, TestCase):
+    def get_plan(self, data):
+        return get_query_plan(
+            CaseUserTaskFilter(data, queryset=CaseUserTask.objects.all()).qs
+        )
+
+    def test_open_tasks_use_partial_index(self):
+        """Tests the open task list ordered by due_date uses the partial index"""
+
+        queryset = CaseUserTaskFilter(
+            {"completed": "false"}, queryset=CaseUserTask.objects.all()
+        ).qs.order_by("due_date")
+
+        self.assertIn("caseusertask_open_due_date_idx", get_query_plan(queryset))
+
+    def test_role_uses_index(self):
+        """Tests the role filter uses the GIN index"""
+
+        plan = self.get_plan({"role": "toezichthouder"})
+
+        self.assertIn("caseusertask_roles_gin_idx", plan)
+
+    def test_role_and_theme_use_indexes(self):
+        """Tests combining the role and theme filters does not scan the task table"""
+
+        queryset = CaseUserTaskFilter(
+            {"role": "toezichthouder"}, queryset=CaseUserTask.objects.all()
+        ).qs.filter(case__theme__name="Vakantieverhuur")
+
+        self.assertNotIn("Seq Scan", get_query_plan(queryset))
+
+    def test_ton_ids_uses_index(self):
+        """Tests the ton_ids filter uses the case GIN index"""
+
+        plan = self.get_plan({"ton_ids": "123"})
+
+        self.assertIn("case_ton_ids_gin_idx", plan)
+
+    def test_postal_code_uses_index(self):
+        """Tests the case insensitive postal_code filter uses the upper() index"""
+
+        plan = self.get_plan({"postal_code": "1234AB"})
+
+        self.assertIn("address_upper_postal_code_idx", plan)
+
+    def test_task_name_choices_use_index(self):
+        """Tests looking up open tasks by task_name uses the task_name index"""
+
+        queryset = CaseUserTask.objects.filter(
+            completed=False, task_name__in=["task_create_visit"]
+        )
+
+        self.assertIn("caseusertask_task_name_idx", get_query_plan(queryset))
+
+
+class GenericCompletedTaskFilterIndexTest(ZakenBackendTestMixin, TestCase):
+    def get_plan(self, data):
+        return get_query_plan(
+            GenericCompletedTaskFilter(
+                data, queryset=GenericCompletedTask.objects.all()
+            ).qs
+        )
+
+    def test_task_name_uses_index(self):
+        """Tests the task_name filter uses the task_name index"""
+
+        plan = self.get_plan({"task_name": "task_create_visit"})
+
+        self.assertIn("generictask_task_name_idx", plan)
+
+    def test_date_added_uses_index(self):
+        """Tests the date_added range filters use the date_added index"""
+
+        plan = self.get_plan(
+            {"from_date_added": "2022-01-01", "to_date_added": "2022-02-01"}
+        )
+
+        self.assertIn("generictask_date_added_idx", plan)
@@ -0,0 +1,157 @@
+from unittest.mock import patch
+
+from apps.workflow.locks import (
+    acquire_lock,
+    get_advisory_lock_key,
+    release_lock,
+    renew_lock,
+)
+from apps.workflow.models import CaseWorkflow
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+LOCK_ID = "test-lock"
+
+
+class CacheLockTest(TestCase):
+    def setUp(self):
+        cache.delete(LOCK_ID)
+
+    def tearDown(self):
+        cache.delete(LOCK_ID)
+
+    def test_tokens_increase(self):
+        """Tests every acquisition of a lock gets a higher fencing token"""
+
+        token = acquire_lock(LOCK_ID, wait=0)
+        release_lock(LOCK_ID, token)
+
+        self.assertGreater(acquire_lock(LOCK_ID, wait=0), token)
+
+    def test_busy_lock_is_not_acquired(self):
+        """Tests a held lock can't be acquired"""
+
+        acquire_lock(LOCK_ID, wait=0)
+
+        self.assertIsNone(acquire_lock(LOCK_ID, wait=0))
+
+    def test_lock_is_acquired_after_waiting(self):
+        """Tests a lock released while waiting is acquired"""
+
+        token = acquire_lock(LOCK_ID, wait=0)
+
+        with patch(
+            "apps.workflow.locks.time.sleep",
+            side_effect=lambda delay: release_lock(LOCK_ID, token),
+        ), self.assertLogs("apps.workflow.locks", "INFO") as logs:
+            self.assertIsNotNone(acquire_lock(LOCK_ID, wait=5))
+
+        self.assertTrue(any("LOCK WAIT" in line for line in logs.output))
+
+    def test_token_is_above_min_token(self):
+        """Tests a lost token counter continues above the last known token"""
+
+        cache.delete(f"{LOCK_ID}-fence")
+
+        self.assertEquals(acquire_lock(LOCK_ID, wait=0, min_token=41), 42)
+
+    def test_stale_token_does_not_release_or_renew(self):
+        """Tests a holder whose lease expired can't release or renew the new holder's lock"""
+
+        stale_token = acquire_lock(LOCK_ID, wait=0)
+        cache.delete(LOCK_ID)
+        token = acquire_lock(LOCK_ID, wait=0)
+
+        self.assertFalse(release_lock(LOCK_ID, stale_token))
+        self.assertFalse(renew_lock(LOCK_ID, stale_token))
+        self.assertTrue(renew_lock(LOCK_ID, token))
+        self.assertTrue(release_lock(LOCK_ID, token))
+
+
+@override_settings(WORKFLOW_LOCK_BACKEND="postgres")
+class PostgresLockTest(TestCase):
+    def test_advisory_lock(self):
+        """Tests an advisory lock is held until it is released"""
+
+        token = acquire_lock(LOCK_ID, wait=0)
+
+        self.assertTrue(renew_lock(LOCK_ID, token))
+        self.assertTrue(release_lock(LOCK_ID, token))
+        self.assertFalse(renew_lock(LOCK_ID, token))
+
+    def test_advisory_lock_is_not_reentrant(self):
+        """Tests a lock held by this connection can't be acquired again"""
+
+        token = acquire_lock(LOCK_ID, wait=0)
+
+        self.assertIsNone(acquire_lock(LOCK_ID, wait=0))
+        self.assertTrue(release_lock(LOCK_ID, token))
+        self.assertFalse(renew_lock(LOCK_ID, token))
+
+    def test_advisory_lock_key(self):
+        """Tests lock ids map to a namespace and their object id"""
+
+        namespace, object_id = get_advisory_lock_key("caseworkflow-lock-12")
+
+        self.assertEquals(object_id, 12)
+        self.assertEquals(
+            get_advisory_lock_key("caseworkflow-lock-13"), (namespace, 13)
+        )
+        self.assertTrue(-(2**31) <= namespace < 2**31)
+
+
+@override_settings(WORKFLOW_LOCK_WAIT=0)
+class CaseWorkflowLockTest(TestCase):
+    def setUp(self):
+        self.workflow = CaseWorkflow.objects.bulk_create([CaseWorkflow()])[0]
+        cache.delete(self.workflow.get_lock_id())
+
+    def test_release_lock_of_other_instance(self):
+        """Tests releasing the lock from an instance that didn't acquire it keeps the lock"""
+
+        self.workflow.get_lock()
+        CaseWorkflow.objects.get(id=self.workflow.id).release_lock()
+
+        self.assertIsNone(CaseWorkflow.objects.get(id=self.workflow.id).get_lock())
+
+    def test_check_lock_raises_if_lost(self):
+        """Tests a workflow refuses to save after its lock was lost"""
+
+        self.workflow.get_lock()
+        self.workflow.check_lock()
+        cache.delete(self.workflow.get_lock_id())
+
+        with self.assertRaises(Exception):
+            self.workflow.check_lock()
+
+    def test_check_lock_raises_after_newer_write(self):
+        """Tests a holder can't write after a holder with a newer token did"""
+
+        self.workflow.get_lock()
+        cache.delete(self.workflow.get_lock_id())
+        newer_workflow = CaseWorkflow.objects.get(id=self.workflow.id)
+        newer_workflow.get_lock()
+        newer_workflow.check_lock()
+        # the lease of the first holder looks valid again, its token is still older
+        cache.set(self.workflow.get_lock_id(), self.workflow._lock_token)
+
+        with self.assertRaises(Exception):
+            self.workflow.check_lock()
+
+        self.assertEquals(
+            CaseWorkflow.objects.get(id=self.workflow.id).fence_token,
+            newer_workflow.fence_token,
+        )
+
+    def test_save_keeps_fence_token(self):
+        """Tests saving an instance with an older fence token doesn't lower it"""
+
+        stale_workflow = CaseWorkflow.objects.get(id=self.workflow.id)
+        self.workflow.get_lock()
+        self.workflow.check_lock()
+        stale_workflow.save()
+
+        self.assertEquals(
+            CaseWorkflow.objects.get(id=self.workflow.id).fence_token,
+            self.workflow.fence_token,
+        )
@@ -0,0 +1,139 @@
+from unittest.mock import ANY, Mock, patch
+
+from apps.users.models import User
+from apps.workflow.metrics import (
+    METRIC_NAME,
+    STEP_DO_ENGINE_STEPS,
+    STEP_REFRESH_WAITING_TASKS,
+    get_metrics,
+    measure,
+    observe,
+    render_metrics,
+    reset_metrics,
+)
+from apps.workflow.models import CaseWorkflow
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+
+@override_settings(WORKFLOW_METRICS_ENABLED=True)
+class WorkflowMetricsTest(TestCase):
+    def setUp(self):
+        reset_metrics()
+
+    def tearDown(self):
+        reset_metrics()
+
+    def test_measure(self):
+        """Tests a measured step is recorded for the type and version of the workflow"""
+
+        workflow = baker.prepare(
+            CaseWorkflow, workflow_type="director", workflow_version="1.0.0"
+        )
+
+        with measure("serialize", workflow):
+            pass
+
+        histogram = get_metrics()[("serialize", "director", "1.0.0")]
+        self.assertEqual(sum(histogram["buckets"]), 1)
+
+    def test_measure_on_error(self):
+        """Tests a step is also recorded if it raises"""
+
+        with self.assertRaises(ValueError):
+            with measure("deserialize"):
+                raise ValueError()
+
+        self.assertIn(("deserialize", "", ""), get_metrics())
+
+    @override_settings(WORKFLOW_METRICS_ENABLED=False)
+    def test_disabled(self):
+        """Tests nothing is recorded if the metrics are disabled"""
+
+        with measure("serialize"):
+            pass
+
+        self.assertEqual(get_metrics(), {})
+
+    @override_settings(WORKFLOW_TRACE_SPANS=True)
+    @patch("apps.workflow.metrics.sentry_sdk.start_span")
+    def test_trace_span(self, start_span):
+        """Tests a step is traced as a span if trace spans are on"""
+
+        with measure("do_engine_steps"):
+            pass
+
+        start_span.assert_called_once_with(
+            op="workflow.do_engine_steps", description=""
+        )
+
+    def test_update_workflow(self):
+        """Tests the engine steps of a workflow update are recorded"""
+
+        workflow = baker.prepare(
+            CaseWorkflow, workflow_type="director", workflow_version="1.0.0"
+        )
+
+        workflow._update_workflow(Mock())
+
+        metrics = get_metrics()
+        self.assertIn((STEP_REFRESH_WAITING_TASKS, "director", "1.0.0"), metrics)
+        self.assertIn((STEP_DO_ENGINE_STEPS, "director", "1.0.0"), metrics)
+
+    @override_settings(
+        WORKFLOW_METRICS_FLUSH_SIZE=3, WORKFLOW_METRICS_FLUSH_INTERVAL=60
+    )
+    @patch("apps.workflow.metrics.get_redis_client")
+    def test_flushed_in_batches(self, get_redis_client):
+        """Tests the measurements are sent to redis in one round trip per batch"""
+
+        pipeline = get_redis_client.return_value.pipeline.return_value
+        reset_metrics()
+
+        observe("spec_load", 0.001, "director", "1.0.0")
+        observe("spec_load", 0.001, "director", "1.0.0")
+        pipeline.execute.assert_not_called()
+
+        observe("spec_load", 0.3, "director", "1.0.0")
+        pipeline.execute.assert_called_once()
+        pipeline.hincrby.assert_any_call(ANY, "spec_load|director|1.0.0|0", 2)
+        pipeline.hincrby.assert_any_call(ANY, "spec_load|director|1.0.0|6", 1)
+
+    def test_render_metrics(self):
+        """Tests the histograms are rendered with cumulative buckets, sum and count"""
+
+        observe("serialize", 0.02, "director", "1.0.0")
+        observe("serialize", 3, "director", "1.0.0")
+
+        labels = 'step="serialize",workflow_type="director",workflow_version="1.0.0"'
+        lines = render_metrics().splitlines()
+        self.assertIn(f"# TYPE {METRIC_NAME} histogram", lines)
+        self.assertIn(f'{METRIC_NAME}_bucket{{{labels},le="0.01"}} 0', lines)
+        self.assertIn(f'{METRIC_NAME}_bucket{{{labels},le="0.025"}} 1', lines)
+        self.assertIn(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} 2', lines)
+        self.assertIn(f"{METRIC_NAME}_sum{{{labels}}} 3.02", lines)
+        self.assertIn(f"{METRIC_NAME}_count{{{labels}}} 2", lines)
+
+    def test_metrics_endpoint(self):
+        """Tests the histograms are served as Prometheus text"""
+
+        observe("db_write", 0.1)
+        client = APIClient()
+        client.force_authenticate(baker.make(User, is_staff=True))
+
+        response = client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(f"{METRIC_NAME}_count", response.content.decode())
+
+    def test_metrics_endpoint_is_restricted(self):
+        """Tests the histograms are only served to staff users"""
+
+        client = APIClient()
+        self.assertEqual(client.get(reverse("metrics")).status_code, 401)
+
+        client.force_authenticate(baker.make(User, is_staff=False))
+        self.assertEqual(client.get(reverse("metrics")).status_code, 403)
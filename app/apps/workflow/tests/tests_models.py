@@ -1,11 +1,23 @@
+import datetime
+import json
+import uuid
+from unittest.mock import Mock, patch
+
 from apps.cases.models import Case, CaseTheme
 from apps.openzaak.tests.utils import ZakenBackendTestMixin
-from apps.workflow.models import CaseWorkflow
+from apps.workflow.models import CaseUserTask, CaseWorkflow
+from apps.workflow.state import apply_delta, get_delta
+from apps.workflow.utils import workflow_state_cache
 from django.conf import settings
 from django.core import management
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
 from model_bakery import baker
 from SpiffWorkflow.bpmn.specs.BpmnProcessSpec import BpmnProcessSpec
+from SpiffWorkflow.bpmn.specs.event_definitions import TimerEventDefinition
 
 
 class WorkflowModelTest(ZakenBackendTestMixin, TestCase):
@@ -43,3 +55,298 @@ class WorkflowModelTest(ZakenBackendTestMixin, TestCase):
         )
 
         self.assertEquals(workflow.get_workflow_spec().__class__, BpmnProcessSpec)
+
+    def test_next_timer_due(self):
+        """Tests the earliest waiting timer is used as next timer due"""
+
+        def timer_task(start_time, duration):
+            task = Mock()
+            task.task_spec.event_definition = TimerEventDefinition("timer", "duration")
+            task._get_internal_data.return_value = start_time
+            task.workflow.script_engine.evaluate.return_value = duration
+            return task
+
+        wf = Mock()
+        wf._get_waiting_tasks.return_value = [
+            timer_task("2022-01-01 10:00:00.000000", datetime.timedelta(days=14)),
+            timer_task("2022-01-02 10:00:00.000000", datetime.timedelta(days=7)),
+        ]
+
+        self.assertEquals(
+            CaseWorkflow().get_next_timer_due(wf),
+            datetime.datetime(2022, 1, 9, 10).astimezone(),
+        )
+
+    def test_no_next_timer_due_without_waiting_timers(self):
+        """Tests a workflow without waiting timers has no next timer due"""
+
+        wf = Mock()
+        wf._get_waiting_tasks.return_value = []
+
+        self.assertIsNone(CaseWorkflow().get_next_timer_due(wf))
+
+    def test_get_data_from_last_task_data(self):
+        """Tests get_data returns the stored last task data without restoring the workflow"""
+
+        workflow = CaseWorkflow(last_task_data={"foo": {"value": "bar"}})
+
+        with patch.object(
+            CaseWorkflow, "get_or_restore_workflow_state"
+        ) as get_or_restore_workflow_state:
+            data = workflow.get_data()
+
+        get_or_restore_workflow_state.assert_not_called()
+        self.assertEquals(data, {"foo": {"value": "bar"}})
+
+    def test_get_data_without_last_task_data(self):
+        """Tests get_data restores the workflow if no last task data is stored yet"""
+
+        wf = Mock()
+        wf.last_task.data = {"foo": {"value": "bar"}}
+        workflow = CaseWorkflow()
+
+        with patch.object(
+            CaseWorkflow, "get_or_restore_workflow_state", return_value=wf
+        ):
+            self.assertEquals(workflow.get_data(), {"foo": {"value": "bar"}})
+
+
+class CreateUserTasksTest(ZakenBackendTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.parent_workflow = CaseWorkflow.objects.bulk_create([CaseWorkflow()])[0]
+        self.workflow = CaseWorkflow.objects.bulk_create(
+            [CaseWorkflow(case=baker.make(Case), parent_workflow=self.parent_workflow)]
+        )[0]
+
+    def get_wf(self, *task_names):
+        def ready_task(task_name):
+            task = Mock(id=uuid.uuid4(), data={})
+            task.task_spec.name = task_name
+            task.task_spec.description = task_name
+            task.task_spec.lane = "toezichthouder, handhaver"
+            return task
+
+        wf = Mock()
+        wf.get_ready_user_tasks.return_value = [ready_task(n) for n in task_names]
+        wf.get_task.return_value.parent.children = []
+        return wf
+
+    @freeze_time("2022-03-01 12:00")
+    @patch("apps.workflow.models.parse_task_spec_form", return_value=[])
+    def test_create_user_tasks_in_bulk(self, parse_task_spec_form):
+        """Tests new user tasks are created with a due date, without a query per task"""
+
+        wf = self.get_wf("task_a", "task_b", "task_c")
+        existing_task = wf.get_ready_user_tasks()[0]
+        CaseUserTask._base_manager.bulk_create(
+            [
+                baker.prepare(
+                    CaseUserTask,
+                    task_id=existing_task.id,
+                    task_name="task_a",
+                    case=self.workflow.case,
+                    workflow=self.workflow,
+                )
+            ]
+        )
+
+        with self.assertNumQueries(2):
+            task_instances = self.workflow.create_user_tasks(wf)
+
+        self.assertEquals([t.task_name for t in task_instances], ["task_b", "task_c"])
+        self.assertEquals(task_instances[0].roles, ["toezichthouder", "handhaver"])
+        self.assertEquals(
+            task_instances[0].due_date,
+            datetime.datetime(2022, 3, 8, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEquals(CaseUserTask.objects.count(), 3)
+
+    @patch("apps.workflow.models.parse_task_spec_form", return_value=[])
+    def test_cached_due_date_of_subworkflow(self, parse_task_spec_form):
+        """Tests a due date cached for the parent workflow is used once"""
+
+        due_date = datetime.datetime(2022, 4, 1, tzinfo=datetime.timezone.utc)
+        cache_key = f"parent_workflow_{self.parent_workflow.id}_task_a_due_date"
+        cache.set(cache_key, {"due_date": due_date, "owner": None})
+
+        task_instances = self.workflow.create_user_tasks(self.get_wf("task_a"))
+
+        self.assertEquals(task_instances[0].due_date, due_date)
+        self.assertIsNone(cache.get(cache_key))
+
+
+class WorkflowStateCacheTest(TestCase):
+    def get_workflow_instance(self):
+        workflow = CaseWorkflow(
+            id=1,
+            workflow_type=CaseWorkflow.WORKFLOW_TYPE_DIRECTOR,
+            workflow_theme_name="default",
+            workflow_version="6.0.0",
+        )
+        workflow.serialized_workflow_state = self.state
+        return workflow
+
+    def setUp(self):
+        self.state = None
+        workflow = self.get_workflow_instance()
+        wf = workflow.get_or_restore_workflow_state()
+        self.state = workflow.get_serializer().serialize_workflow(
+            wf, include_spec=False
+        )
+
+    def test_restore_is_reused_by_instance(self):
+        """Tests the workflow state is only deserialized again for readers if it changed"""
+
+        workflow = self.get_workflow_instance()
+        with patch.object(
+            workflow.get_serializer().__class__,
+            "deserialize_workflow",
+            wraps=workflow.get_serializer().deserialize_workflow,
+        ) as deserialize_workflow:
+            wf = workflow.get_or_restore_workflow_state(read_only=True)
+            self.assertIs(workflow.get_or_restore_workflow_state(read_only=True), wf)
+
+            workflow.serialized_workflow_state = (
+                workflow.get_serializer().serialize_workflow(wf, include_spec=False)
+            )
+            self.assertIsNot(workflow.get_or_restore_workflow_state(read_only=True), wf)
+
+        self.assertEquals(deserialize_workflow.call_count, 2)
+
+    def test_restore_is_shared_within_scope(self):
+        """Tests instances of the same workflow share the restored workflow within a scope"""
+
+        serializer = self.get_workflow_instance().get_serializer()
+        with patch.object(
+            serializer.__class__,
+            "deserialize_workflow",
+            wraps=serializer.deserialize_workflow,
+        ) as deserialize_workflow:
+            with workflow_state_cache():
+                workflow_a = self.get_workflow_instance()
+                workflow_b = self.get_workflow_instance()
+                workflow_a.get_or_restore_workflow_state(read_only=True)
+                wf = workflow_b.get_or_restore_workflow_state(read_only=True)
+
+            self.assertIs(wf.case_workflow, workflow_b)
+            self.get_workflow_instance().get_or_restore_workflow_state(read_only=True)
+
+        self.assertEquals(deserialize_workflow.call_count, 2)
+
+    def test_restore_for_changes_is_not_shared(self):
+        """Tests callers that change the workflow get their own copy, which isn't cached"""
+
+        with workflow_state_cache():
+            workflow = self.get_workflow_instance()
+            shared_wf = workflow.get_or_restore_workflow_state(read_only=True)
+            wf = workflow.get_or_restore_workflow_state()
+            wf.do_engine_steps()
+
+            self.assertIsNot(wf, shared_wf)
+            self.assertIs(
+                workflow.get_or_restore_workflow_state(read_only=True), shared_wf
+            )
+            self.assertIsNotNone(wf.last_task)
+            self.assertIsNone(
+                self.get_workflow_instance()
+                .get_or_restore_workflow_state(read_only=True)
+                .last_task
+            )
+
+    def test_failed_write_evicts_restore(self):
+        """Tests a failed database write drops the shared workflow of this workflow"""
+
+        with workflow_state_cache() as cache:
+            workflow = self.get_workflow_instance()
+            shared_wf = workflow.get_or_restore_workflow_state(read_only=True)
+            wf = workflow.get_or_restore_workflow_state()
+
+            with patch.object(
+                CaseWorkflow,
+                "save_workflow_state",
+                side_effect=Exception("write failed"),
+            ), self.assertRaises(Exception):
+                workflow._update_db(wf)
+
+            self.assertNotIn(workflow.id, cache)
+            self.assertIsNot(
+                workflow.get_or_restore_workflow_state(read_only=True), shared_wf
+            )
+
+
+class WorkflowStateStorageTest(TestCase):
+    def get_state(self, changed_task=None):
+        tasks = [
+            {"id": i, "state": 64 if i == changed_task else 16, "data": {"i": i}}
+            for i in range(100)
+        ]
+        return json.dumps({"data": {}, "task_tree": {"children": tasks}})
+
+    def setUp(self):
+        created = CaseWorkflow.objects.bulk_create([CaseWorkflow()])[0]
+        created.serialized_workflow_state = self.get_state()
+        created.save()
+        self.workflow = CaseWorkflow.objects.get(id=created.id)
+
+    def test_state_is_compressed(self):
+        """Tests the serialized workflow state is stored compressed and restored"""
+
+        self.assertEqual(self.workflow.serialized_workflow_state, self.get_state())
+        self.assertLess(len(self.workflow.workflow_state), len(self.get_state()))
+        self.assertIsNone(self.workflow.workflow_state_delta)
+
+    def test_unchanged_state_is_not_written(self):
+        """Tests saving a workflow without changing its state leaves the state out of the update"""
+
+        self.workflow.serialized_workflow_state
+        self.workflow.completed = True
+        with CaptureQueriesContext(connection) as queries:
+            self.workflow.save()
+
+        self.assertNotIn("workflow_state", queries[-1]["sql"])
+        self.assertTrue(CaseWorkflow.objects.get(id=self.workflow.id).completed)
+
+    @override_settings(WORKFLOW_STATE_DELTA=True)
+    def test_delta_is_written(self):
+        """Tests only the changes against the base state are written in delta mode"""
+
+        base = self.workflow.workflow_state
+        self.workflow.serialized_workflow_state = self.get_state(changed_task=3)
+        with CaptureQueriesContext(connection) as queries:
+            self.workflow.save()
+
+        self.assertIs(self.workflow.workflow_state, base)
+        self.assertIn("workflow_state_delta", queries[-1]["sql"])
+        self.assertNotIn('"workflow_state" =', queries[-1]["sql"])
+        workflow = CaseWorkflow.objects.get(id=self.workflow.id)
+        self.assertIsNotNone(workflow.workflow_state_delta)
+        self.assertEqual(
+            json.loads(workflow.serialized_workflow_state),
+            json.loads(self.get_state(changed_task=3)),
+        )
+
+    @override_settings(WORKFLOW_STATE_DELTA=True, WORKFLOW_STATE_DELTA_MAX_RATIO=0)
+    def test_large_delta_is_new_base(self):
+        """Tests the whole state is written as the new base if the delta grows too large"""
+
+        self.workflow.serialized_workflow_state = self.get_state(changed_task=3)
+        self.workflow.save()
+
+        workflow = CaseWorkflow.objects.get(id=self.workflow.id)
+        self.assertIsNone(workflow.workflow_state_delta)
+        self.assertEqual(
+            workflow.serialized_workflow_state, self.get_state(changed_task=3)
+        )
+
+    def test_apply_delta(self):
+        """Tests applying the delta between two values restores the new value"""
+
+        old = {"a": [1, {"b": 2}, 3], "c": "d", "e": True}
+        new = {"a": [1, {"b": 3}], "c": "d", "f": [None]}
+
+        delta = get_delta(old, new)
+
+        self.assertNotIn("c", json.dumps(delta))
+        self.assertEqual(apply_delta(json.loads(json.dumps(old)), delta), new)
+        self.assertIsNone(get_delta(new, json.loads(json.dumps(new))))
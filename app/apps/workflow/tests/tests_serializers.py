@@ -0,0 +1,32 @@
+from apps.workflow.serializers import (
+    CaseWorkflowBaseSerializer,
+    CaseWorkflowCaseDetailSerializer,
+    CaseWorkflowSerializer,
+)
+from django.test import TestCase
+
+CASE_WORKFLOW_SERIALIZERS = (
+    CaseWorkflowBaseSerializer,
+    CaseWorkflowCaseDetailSerializer,
+    CaseWorkflowSerializer,
+)
+
+
+class CaseWorkflowSerializerTest(TestCase):
+    def test_next_timer_due_not_exposed(self):
+        """Tests the internal next_timer_due field isn't part of the workflow api output"""
+
+        for serializer_class in CASE_WORKFLOW_SERIALIZERS:
+            self.assertNotIn("next_timer_due", serializer_class().fields)
+
+    def test_last_task_data_not_exposed(self):
+        """Tests the internal last_task_data snapshot isn't part of the workflow api output"""
+
+        for serializer_class in CASE_WORKFLOW_SERIALIZERS:
+            self.assertNotIn("last_task_data", serializer_class().fields)
+
+    def test_fence_token_not_exposed(self):
+        """Tests the lock fence token isn't part of the workflow api output"""
+
+        for serializer_class in CASE_WORKFLOW_SERIALIZERS:
+            self.assertNotIn("fence_token", serializer_class().fields)
@@ -0,0 +1,71 @@
+from apps.workflow.models import CaseWorkflow
+from apps.workflow.state_serializer import WorkflowSerializer
+from django.test import TestCase
+from SpiffWorkflow.bpmn.serializer.BpmnSerializer import BpmnSerializer
+from SpiffWorkflow.bpmn.workflow import BpmnWorkflow
+from SpiffWorkflow.serializer.json import loads
+from SpiffWorkflow.task import Task
+
+
+class WorkflowSerializerTest(TestCase):
+    def setUp(self):
+        workflow = CaseWorkflow(
+            id=1,
+            workflow_type=CaseWorkflow.WORKFLOW_TYPE_DIRECTOR,
+            workflow_theme_name="default",
+            workflow_version="6.0.0",
+        )
+        self.spec = workflow.get_workflow_spec()
+        self.wf = workflow.get_script_engine(BpmnWorkflow(self.spec))
+        self.wf.get_tasks(Task.READY)[0].update_data({"names": {"value": "test"}})
+        self.wf.do_engine_steps()
+
+    def test_same_state_as_bpmn_serializer(self):
+        """Tests the serialized workflow state is the same as the state of BpmnSerializer"""
+
+        state = WorkflowSerializer().serialize_workflow(self.wf, include_spec=False)
+
+        self.assertEqual(
+            loads(state),
+            loads(BpmnSerializer().serialize_workflow(self.wf, include_spec=False)),
+        )
+
+    def test_restores_bpmn_serializer_state(self):
+        """Tests a state of BpmnSerializer is restored to the same workflow"""
+
+        state = BpmnSerializer().serialize_workflow(self.wf, include_spec=False)
+
+        wf = WorkflowSerializer().deserialize_workflow(state, workflow_spec=self.spec)
+
+        self.assertEqual(
+            loads(BpmnSerializer().serialize_workflow(wf, include_spec=False)),
+            loads(state),
+        )
+        self.assertEqual(wf.last_task.id, self.wf.last_task.id)
+        self.assertEqual(
+            [t.parent.id for t in wf.get_tasks() if t.parent],
+            [t.parent.id for t in self.wf.get_tasks() if t.parent],
+        )
+
+    def test_restored_workflow_attributes(self):
+        """Tests restored workflows and tasks have the attributes set by SpiffWorkflow"""
+
+        state = WorkflowSerializer().serialize_workflow(self.wf, include_spec=False)
+
+        wf = WorkflowSerializer().deserialize_workflow(state, workflow_spec=self.spec)
+
+        self.assertEqual(vars(wf).keys(), vars(BpmnWorkflow(self.spec)).keys())
+        self.assertEqual(
+            vars(wf.task_tree).keys(), vars(Task(wf, wf.task_tree.task_spec)).keys()
+        )
+
+    def test_restored_data_is_not_shared(self):
+        """Tests restored tasks don't share mutable data values"""
+
+        state = WorkflowSerializer().serialize_workflow(self.wf, include_spec=False)
+
+        wf = WorkflowSerializer().deserialize_workflow(state, workflow_spec=self.spec)
+
+        values = [t.data["names"] for t in wf.get_tasks() if "names" in t.data]
+        self.assertGreater(len(values), 1)
+        self.assertEqual(len({id(v) for v in values}), len(values))
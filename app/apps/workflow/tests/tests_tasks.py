@@ -0,0 +1,139 @@
+import datetime
+from unittest.mock import patch
+
+from apps.cases.models import Case
+from apps.openzaak.tests.utils import ZakenBackendTestMixin
+from apps.workflow.models import CaseUserTask, CaseWorkflow
+from apps.workflow.routing import route_workflow_task
+from apps.workflow.tasks import (
+    task_update_workflows,
+    task_update_workflows_chunk,
+    task_update_workflows_summary,
+)
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from model_bakery import baker
+
+
+class TaskUpdateWorkflowsTest(TestCase):
+    @override_settings(WORKFLOW_UPDATE_CHUNK_SIZE=1)
+    @patch("apps.workflow.tasks.chord")
+    def test_only_due_workflows_are_checked(self, chord):
+        """Tests only open workflows with a due timer are divided over chunks"""
+
+        now = timezone.now()
+        due_1, due_2, _, _, _ = CaseWorkflow.objects.bulk_create(
+            [
+                CaseWorkflow(next_timer_due=now - datetime.timedelta(minutes=2)),
+                CaseWorkflow(next_timer_due=now - datetime.timedelta(minutes=1)),
+                CaseWorkflow(next_timer_due=now + datetime.timedelta(days=1)),
+                CaseWorkflow(next_timer_due=None),
+                CaseWorkflow(
+                    next_timer_due=now - datetime.timedelta(minutes=1),
+                    completed=True,
+                ),
+            ]
+        )
+
+        task_update_workflows()
+
+        header, body = chord.call_args[0]
+        self.assertEquals(
+            [t.args for t in header.tasks], [([due_1.id],), ([due_2.id],)]
+        )
+        self.assertEquals(body.task, task_update_workflows_summary.name)
+
+    @patch("apps.workflow.tasks.task_update_workflow.delay")
+    @patch.object(CaseWorkflow, "get_workflow_spec")
+    def test_chunk_counts_checked_fired_and_failed(
+        self, get_workflow_spec, task_update_workflow
+    ):
+        """Tests a chunk checks its workflows and returns the checked, fired and failed counts"""
+
+        fired, not_fired, failed = CaseWorkflow.objects.bulk_create(
+            [CaseWorkflow(), CaseWorkflow(), CaseWorkflow()]
+        )
+
+        def has_a_timer_event_fired(workflow, workflow_spec=None):
+            if workflow.id == failed.id:
+                raise Exception("deserialize failed")
+            return workflow.id == fired.id
+
+        with patch.object(
+            CaseWorkflow, "has_a_timer_event_fired", has_a_timer_event_fired
+        ):
+            result = task_update_workflows_chunk([fired.id, not_fired.id, failed.id])
+
+        self.assertEquals(result, {"checked": 3, "fired": 1, "failed": 1})
+        self.assertEquals(get_workflow_spec.call_count, 1)
+        task_update_workflow.assert_called_once_with(fired.id)
+
+    def test_summary(self):
+        """Tests the chunk results are summed up"""
+
+        self.assertEquals(
+            task_update_workflows_summary(
+                [
+                    {"checked": 2, "fired": 1, "failed": 0},
+                    {"checked": 3, "fired": 0, "failed": 1},
+                ]
+            ),
+            "task_update_workflows complete: checked '5', fired '1', failed '1'",
+        )
+
+
+@override_settings(WORKFLOW_QUEUE_PARTITIONS=4)
+class WorkflowTaskRoutingTest(ZakenBackendTestMixin, TestCase):
+    def route(self, name, *args, **kwargs):
+        return route_workflow_task(f"apps.workflow.tasks.{name}", args, kwargs, {})
+
+    def test_tasks_for_a_workflow_share_a_queue(self):
+        """Tests the tasks changing a workflow are routed to the queue of its id"""
+
+        self.assertEquals(
+            self.route("task_update_workflow", 6), {"queue": "workflow-2"}
+        )
+        self.assertEquals(
+            self.route("task_accept_message_for_workflow", 6, "message", {}),
+            {"queue": "workflow-2"},
+        )
+        self.assertEquals(
+            self.route("task_start_worflow", worklow_id=6), {"queue": "workflow-2"}
+        )
+
+    def test_user_task_is_routed_by_its_workflow(self):
+        """Tests completing a user task is routed to the queue of the task's workflow"""
+
+        workflow = CaseWorkflow.objects.bulk_create([CaseWorkflow(id=7)])[0]
+        task = CaseUserTask._base_manager.bulk_create(
+            [baker.prepare(CaseUserTask, workflow=workflow, case=baker.make(Case))]
+        )[0]
+
+        self.assertEquals(
+            self.route("task_complete_user_task_and_create_new_user_tasks", task.id),
+            {"queue": "workflow-3"},
+        )
+
+    def test_completed_subworkflow_is_routed_by_its_parent(self):
+        """Tests completing a subworkflow is routed to the queue of the parent it resumes"""
+
+        parent = CaseWorkflow.objects.bulk_create([CaseWorkflow(id=9)])[0]
+        subworkflow = CaseWorkflow.objects.bulk_create(
+            [CaseWorkflow(id=10, parent_workflow=parent)]
+        )[0]
+
+        self.assertEquals(
+            self.route("task_complete_worflow", subworkflow.id, {}),
+            {"queue": "workflow-1"},
+        )
+
+    def test_other_tasks_use_default_queue(self):
+        """Tests tasks that don't change a single workflow are not routed"""
+
+        self.assertIsNone(self.route("task_update_workflows"))
+
+    @override_settings(WORKFLOW_QUEUE_PARTITIONS=0)
+    def test_routing_disabled(self):
+        """Tests no partition queues are used if WORKFLOW_QUEUE_PARTITIONS is 0"""
+
+        self.assertIsNone(self.route("task_update_workflow", 6))
@@ -0,0 +1,31 @@
+from apps.workflow import user_tasks
+from apps.workflow.user_tasks import USER_TASKS, get_task_by_name, user_task
+from django.test import SimpleTestCase
+
+
+class UserTaskRegistryTest(SimpleTestCase):
+    def test_get_task_by_name(self):
+        """Tests user task classes are found by their task name"""
+
+        self.assertIs(
+            get_task_by_name("task_create_schedule"), user_tasks.task_inplannen_status
+        )
+        self.assertIs(
+            get_task_by_name("task_bepalen_processtap"),
+            user_tasks.task_bepalen_processtap,
+        )
+
+    def test_unknown_task_name(self):
+        """Tests the default user task is returned for an unknown task name"""
+
+        self.assertIs(get_task_by_name("task_unknown"), user_task)
+
+    def test_duplicate_task_name(self):
+        """Tests defining a second user task with an existing task name raises"""
+
+        with self.assertRaises(Exception):
+            type("task_duplicate", (user_task,), {"_task_name": "task_create_schedule"})
+
+        self.assertIs(
+            USER_TASKS["task_create_schedule"], user_tasks.task_inplannen_status
+        )
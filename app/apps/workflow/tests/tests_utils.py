@@ -0,0 +1,196 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from apps.workflow.models import CaseWorkflow
+from apps.workflow.utils import (
+    clear_workflow_spec_cache,
+    compile_workflow_spec,
+    get_workflow_path,
+    get_workflow_spec,
+    prune_workflow,
+)
+from django.core import management
+from django.test import TestCase, override_settings
+from SpiffWorkflow.bpmn.specs.BpmnProcessSpec import BpmnProcessSpec
+from SpiffWorkflow.bpmn.workflow import BpmnWorkflow
+from SpiffWorkflow.task import Task
+
+
+class WorkflowSpecFilesTestCase(TestCase):
+    # copies the bpmn files of a workflow to a temporary directory
+    def setUp(self):
+        clear_workflow_spec_cache()
+        self.path = tempfile.mkdtemp()
+        source_path = get_workflow_path("director", "default", "6.0.0")
+        for f in os.listdir(source_path):
+            if f.endswith(".bpmn"):
+                shutil.copy(os.path.join(source_path, f), self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        clear_workflow_spec_cache()
+
+
+class WorkflowSpecCacheTest(WorkflowSpecFilesTestCase):
+    def test_workflow_spec_is_cached(self):
+        """Tests the same workflow spec instance is returned while the files are unchanged"""
+
+        spec = get_workflow_spec(self.path, "director")
+
+        self.assertIs(get_workflow_spec(self.path, "director"), spec)
+
+    def test_workflow_spec_cache_evicted_on_file_change(self):
+        """Tests a changed bpmn file results in a newly parsed workflow spec"""
+
+        spec = get_workflow_spec(self.path, "director")
+        bpmn_file = os.path.join(self.path, os.listdir(self.path)[0])
+        stat = os.stat(bpmn_file)
+        os.utime(bpmn_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+        self.assertIsNot(get_workflow_spec(self.path, "director"), spec)
+
+
+class WorkflowSpecBundleTest(WorkflowSpecFilesTestCase):
+    def test_workflow_spec_loaded_from_bundle(self):
+        """Tests a compiled bundle is used instead of parsing the bpmn files"""
+
+        compile_workflow_spec(self.path, "director")
+
+        with patch("apps.workflow.utils.parse_workflow_spec") as parse_workflow_spec:
+            spec = get_workflow_spec(self.path, "director")
+
+        parse_workflow_spec.assert_not_called()
+        self.assertEquals(spec.__class__, BpmnProcessSpec)
+
+    def test_outdated_bundle_is_ignored(self):
+        """Tests the bpmn files are parsed if they are newer than the bundle"""
+
+        bundle_path = compile_workflow_spec(self.path, "director")
+        stat = os.stat(bundle_path)
+        os.utime(bundle_path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 1000000000))
+
+        with patch(
+            "apps.workflow.utils.parse_workflow_spec",
+            return_value="parsed_spec",
+        ) as parse_workflow_spec:
+            spec = get_workflow_spec(self.path, "director")
+
+        parse_workflow_spec.assert_called_once_with(self.path, "director")
+        self.assertEquals(spec, "parsed_spec")
+
+    def test_compile_command_failure_is_a_warning(self):
+        """Tests the compile command logs a warning instead of failing when a spec can't be compiled"""
+
+        with patch(
+            "apps.workflow.management.commands.compile_workflow_specs.get_workflow_spec_paths",
+            return_value=[(self.path, "director")],
+        ), patch(
+            "apps.workflow.management.commands.compile_workflow_specs.compile_workflow_spec",
+            side_effect=Exception("parse error"),
+        ), self.assertLogs(
+            "apps.workflow.management.commands.compile_workflow_specs", "WARNING"
+        ):
+            management.call_command("compile_workflow_specs")
+
+
+class PruneWorkflowTest(TestCase):
+    def setUp(self):
+        workflow = CaseWorkflow(
+            id=1,
+            workflow_type=CaseWorkflow.WORKFLOW_TYPE_DIRECTOR,
+            workflow_theme_name="default",
+            workflow_version="6.0.0",
+        )
+        self.wf = workflow.get_script_engine(BpmnWorkflow(workflow.get_workflow_spec()))
+        self.wf.do_engine_steps()
+        self.root = self.wf.task_tree
+
+    def get_unfinished_tasks(self):
+        return [t.id for t in self.wf.get_tasks() if not t._is_finished()]
+
+    def add_finished_branch(self, task_spec):
+        task = self.root._add_child(task_spec, state=Task.COMPLETED)
+        task._add_child(task_spec, state=Task.CANCELLED)
+        return task
+
+    def test_finished_branches_are_removed(self):
+        """Tests subtrees of completed and cancelled tasks are removed from the task tree"""
+
+        unfinished_tasks = self.get_unfinished_tasks()
+        branch = self.add_finished_branch(self.wf.spec.task_specs["End"])
+
+        self.assertEqual(prune_workflow(self.wf), 2)
+
+        self.assertNotIn(branch, self.root.children)
+        self.assertEqual(self.get_unfinished_tasks(), unfinished_tasks)
+        self.assertIsNone(self.wf.get_task(branch.id))
+
+    def test_last_task_is_kept(self):
+        """Tests the branch of the last task is kept"""
+
+        branch = self.add_finished_branch(self.wf.spec.task_specs["End"])
+        self.wf.last_task = branch
+
+        self.assertEqual(prune_workflow(self.wf), 0)
+
+        self.assertIn(branch, self.root.children)
+
+    def test_script_tasks_are_kept(self):
+        """Tests script tasks that are looked up by name are kept"""
+
+        branch = self.add_finished_branch(
+            self.wf.spec.task_specs["script_start_summon_subworkflow"]
+        )
+
+        self.assertEqual(prune_workflow(self.wf), 0)
+
+        self.assertIn(branch, self.root.children)
+
+
+class PruneWorkflowStatesCommandTest(TestCase):
+    def setUp(self):
+        workflow = CaseWorkflow.objects.bulk_create(
+            [
+                CaseWorkflow(
+                    workflow_type=CaseWorkflow.WORKFLOW_TYPE_DIRECTOR,
+                    workflow_theme_name="default",
+                    workflow_version="6.0.0",
+                )
+            ]
+        )[0]
+        wf = workflow.get_script_engine(BpmnWorkflow(workflow.get_workflow_spec()))
+        wf.do_engine_steps()
+        task_spec = wf.spec.task_specs["End"]
+        wf.task_tree._add_child(task_spec, state=Task.COMPLETED)._add_child(
+            task_spec, state=Task.CANCELLED
+        )
+        workflow.serialized_workflow_state = (
+            workflow.get_serializer().serialize_workflow(wf, include_spec=False)
+        )
+        workflow.save()
+        self.workflow = CaseWorkflow.objects.get(id=workflow.id)
+        self.state = self.workflow.serialized_workflow_state
+
+    def test_pruned_state_is_saved(self):
+        """Tests the pruned workflow state is saved and the lock is released"""
+
+        management.call_command("prune_workflow_states")
+
+        workflow = CaseWorkflow.objects.get(id=self.workflow.id)
+        self.assertLess(len(workflow.serialized_workflow_state), len(self.state))
+        self.assertEqual(prune_workflow(workflow.get_or_restore_workflow_state()), 0)
+        self.assertTrue(workflow.get_lock())
+        workflow.release_lock()
+
+    def test_busy_workflow_is_skipped(self):
+        """Tests a workflow that is locked by another process is left unchanged"""
+
+        self.assertTrue(self.workflow.get_lock())
+        with override_settings(WORKFLOW_LOCK_WAIT=0):
+            management.call_command("prune_workflow_states")
+        self.workflow.release_lock()
+
+        workflow = CaseWorkflow.objects.get(id=self.workflow.id)
+        self.assertEqual(workflow.serialized_workflow_state, self.state)
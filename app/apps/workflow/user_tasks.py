@@ -1,5 +1,4 @@
 import logging
-import sys
 from datetime import datetime, timedelta, timezone
 
 from dateutil.relativedelta import relativedelta
@@ -59,17 +58,46 @@ class BpmnForm:
         return form
 
 
+# user_task subclasses by task name, filled when the classes are defined
+USER_TASKS = {}
+
+
+def register_user_task(cls):
+    task_name = cls.get_task_name()
+    registered = USER_TASKS.get(task_name)
+    # a reloaded module defines the same classes again
+    if registered and (registered.__module__, registered.__qualname__) != (
+        cls.__module__,
+        cls.__qualname__,
+    ):
+        raise Exception(
+            f"user_task '{cls.__qualname__}' has the same task name '{task_name}' as '{registered.__qualname__}'"
+        )
+    USER_TASKS[task_name] = cls
+    return cls
+
+
 def get_task_by_name(task_name):
-    current_module = sys.modules[__name__]
-    user_tasks = list(
-        filter(lambda class_name: class_name[:5] == "task_", dir(current_module))
-    )
+    return USER_TASKS.get(task_name, user_task)
 
-    for ut in user_tasks:
-        cls = getattr(current_module, ut)
-        if cls.get_task_name() == task_name:
-            return cls
-    return user_task
+
+def user_tasks_created(case_user_tasks):
+    """
+    Post create hook for new CaseUserTasks, for a single saved task or a bulk created batch
+    """
+    task_types = {}
+    case_tasks = {}
+    for case_user_task in case_user_tasks:
+        if case_user_task.task_name not in task_types:
+            task_types[case_user_task.task_name] = get_task_by_name(
+                case_user_task.task_name
+            )
+        task_types[case_user_task.task_name](case_user_task).instance_created()
+        case_tasks.setdefault(case_user_task.case_id, []).append(case_user_task)
+
+    # the new tasks of a case are checked at once, so feedback is forced once per case
+    for tasks in case_tasks.values():
+        tasks[0].case.force_citizen_report_feedback(tasks)
 
 
 class user_task:
@@ -79,6 +107,10 @@ class user_task:
     due_date = DEFAULT_USER_TASK_DUE_DATE
     case_user_task = None
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        register_user_task(cls)
+
     def __init__(self, case_user_task_instance):
         from .models import CaseUserTask
 
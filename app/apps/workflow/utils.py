@@ -4,6 +4,10 @@ import itertools
 import json
 import logging
 import os
+import pickle
+from contextlib import contextmanager
+from contextvars import ContextVar
+from importlib import metadata
 
 from apps.events.models import TaskModelEventEmitter
 from deepdiff import DeepDiff
@@ -22,6 +26,9 @@ from SpiffWorkflow.task import Task
 
 logger = logging.getLogger(__name__)
 
+WORKFLOW_SPEC_BUNDLE_EXTENSION = ".spec.pickle"
+WORKFLOW_SPEC_BUNDLE_FORMAT = 1
+
 
 def complete_uncompleted_task_for_event_emitters(event_emmitter, data={}):
     from .models import CaseWorkflow
@@ -236,7 +243,7 @@ def is_bpmn_file(file_name):
     return file_name.split(".")[-1] == "bpmn"
 
 
-def get_workflow_spec(path, workflow_type):
+def parse_workflow_spec(path, workflow_type):
     x = CamundaParser()
 
     for f in get_workflow_spec_files(path):
@@ -245,6 +252,190 @@ def get_workflow_spec(path, workflow_type):
     return spec
 
 
+def get_workflow_spec_files_signature(path):
+    """
+    Fingerprint of the bpmn files in a path, a cached workflow_spec is only valid as long as this does not change
+    """
+    signature = []
+    for f in sorted(get_workflow_spec_files(path)):
+        stat = os.stat(f)
+        signature.append((f, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def get_workflow_spec_bundle_path(path, workflow_type):
+    return os.path.join(
+        path, f"{workflow_type.lower()}{WORKFLOW_SPEC_BUNDLE_EXTENSION}"
+    )
+
+
+def get_workflow_spec_bundle_version():
+    # bundles are pickled spiff objects, so they are only valid for the spiff version they were compiled with
+    return WORKFLOW_SPEC_BUNDLE_FORMAT, metadata.version("SpiffWorkflow")
+
+
+def compile_workflow_spec(path, workflow_type):
+    spec = parse_workflow_spec(path, workflow_type)
+    bundle_path = get_workflow_spec_bundle_path(path, workflow_type)
+    bundle = {
+        "version": get_workflow_spec_bundle_version(),
+        "spec": spec,
+    }
+    tmp_bundle_path = f"{bundle_path}.tmp"
+    with open(tmp_bundle_path, "wb") as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_bundle_path, bundle_path)
+    return bundle_path
+
+
+def load_workflow_spec_bundle(path, workflow_type):
+    """
+    Returns the compiled workflow_spec, if the bundle is newer than all of the bpmn files in this path
+    """
+    bundle_path = get_workflow_spec_bundle_path(path, workflow_type)
+    if not os.path.isfile(bundle_path):
+        return
+
+    source_mtimes = [os.stat(f).st_mtime_ns for f in get_workflow_spec_files(path)]
+    if not source_mtimes or os.stat(bundle_path).st_mtime_ns < max(source_mtimes):
+        logger.info(f"load_workflow_spec_bundle: bundle '{bundle_path}' is outdated")
+        return
+
+    try:
+        with open(bundle_path, "rb") as f:
+            bundle = pickle.load(f)
+    except Exception as e:
+        logger.error(f"load_workflow_spec_bundle: bundle '{bundle_path}', {str(e)}")
+        return
+
+    if bundle.get("version") != get_workflow_spec_bundle_version():
+        logger.info(
+            f"load_workflow_spec_bundle: bundle '{bundle_path}' was compiled with another version"
+        )
+        return
+    return bundle.get("spec")
+
+
+# parsed workflow_specs by (path, workflow_type), the path includes the theme, type and version
+_workflow_spec_cache = {}
+
+
+def get_workflow_spec(path, workflow_type):
+    key = (path, workflow_type)
+    signature = get_workflow_spec_files_signature(path)
+
+    cached = _workflow_spec_cache.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    spec = load_workflow_spec_bundle(path, workflow_type)
+    if not spec:
+        spec = parse_workflow_spec(path, workflow_type)
+    _workflow_spec_cache[key] = (signature, spec)
+    return spec
+
+
+def clear_workflow_spec_cache():
+    _workflow_spec_cache.clear()
+
+
+def get_workflow_spec_paths(workflow_spec_config=None):
+    workflow_spec_config = (
+        workflow_spec_config if workflow_spec_config else settings.WORKFLOW_SPEC_CONFIG
+    )
+    return [
+        (get_workflow_path(workflow_type, theme_name, workflow_version), workflow_type)
+        for theme_name, workflow_types in workflow_spec_config.items()
+        for workflow_type, config in workflow_types.items()
+        for workflow_version in config.get("versions", {}).keys()
+    ]
+
+
+def warm_workflow_spec_cache(workflow_spec_config=None):
+    """
+    Loads all workflow_specs from the config, so the first workflow restore in a new process does not have to
+    """
+    count = 0
+    for path, workflow_type in get_workflow_spec_paths(workflow_spec_config):
+        try:
+            get_workflow_spec(path, workflow_type)
+            count += 1
+        except Exception as e:
+            logger.error(
+                f"warm_workflow_spec_cache: path '{path}', type '{workflow_type}', {str(e)}"
+            )
+    logger.info(f"warm_workflow_spec_cache: {count} workflow specs cached")
+    return count
+
+
+# restored workflows shared by all CaseWorkflow instances within one request or celery task
+_workflow_state_cache = ContextVar("workflow_state_cache", default=None)
+
+
+def get_workflow_state_cache():
+    return _workflow_state_cache.get()
+
+
+def start_workflow_state_cache():
+    if _workflow_state_cache.get() is not None:
+        # nested scopes share the outer cache
+        return
+    return _workflow_state_cache.set({})
+
+
+def end_workflow_state_cache(token):
+    if token is not None:
+        _workflow_state_cache.reset(token)
+
+
+@contextmanager
+def workflow_state_cache():
+    token = start_workflow_state_cache()
+    try:
+        yield get_workflow_state_cache()
+    finally:
+        end_workflow_state_cache(token)
+
+
+# script tasks CaseWorkflow looks up by name to run for waiting messages
+PRUNE_KEEP_TASK_SPEC_PREFIX = "script_"
+
+
+def prune_workflow(wf):
+    """
+    Removes the subtrees of the task tree in which every task is completed or cancelled,
+    keeping the unfinished tasks, the last task and its children, the script tasks
+    looked up by name, and all their ancestors. Returns the number of removed tasks.
+    """
+    keep = set()
+    for task in wf.get_tasks():
+        if (
+            task._is_finished()
+            and task is not wf.last_task
+            and not task.task_spec.name.startswith(PRUNE_KEEP_TASK_SPEC_PREFIX)
+        ):
+            continue
+        while task is not None and task.id not in keep:
+            keep.add(task.id)
+            task = task.parent
+    if wf.last_task:
+        keep.update(child.id for child in wf.last_task.children)
+
+    removed = 0
+    for task in list(wf.get_tasks()):
+        if task.id not in keep:
+            continue
+        children = [child for child in task.children if child.id in keep]
+        if len(children) < len(task.children):
+            removed += sum(
+                len(list(child)) for child in task.children if child.id not in keep
+            )
+            task.children = children
+    if removed:
+        wf.update_task_mapping()
+    return removed
+
+
 def get_workflow_spec_files(path):
     return [
         os.path.join(path, f)
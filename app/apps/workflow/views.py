@@ -1,7 +1,7 @@
 from apps.addresses.models import District, HousingCorporation
 from apps.cases.models import Case, CaseProject, CaseReason, CaseStateType, CaseTheme
 from apps.main.filters import RelatedOrderingFilter
-from apps.main.pagination import EmptyPagination
+from apps.main.pagination import EmptyPagination, KeysetPaginationMixin
 from apps.users.permissions import (
     CanAccessSensitiveCases,
     rest_permission_classes_for_top,
@@ -10,17 +10,23 @@ from apps.workflow.serializers import (
     CaseUserTaskSerializer,
     CaseUserTaskTaskNameSerializer,
     GenericCompletedTaskCreateSerializer,
+    GenericCompletedTaskOperationSerializer,
     GenericCompletedTaskSerializer,
 )
 from apps.workflow.utils import map_variables_on_task_spec_form
+from celery import states
+from celery.result import AsyncResult
 from django.db.models import Q
+from django.http import HttpResponse
 from django_filters import rest_framework as filters
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import mixins, serializers, status, viewsets
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from .metrics import render_metrics
 from .models import CaseUserTask, GenericCompletedTask
 
 role_parameter = OpenApiParameter(
@@ -247,9 +253,15 @@ class StandardResultsSetPagination(EmptyPagination):
         OpenApiParameter(
             "housing_corporation", OpenApiTypes.NUMBER, OpenApiParameter.QUERY
         ),
+        OpenApiParameter(
+            "pagination", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["cursor"]
+        ),
+        OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+        OpenApiParameter("include_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
     ]
 )
 class CaseUserTaskViewSet(
+    KeysetPaginationMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
@@ -266,6 +278,7 @@ class CaseUserTaskViewSet(
     ordering_fields = "__all_related__"
     filterset_class = CaseUserTaskFilter
     pagination_class = StandardResultsSetPagination
+    keyset_ordering_fields = ("id", "due_date")
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -403,9 +416,15 @@ class StandardResultsSetPagination(EmptyPagination):
         OpenApiParameter("case", OpenApiTypes.NUMBER, OpenApiParameter.QUERY),
         OpenApiParameter("case__theme", OpenApiTypes.NUMBER, OpenApiParameter.QUERY),
         OpenApiParameter("case__reason", OpenApiTypes.NUMBER, OpenApiParameter.QUERY),
+        OpenApiParameter(
+            "pagination", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["cursor"]
+        ),
+        OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+        OpenApiParameter("include_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
     ]
 )
 class GenericCompletedTaskViewSet(
+    KeysetPaginationMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
@@ -414,10 +433,11 @@ class GenericCompletedTaskViewSet(
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = GenericCompletedTaskFilter
     pagination_class = StandardResultsSetPagination
+    keyset_ordering_fields = ("id", "date_added")
 
     @extend_schema(
-        description="Complete GenericCompletedTask",
-        responses={200: None},
+        description="Complete GenericCompletedTask, the new user tasks are created in the background. Follow the returned operation_id with the operations endpoint",
+        responses={202: None},
     )
     @action(
         detail=False,
@@ -458,11 +478,50 @@ class GenericCompletedTaskViewSet(
             )
 
             try:
-                GenericCompletedTask.objects.create(**data)
+                generic_completed_task = GenericCompletedTask.objects.create(**data)
                 return Response(
-                    f"CaseUserTask {data['case_user_task_id']} has been completed"
+                    {
+                        "detail": f"CaseUserTask {data['case_user_task_id']} is being completed",
+                        "operation_id": getattr(
+                            generic_completed_task, "operation_id", None
+                        ),
+                    },
+                    status=status.HTTP_202_ACCEPTED,
                 )
             except Exception as e:
                 raise e
 
         return Response(status=status.HTTP_400_BAD_REQUEST)
+
+    @extend_schema(
+        description="Status of the completion of a GenericCompletedTask, completed is true once the new user tasks exist",
+        responses={200: GenericCompletedTaskOperationSerializer},
+    )
+    @action(
+        detail=False,
+        url_path=r"operations/(?P<operation_id>[^/.]+)",
+        methods=["get"],
+        serializer_class=GenericCompletedTaskOperationSerializer,
+        pagination_class=None,
+        filter_backends=[],
+    )
+    def operation(self, request, operation_id):
+        result_status = AsyncResult(operation_id).status
+        serializer = GenericCompletedTaskOperationSerializer(
+            {
+                "operation_id": operation_id,
+                "status": result_status,
+                "completed": result_status == states.SUCCESS,
+                "failed": result_status == states.FAILURE,
+            }
+        )
+        return Response(serializer.data)
+
+
+@extend_schema(exclude=True)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def workflow_metrics(request):
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
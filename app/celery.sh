@@ -1,4 +1,10 @@
 #!/usr/bin/env bash
 set -e
 
-celery -A config worker -l info
+if [ -n "$WORKFLOW_QUEUE_PARTITION" ]; then
+    # a single process per partition queue handles the workflow tasks in order
+    celery -A config worker -l info -Q "workflow-$WORKFLOW_QUEUE_PARTITION" \
+        -n "workflow-$WORKFLOW_QUEUE_PARTITION@%h" --concurrency=1 --prefetch-multiplier=1
+else
+    celery -A config worker -l info
+fi
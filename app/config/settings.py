@@ -126,6 +126,7 @@ MIDDLEWARE = (
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "axes.middleware.AxesMiddleware",
+    "apps.workflow.middleware.WorkflowStateCacheMiddleware",
 )
 
 STATIC_URL = "/static/"
@@ -444,6 +445,7 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute=5),
     },
 }
+CELERY_TASK_ROUTES = ("apps.workflow.routing.route_workflow_task",)
 
 REDIS = os.getenv("REDIS")
 REDIS_URL = f"redis://{REDIS}"
@@ -459,6 +461,12 @@ CACHES = {
     }
 }
 
+# Seconds counts of list endpoints are cached, 0 disables the cache
+COUNT_CACHE_TIMEOUT = int(os.getenv("COUNT_CACHE_TIMEOUT", "30"))
+# From this number of rows on, approximate counts of unfiltered lists use the postgres
+# table estimate instead of counting
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", "10000"))
+
 LOGOUT_REDIRECT_URL = "/admin"
 
 DEFAULT_THEME = os.getenv("DEFAULT_THEME", "Vakantieverhuur")
@@ -504,6 +512,14 @@ OPENZAAK_DEFAULT_INFORMATIEOBJECTTYPE_URL = os.getenv(
 OPENZAAK_DEFAULT_INFORMATIEOBJECTTYPE = os.getenv(
     "OPENZAAK_DEFAULT_INFORMATIEOBJECTTYPE"
 )
+# Seconds the catalogi resources of OpenZaak are cached, and how long a cached resource
+# is still used after that while it's fetched again in the background. 0 disables the cache
+OPENZAAK_CATALOGI_CACHE_TIMEOUT = int(
+    os.getenv("OPENZAAK_CATALOGI_CACHE_TIMEOUT", "3600")
+)
+OPENZAAK_CATALOGI_CACHE_STALE_TIMEOUT = int(
+    os.getenv("OPENZAAK_CATALOGI_CACHE_STALE_TIMEOUT", "86400")
+)
 OPENZAAK_CASETYPEURL_TOEZICHT = os.getenv("OPENZAAK_CASETYPE_TOEZICHT")
 OPENZAAK_CASETYPEURL_HANDHAVING = os.getenv("OPENZAAK_CASETYPE_HANDHAVING")
 OPENZAAK_CASETYPEURL_AFGESLOTEN = os.getenv("OPENZAAK_CASETYPE_AFGESLOTEN")
@@ -561,6 +577,46 @@ DEFAULT_WORKFLOW_TIMER_DURATIONS = {
     "acceptance": timedelta(seconds=240),
 }
 
+# Parse all workflow specs from WORKFLOW_SPEC_CONFIG when a celery worker process starts
+WORKFLOW_SPEC_CACHE_WARMUP = os.getenv("WORKFLOW_SPEC_CACHE_WARMUP", "True") == "True"
+
+# Number of due workflows checked per sub task of the timer sweep
+WORKFLOW_UPDATE_CHUNK_SIZE = int(os.getenv("WORKFLOW_UPDATE_CHUNK_SIZE", "100"))
+
+# Workflow locks are kept in the cache, or as postgres advisory locks with "postgres"
+WORKFLOW_LOCK_BACKEND = os.getenv("WORKFLOW_LOCK_BACKEND", "cache")
+# Seconds a workflow lock lease lasts, it's renewed before the workflow state is saved
+WORKFLOW_LOCK_TIMEOUT = int(os.getenv("WORKFLOW_LOCK_TIMEOUT", "30"))
+# Seconds a task waits for a busy workflow lock before it's retried
+WORKFLOW_LOCK_WAIT = float(os.getenv("WORKFLOW_LOCK_WAIT", "5"))
+# Number of "workflow-<n>" queues the tasks changing a workflow are divided over by
+# workflow id, each queue needs a worker with concurrency 1. 0 uses the default queue
+WORKFLOW_QUEUE_PARTITIONS = int(os.getenv("WORKFLOW_QUEUE_PARTITIONS", "0"))
+# Record durations of the workflow engine steps, served as Prometheus histograms on /metrics/
+WORKFLOW_METRICS_ENABLED = os.getenv("WORKFLOW_METRICS_ENABLED", "False") == "True"
+# Measurements are kept per process and flushed to redis after this many, or this many seconds
+WORKFLOW_METRICS_FLUSH_SIZE = int(os.getenv("WORKFLOW_METRICS_FLUSH_SIZE", "100"))
+WORKFLOW_METRICS_FLUSH_INTERVAL = float(
+    os.getenv("WORKFLOW_METRICS_FLUSH_INTERVAL", "10")
+)
+# Also trace the workflow engine steps as spans of the sentry transaction
+WORKFLOW_TRACE_SPANS = os.getenv("WORKFLOW_TRACE_SPANS", "False") == "True"
+# Store the changes to the workflow state against a base state instead of the whole state,
+# a new base is stored once the changes are over WORKFLOW_STATE_DELTA_MAX_RATIO of the state
+WORKFLOW_STATE_DELTA = os.getenv("WORKFLOW_STATE_DELTA", "False") == "True"
+WORKFLOW_STATE_DELTA_MAX_RATIO = float(
+    os.getenv("WORKFLOW_STATE_DELTA_MAX_RATIO", "0.5")
+)
+# Remove the finished branches of the task tree before the workflow state is saved. The
+# removed tasks are gone from the stored state for good, so this is opt-in, stored states
+# can be pruned once with the prune_workflow_states command
+WORKFLOW_PRUNE_TASK_TREE = os.getenv("WORKFLOW_PRUNE_TASK_TREE", "False") == "True"
+# Serializer of the workflow state, "apps.workflow.state_serializer.WorkflowSerializer" is a
+# faster opt-in serializer that writes the same json as the one of SpiffWorkflow
+WORKFLOW_SERIALIZER = os.getenv(
+    "WORKFLOW_SERIALIZER", "SpiffWorkflow.bpmn.serializer.BpmnSerializer.BpmnSerializer"
+)
+
 WORKFLOW_SPEC_CONFIG = {
     "default": {
         "closing_procedure": {
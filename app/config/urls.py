@@ -32,7 +32,11 @@ from apps.users.views import (
     UserListView,
 )
 from apps.visits.views import VisitViewSet
-from apps.workflow.views import CaseUserTaskViewSet, GenericCompletedTaskViewSet
+from apps.workflow.views import (
+    CaseUserTaskViewSet,
+    GenericCompletedTaskViewSet,
+    workflow_metrics,
+)
 from django.conf import settings
 from django.conf.urls import include, url
 from django.conf.urls.static import static
@@ -117,6 +121,8 @@ urlpatterns = [
     ),
     path("data-model/", include("django_spaghetti.urls")),
     url("health/", include("health_check.urls")),
+    # Workflow engine step durations for Prometheus
+    path("metrics/", workflow_metrics, name="metrics"),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 # JSON handlers for errors
@@ -6,10 +6,12 @@ from apps.addresses.models import Address
 from apps.cases.models import Advertisement, Case, CaseClose, CitizenReport
 from apps.debriefings.models import Debriefing
 from apps.decisions.models import Decision
+from apps.events.models import ModelEventEmitter, emit_events
 from apps.schedules.models import Schedule
 from apps.summons.models import Summon, SummonedPerson
 from apps.visits.models import Visit
 from apps.workflow.models import GenericCompletedTask
+from django.apps import apps
 from django.conf import settings
 from faker import Faker
 
@@ -168,6 +170,13 @@ class Anonymizer:
             except Exception as e:
                 logger.error(f"ERROR: {f[0].__name__} {str(e)}")
 
+        logger.info("Rendering the event payloads of the anonymized data")
+        for model in apps.get_models():
+            if issubclass(model, ModelEventEmitter):
+                emit_events(
+                    model.objects.prefetch_related(*model.EVENT_PREFETCH_RELATED)
+                )
+
         logger.info("Anonymization done")
 
 
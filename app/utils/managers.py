@@ -3,7 +3,10 @@ from django.db.models.signals import post_save, pre_save
 
 
 class BulkCreateSignalsManager(models.Manager):
-    def bulk_create(self, objs, **kwargs):
+    def bulk_create(self, objs, send_signals=True, **kwargs):
+        # callers that handle a batch at once can skip the per instance signals
+        if not send_signals:
+            return super().bulk_create(objs, **kwargs)
         for i in objs:
             pre_save.send(i.__class__, instance=i)
         a = super().bulk_create(objs, **kwargs)
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
+from django.db import connection
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -55,3 +56,22 @@ def get_unauthenticated_client():
     Returns an unauthenticated APIClient, for unit testing API requests
     """
     return APIClient()
+
+
+def get_query_plan(queryset):
+    """
+    Returns the postgres query plan of a queryset. Sequential and full index scans are
+    disabled while explaining, so on the small test tables a table is only read through
+    an index if the index matches the filter.
+    """
+    sql, params = queryset.query.sql_with_params()
+    scan_settings = ("enable_seqscan", "enable_indexscan", "enable_indexonlyscan")
+    with connection.cursor() as cursor:
+        for setting in scan_settings:
+            cursor.execute(f"SET {setting} = off")
+        try:
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        finally:
+            for setting in scan_settings:
+                cursor.execute(f"RESET {setting}")